@@ -0,0 +1,18 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
+
+from .tokens import claims_are_stale
+
+
+class ClaimsJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    Authenticates from the access token's claims without loading CustomUser.
+    request.user is a TokenUser exposing id, user_type and plan, so only use
+    this on views that need nothing else from the user. Tokens without
+    claims, or issued before the account last changed, are resolved from
+    the database as usual.
+    """
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if claims_are_stale(user.id, validated_token):
+            return JWTAuthentication.get_user(self, validated_token)
+        return user
@@ -0,0 +1,71 @@
+"""
+Namespaced cache keys with version-based invalidation.
+
+Every cached value that belongs to a landlord (property and unit lists,
+tenant lists, dashboard stats) lives in the landlord:{id} namespace. Keys
+embed the namespace's current version, so bumping the version invalidates
+all of them at once without knowing or deleting the individual keys;
+stale entries just age out.
+"""
+from django.core.cache import cache
+from django.db import transaction
+import time
+
+# Seconds landlord-scoped values stay cached; version bumps normally
+# invalidate them well before this
+LANDLORD_CACHE_TIMEOUT = 300
+
+
+def _version_key(namespace):
+    return f"ns:{namespace}"
+
+
+def namespace_version(namespace):
+    """
+    Current version of a namespace. A missing version (never set or
+    evicted) starts from the clock so it can't collide with old keys.
+    """
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def namespaced_key(namespace, name):
+    return f"{namespace}:v{namespace_version(namespace)}:{name}"
+
+
+def bump_namespace(namespace):
+    """
+    Invalidate every key in a namespace once the current transaction
+    commits, so a concurrent read can't re-cache pre-commit data
+    """
+    def bump():
+        try:
+            cache.incr(_version_key(namespace))
+        except ValueError:
+            # Version was never set or got evicted; a fresh one is already new
+            cache.add(_version_key(namespace), int(time.time() * 1000), timeout=None)
+    transaction.on_commit(bump)
+
+
+def landlord_namespace(landlord_id):
+    return f"landlord:{landlord_id}"
+
+
+def landlord_key(landlord_id, name):
+    """
+    Cache key for a landlord-scoped value, e.g. landlord_key(7, 'properties')
+    """
+    return namespaced_key(landlord_namespace(landlord_id), name)
+
+
+def invalidate_landlord_cache(landlord_id):
+    """
+    Drop everything cached for a landlord: properties, units, tenants, stats
+    """
+    if landlord_id is None:
+        return
+    bump_namespace(landlord_namespace(landlord_id))
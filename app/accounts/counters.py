@@ -0,0 +1,38 @@
+from django.db.models import Count, Q
+import logging
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FIELDS = ('units_total', 'units_available', 'units_occupied')
+
+
+def counted_properties(properties):
+    """
+    Annotate a Property queryset with its real unit counts
+    """
+    return properties.annotate(
+        actual_total=Count('unit_list'),
+        actual_available=Count('unit_list', filter=Q(unit_list__is_available=True)),
+        actual_occupied=Count('unit_list', filter=Q(unit_list__is_available=False)),
+    )
+
+
+def find_counter_drift(properties, fix=False):
+    """
+    Compare stored unit counters with real counts. Returns a list of
+    (property, stored, actual) tuples for properties that drifted; with
+    fix=True the stored counters are corrected.
+    """
+    drifted = []
+    for prop in counted_properties(properties).iterator(chunk_size=1000):
+        stored = tuple(getattr(prop, field) for field in COUNTER_FIELDS)
+        actual = (prop.actual_total, prop.actual_available, prop.actual_occupied)
+        if stored != actual:
+            drifted.append((prop, stored, actual))
+
+    if fix and drifted:
+        for prop, _, actual in drifted:
+            prop.units_total, prop.units_available, prop.units_occupied = actual
+        properties.model.objects.bulk_update([prop for prop, _, _ in drifted], COUNTER_FIELDS, batch_size=500)
+        logger.info(f"Repaired unit counters on {len(drifted)} properties")
+    return drifted
@@ -0,0 +1,54 @@
+from django.core.cache import cache
+from django.db.models import Count, Sum, Q
+from django.utils import timezone
+
+from .models import Property
+from .caching import landlord_key, LANDLORD_CACHE_TIMEOUT
+
+
+def compute_landlord_stats(landlord_id):
+    """
+    Unit, tenant and rent figures for a landlord's dashboards: one
+    conditional aggregation over their properties/units plus one over the
+    payment rollup rows.
+    """
+    from payments.models import PaymentRollup
+    from payments.rollups import month_start
+
+    unit_stats = Property.objects.filter(landlord_id=landlord_id).aggregate(
+        properties_count=Count('id', distinct=True),
+        units_count=Count('unit_list'),
+        total_units_available=Count('unit_list', filter=Q(unit_list__is_available=True)),
+        total_units_occupied=Count('unit_list', filter=Q(unit_list__is_available=False)),
+        total_active_tenants=Count(
+            'unit_list__tenant',
+            filter=Q(unit_list__tenant__user_type='tenant', unit_list__tenant__is_active=True),
+            distinct=True
+        ),
+        total_outstanding=Sum('unit_list__rent_remaining'),
+    )
+    revenue = PaymentRollup.objects.filter(landlord_id=landlord_id).aggregate(
+        total_collected=Sum('total'),
+        monthly_revenue=Sum('total', filter=Q(payment_type='rent', month=month_start(timezone.now()))),
+    )
+
+    return {
+        **unit_stats,
+        "total_outstanding": unit_stats["total_outstanding"] or 0,
+        "total_collected": revenue["total_collected"] or 0,
+        "monthly_revenue": revenue["monthly_revenue"] or 0,
+    }
+
+
+def get_landlord_stats(landlord_id):
+    """
+    Cached landlord dashboard stats.
+    Returns (stats, cached) where cached tells whether the cache answered.
+    """
+    key = landlord_key(landlord_id, 'stats')
+    stats = cache.get(key)
+    if stats is not None:
+        return stats, True
+    stats = compute_landlord_stats(landlord_id)
+    cache.set(key, stats, timeout=LANDLORD_CACHE_TIMEOUT)
+    return stats, False
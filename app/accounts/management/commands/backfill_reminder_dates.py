@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import Unit
+from accounts.reminders import refresh_reminder_dates, REMINDER_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = "Compute next_reminder_date for every occupied unit from its tenant's reminder preferences"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=REMINDER_CHUNK_SIZE, help="Units per batch")
+        parser.add_argument('--landlord', type=int, help="Only backfill this landlord's units")
+
+    def handle(self, *args, **options):
+        units = Unit.objects.all()
+        if options['landlord']:
+            units = units.for_landlord(options['landlord'])
+
+        updated = refresh_reminder_dates(units.filter(tenant__isnull=False), chunk_size=options['chunk_size'])
+        # Vacant units never get reminders
+        cleared = units.filter(tenant__isnull=True, next_reminder_date__isnull=False).update(
+            next_reminder_date=None
+        )
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} units, cleared {cleared} vacant units"))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from accounts.purge import purge_report, purge_tenants, GRACE, PURGE_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = "Delete tenants with an unpaid deposit or who moved out, resuming any interrupted run"
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(GRACE), help="Which tenants to purge")
+        parser.add_argument('--chunk-size', type=int, default=PURGE_CHUNK_SIZE, help="Tenants deleted per transaction")
+        parser.add_argument('--dry-run', action='store_true', help="List the tenants that would be deleted")
+
+    def handle(self, *args, **options):
+        kind = options['kind']
+        if options['dry_run']:
+            report = purge_report(kind)
+            for tenant in report['tenants']:
+                self.stdout.write(f"{tenant['tenant_id']}\t{tenant['email']}\t{tenant['unit_code']}")
+            self.stdout.write(self.style.WARNING(
+                f"Dry run: {report['candidates']} tenants would be deleted (cutoff {report['cutoff']:%Y-%m-%d %H:%M})"
+            ))
+            return
+
+        result = purge_tenants(kind, chunk_size=options['chunk_size'])
+        resumed = " (resumed)" if result['resumed'] else ""
+        self.stdout.write(self.style.SUCCESS(f"Purge run {result['run']}{resumed}: deleted {result['deleted']} tenants"))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import Property
+from accounts.counters import find_counter_drift
+
+
+class Command(BaseCommand):
+    help = "Check the denormalized unit counters on properties against real unit counts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help="Repair counters that drifted")
+        parser.add_argument('--landlord', type=int, help="Only check this landlord's properties")
+
+    def handle(self, *args, **options):
+        properties = Property.objects.all()
+        if options['landlord']:
+            properties = properties.filter(landlord_id=options['landlord'])
+
+        drifted = find_counter_drift(properties, fix=options['fix'])
+        for prop, stored, actual in drifted:
+            self.stdout.write(
+                f"Property {prop.id} ({prop.name}): stored total/available/occupied {stored}, actual {actual}"
+            )
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("All property counters match"))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f"Repaired {len(drifted)} properties"))
+        else:
+            self.stdout.write(self.style.WARNING(f"{len(drifted)} properties drifted; rerun with --fix to repair"))
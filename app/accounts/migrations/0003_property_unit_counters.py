@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:21
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_unit_counters(apps, schema_editor):
+    Property = apps.get_model('accounts', 'Property')
+    properties = Property.objects.annotate(
+        actual_total=Count('unit_list'),
+        actual_available=Count('unit_list', filter=Q(unit_list__is_available=True)),
+    )
+    for prop in properties.iterator():
+        prop.units_total = prop.actual_total
+        prop.units_available = prop.actual_available
+        prop.units_occupied = prop.actual_total - prop.actual_available
+        prop.save(update_fields=['units_total', 'units_available', 'units_occupied'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_customuser_address_customuser_website_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='units_available',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='units_occupied',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='units_total',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_unit_counters, migrations.RunPython.noop),
+    ]
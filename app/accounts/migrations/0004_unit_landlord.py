@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:40
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def backfill_unit_landlord(apps, schema_editor):
+    Unit = apps.get_model('accounts', 'Unit')
+    Property = apps.get_model('accounts', 'Property')
+    Unit.objects.update(
+        landlord_id=Subquery(Property.objects.filter(pk=OuterRef('property_obj_id')).values('landlord_id')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accounts', '0003_property_unit_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='unit',
+            name='landlord',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='landlord_units', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_unit_landlord, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='unit',
+            name='landlord',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='landlord_units', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='unit',
+            index=models.Index(fields=['landlord', 'is_available'], name='unit_landlord_available_idx'),
+        ),
+    ]
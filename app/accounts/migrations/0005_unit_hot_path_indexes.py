@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_unit_landlord'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='unit',
+            index=models.Index(fields=['property_obj', 'is_available'], name='unit_property_available_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='unit',
+            index=models.Index(condition=models.Q(('tenant__isnull', False)), fields=['rent_due_date', 'rent_remaining'], name='unit_occupied_due_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_unit_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='unit',
+            name='next_reminder_date',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True),
+        ),
+    ]
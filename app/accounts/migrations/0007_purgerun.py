@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_unit_next_reminder_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurgeRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('unpaid_deposit', 'Unpaid deposit'), ('left', 'Moved out')], max_length=20)),
+                ('cutoff', models.DateTimeField()),
+                ('last_tenant_id', models.PositiveBigIntegerField(default=0)),
+                ('deleted', models.PositiveIntegerField(default=0)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_purgerun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='unit',
+            name='previous_tenant',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='previous_units', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
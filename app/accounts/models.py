@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Greatest
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.utils import timezone
 from datetime import timedelta
@@ -89,6 +90,14 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     REQUIRED_FIELDS = ['full_name']
     objects = CustomUserManager()
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets accounts.signals recompute reminder dates only when the preferences change
+        loaded = dict(zip(field_names, values))
+        instance._loaded_reminder = (loaded.get('reminder_mode'), loaded.get('reminder_value'))
+        return instance
+
     # Check if user has an active subscription
     def has_active_subscription(self):
         if hasattr(self, "subscription"):
@@ -139,6 +148,16 @@ class Subscription(models.Model):
         return f"{self.user.email} - {self.plan}"
 
 
+class LandlordScopedQuerySet(models.QuerySet):
+    """
+    QuerySet for models carrying a denormalized landlord column, so
+    landlord-scoped lists and aggregates stay on one table
+    """
+    def for_landlord(self, landlord):
+        # Accepts a user (or TokenUser) or a bare id
+        return self.filter(landlord_id=getattr(landlord, 'pk', landlord))
+
+
 class Property(models.Model):
     landlord = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     name = models.CharField(max_length=255)
@@ -146,6 +165,34 @@ class Property(models.Model):
     state = models.CharField(max_length=100)
     unit_count = models.IntegerField()   # integer count of units for this property
 
+    # Maintained counters of the units actually created (see Unit.save and
+    # accounts.signals); verify_property_counters repairs drift
+    units_total = models.PositiveIntegerField(default=0)
+    units_available = models.PositiveIntegerField(default=0)
+    units_occupied = models.PositiveIntegerField(default=0)
+
+    @classmethod
+    def adjust_counters(cls, property_id, total=0, available=0, occupied=0):
+        """
+        Atomically shift a property's unit counters by the given deltas.
+        Decrements stop at zero, since the columns are unsigned.
+        """
+        changes = {
+            field: models.F(field) + delta if delta > 0 else Greatest(models.F(field) + delta, 0)
+            for field, delta in (('units_total', total), ('units_available', available), ('units_occupied', occupied))
+            if delta
+        }
+        if changes:
+            cls.objects.filter(pk=property_id).update(**changes)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets accounts.signals spot a landlord change and re-stamp the
+        # denormalized landlord on units, payments and reports
+        instance._loaded_landlord_id = dict(zip(field_names, values)).get('landlord_id')
+        return instance
+
     def __str__(self):
         return f"{self.name}, {self.city}"
 
@@ -192,38 +239,223 @@ class Unit(models.Model):
 
     assigned_date = models.DateTimeField(null=True, blank=True)
     left_date = models.DateTimeField(null=True, blank=True)
+    # The tenant left_date refers to; the move-out purge (accounts/purge.py) deletes them later
+    previous_tenant = models.ForeignKey(
+        CustomUser, on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        related_name='previous_units'
+    )
+
+    # Next deadline reminder for the tenant (see accounts/reminders.py)
+    next_reminder_date = models.DateField(null=True, blank=True, editable=False, db_index=True)
+
+    # Copy of property_obj.landlord, kept in sync by save() so landlord
+    # queries don't have to join through Property
+    landlord = models.ForeignKey(
+        CustomUser, on_delete=models.CASCADE, related_name='landlord_units', editable=False
+    )
+
+    objects = LandlordScopedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['landlord', 'is_available'], name='unit_landlord_available_idx'),
+            models.Index(fields=['property_obj', 'is_available'], name='unit_property_available_idx'),
+            # Due/overdue rent scans in the reminder tasks; only occupied units qualify
+            models.Index(
+                fields=['rent_due_date', 'rent_remaining'], name='unit_occupied_due_idx',
+                condition=models.Q(tenant__isnull=False),
+            ),
+        ]
 
     @property
     def balance(self):
         return self.rent_remaining - self.rent_paid
 
     def clean(self):
-        current_units = self.__class__.objects.filter(property_obj=self.property_obj).count()
+        current_units = self.property_obj.units_total
         if self.property_obj.unit_count is not None and current_units >= self.property_obj.unit_count:
             raise ValidationError("The number of units for this property has reached the limit.")
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember loaded values so save() can detect changes without re-reading the row
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def get_dirty_fields(self):
+        """
+        Names of fields whose value differs from what was loaded. A field
+        deferred at load time has no loaded value, so once it holds a value
+        (assigned, or read in) it counts as dirty.
+        """
+        loaded = getattr(self, '_loaded_values', {})
+        deferred = self.get_deferred_fields()
+        return [
+            field.name for field in self._meta.concrete_fields
+            if field.attname not in deferred
+            and (field.attname not in loaded or getattr(self, field.attname) != loaded[field.attname])
+        ]
+
     def save(self, *args, **kwargs):
         # Calculate rent_remaining as rent - rent_paid
         self.rent_remaining = self.rent - self.rent_paid
-
-        if self.pk:  # existing unit
-            old_unit = Unit.objects.get(pk=self.pk)
-            if old_unit.tenant != self.tenant:
-                if self.tenant and not self.assigned_date:
+        self.landlord_id = self.property_landlord_id()
+
+        if self.pk and not self._state.adding:  # existing unit
+            loaded = getattr(self, '_loaded_values', None)
+            old_values = loaded
+            if loaded is None or not {'tenant_id', 'is_available', 'property_obj_id', 'rent_due_date'} <= loaded.keys():
+                # Instance wasn't (fully) loaded from the database; fall back to a lookup
+                old_values = Unit.objects.filter(pk=self.pk).values(
+                    'tenant_id', 'is_available', 'property_obj_id', 'rent_due_date'
+                ).first() or {}
+            old_tenant_id = old_values.get('tenant_id')
+            if old_tenant_id != self.tenant_id:
+                # An assigned_date from before the last move-out belongs to the previous tenant
+                if self.tenant_id and (
+                    not self.assigned_date or (self.left_date and self.assigned_date <= self.left_date)
+                ):
                     self.assigned_date = timezone.now()
-                elif not self.tenant and old_unit.tenant:
+                elif not self.tenant_id and old_tenant_id:
                     self.left_date = timezone.now()
+                    self.previous_tenant_id = old_tenant_id
+            if old_tenant_id != self.tenant_id or old_values.get('rent_due_date') != self.rent_due_date:
+                self.next_reminder_date = self.compute_next_reminder_date()
+
+            # Only write what changed unless the caller chose the fields
+            update_fields = kwargs.get('update_fields')
+            if loaded is not None and update_fields is None and not kwargs.get('force_insert'):
+                kwargs['update_fields'] = self.get_dirty_fields()
+            elif update_fields is not None:
+                # Keep derived columns in step with the fields they come from
+                update_fields = set(update_fields)
+                if 'property_obj' in update_fields:
+                    update_fields.add('landlord')
+                if update_fields & {'tenant', 'rent_due_date'}:
+                    update_fields.add('next_reminder_date')
+                if 'tenant' in update_fields:
+                    update_fields |= {'assigned_date', 'left_date', 'previous_tenant'}
+                kwargs['update_fields'] = update_fields
         else:  # new unit
             if self.tenant:
                 self.assigned_date = timezone.now()
-        super().save(*args, **kwargs)
-
+            self.next_reminder_date = self.compute_next_reminder_date()
+            old_values = None
+
+        counter_changes = self._counter_changes(old_values, kwargs.get('update_fields'))
+        if counter_changes:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                for property_id, deltas in counter_changes:
+                    Property.adjust_counters(property_id, **deltas)
+        else:
+            super().save(*args, **kwargs)
+
+        self._refresh_loaded_values(kwargs.get('update_fields'))
+
+    def _refresh_loaded_values(self, written):
+        """
+        Bring the loaded-values snapshot up to date with what save() wrote.
+        After a partial save only the written fields are clean; anything else
+        changed in memory must still look dirty to the next save().
+        """
+        if written is None:
+            self._loaded_values = {
+                field.attname: getattr(self, field.attname) for field in self._meta.concrete_fields
+            }
+            return
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return  # no snapshot to update; the next save falls back to a full write
+        written = set(written)
+        for field in self._meta.concrete_fields:
+            if field.name in written or field.attname in written:
+                loaded[field.attname] = getattr(self, field.attname)
+
+    def property_landlord_id(self):
+        """
+        Landlord of the unit's property, without a query when the property
+        is cached or hasn't changed since the unit was loaded
+        """
+        if Unit.property_obj.is_cached(self):
+            return self.property_obj.landlord_id
+        loaded = getattr(self, '_loaded_values', {})
+        if self.landlord_id and loaded.get('property_obj_id') == self.property_obj_id:
+            return self.landlord_id
+        return Property.objects.filter(pk=self.property_obj_id).values_list('landlord_id', flat=True).first()
+
+    def compute_next_reminder_date(self):
+        """
+        Next deadline reminder date from the tenant's reminder preferences
+        """
+        from .reminders import next_reminder_date
+
+        if not self.tenant_id or self.rent_due_date is None:
+            return None
+        if Unit.tenant.is_cached(self):
+            mode, value = self.tenant.reminder_mode, self.tenant.reminder_value
+        else:
+            mode, value = CustomUser.objects.filter(pk=self.tenant_id).values_list(
+                'reminder_mode', 'reminder_value'
+            ).first() or (None, None)
+        return next_reminder_date(mode, value, self.rent_due_date) if mode else None
+
+    def _counter_changes(self, old_values, update_fields):
+        """
+        Property counter deltas this save causes, as (property_id, deltas) pairs.
+        old_values is the pre-save snapshot, or None for a new unit.
+        """
+        def deltas(is_available, sign):
+            return {
+                'total': sign,
+                'available': sign if is_available else 0,
+                'occupied': 0 if is_available else sign,
+            }
+
+        if old_values is None:
+            return [(self.property_obj_id, deltas(self.is_available, 1))]
+        if 'is_available' not in old_values or 'property_obj_id' not in old_values:
+            return []
+        if update_fields is not None and not {'is_available', 'property_obj'} & set(update_fields):
+            return []
+        old_property_id, was_available = old_values['property_obj_id'], old_values['is_available']
+        if old_property_id == self.property_obj_id and was_available == self.is_available:
+            return []
+        return [
+            (old_property_id, deltas(was_available, -1)),
+            (self.property_obj_id, deltas(self.is_available, 1)),
+        ]
 
     def __str__(self):
         return f"{self.property_obj.name} - Unit {self.unit_number}"
 
 
 
+class PurgeRun(models.Model):
+    """
+    Progress of one tenant purge (see accounts.purge). A run with no
+    finished_at was interrupted; the next purge of the same kind resumes it
+    from last_tenant_id with the same cutoff.
+    """
+    KIND_CHOICES = [
+        ('unpaid_deposit', 'Unpaid deposit'),
+        ('left', 'Moved out'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    cutoff = models.DateTimeField()
+    last_tenant_id = models.PositiveBigIntegerField(default=0)
+    deleted = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        state = 'finished' if self.finished_at else 'unfinished'
+        return f"{self.get_kind_display()} purge #{self.pk} ({state}, {self.deleted} deleted)"
+
+
+
 # REMINDER: payments is shown in the Unit model as rent_paid and rent_remaining
 # TODO: Protect the subscription features using a decorator or middleware to ensure only subscribed users can access them
 # TODO: Ensure payments for subscription and rent are two different things
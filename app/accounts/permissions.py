@@ -1,6 +1,7 @@
 from rest_framework import permissions
 from django.core.cache import cache
 from .models import CustomUser, Subscription
+from .tokens import subscription_active_from_claims
 # REMOVE the problematic Payment import - it causes circular dependency
 
 class IsLandlord(permissions.BasePermission):
@@ -15,24 +16,34 @@ class IsSuperuser(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user.is_authenticated and request.user.is_superuser
 
+def has_active_subscription(request):
+    """
+    Decide from the access token's claims when they are current, otherwise
+    fall back to a cached Subscription lookup
+    """
+    has_active_sub = subscription_active_from_claims(request.user.id, request.auth)
+    if has_active_sub is not None:
+        return has_active_sub
+
+    # Use cache to avoid repeated database queries
+    cache_key = f"subscription_status:{request.user.id}"
+    has_active_sub = cache.get(cache_key)
+
+    if has_active_sub is None:
+        try:
+            subscription = Subscription.objects.get(user_id=request.user.id)
+            has_active_sub = subscription.is_active()
+        except Subscription.DoesNotExist:
+            has_active_sub = False
+        cache.set(cache_key, has_active_sub, timeout=300)  # Cache for 5 minutes
+
+    return has_active_sub
+
 class HasActiveSubscription(permissions.BasePermission):
     def has_permission(self, request, view):
         if not request.user.is_authenticated or request.user.user_type != 'landlord':
             return False
-        
-        # Use cache to avoid repeated database queries
-        cache_key = f"subscription_status:{request.user.id}"
-        has_active_sub = cache.get(cache_key)
-        
-        if has_active_sub is None:
-            try:
-                subscription = Subscription.objects.get(user=request.user)
-                has_active_sub = subscription.is_active()
-            except Subscription.DoesNotExist:
-                has_active_sub = False
-            cache.set(cache_key, has_active_sub, timeout=300)  # Cache for 5 minutes
-        
-        return has_active_sub
+        return has_active_subscription(request)
 
 # Remove the problematic IsTenantWithActivePayment permission if it exists
 # as it causes circular imports with Payment model
@@ -0,0 +1,75 @@
+from django.db import transaction
+import logging
+
+from .models import Property, Unit
+from .caching import invalidate_landlord_cache
+
+logger = logging.getLogger(__name__)
+
+UNIT_BATCH_SIZE = 500
+
+
+def next_unit_number(property_obj):
+    """
+    Next free numeric unit number for a property (1 when it has none)
+    """
+    numbers = [
+        int(number) for number in
+        Unit.objects.filter(property_obj=property_obj).values_list('unit_number', flat=True)
+        if number.isdigit()
+    ]
+    return max(numbers, default=0) + 1
+
+
+def build_unit(property_obj, **fields):
+    """
+    Unsaved Unit ready for bulk_create. bulk_create skips Unit.save, so the
+    derived rent_remaining and landlord are filled in here.
+    """
+    unit = Unit(property_obj=property_obj, landlord_id=property_obj.landlord_id, **fields)
+    unit.rent_remaining = unit.rent - unit.rent_paid
+    return unit
+
+
+def provision_units(property_obj, units, batch_size=UNIT_BATCH_SIZE, invalidate=True):
+    """
+    Insert unsaved units for a property with bulk_create in batches,
+    all in one transaction. Returns the created units.
+    Pass invalidate=False when provisioning several properties and call
+    invalidate_landlord_cache once at the end instead.
+    """
+    with transaction.atomic():
+        created = Unit.objects.bulk_create(units, batch_size=batch_size)
+        # bulk_create skips Unit.save, so the property counters are bumped here
+        available = sum(1 for unit in created if unit.is_available)
+        Property.adjust_counters(
+            property_obj.id, total=len(created), available=available, occupied=len(created) - available
+        )
+
+    logger.info(f"Provisioned {len(created)} units for property {property_obj.id}")
+    if invalidate:
+        invalidate_landlord_cache(property_obj.landlord_id)
+    return created
+
+
+def provision_units_for_unit_type(property_obj, unit_type, unit_count):
+    """
+    Create unit_count vacant units of a unit type, numbered after the
+    property's highest existing unit number
+    """
+    start_number = next_unit_number(property_obj)
+    slug = unit_type.name.replace(' ', '-')
+    units = [
+        build_unit(
+            property_obj,
+            unit_code=f"U-{property_obj.id}-{slug}-{number}",
+            unit_number=str(number),
+            unit_type=unit_type,
+            is_available=True,
+            rent=unit_type.rent,
+            deposit=unit_type.deposit,
+        )
+        for number in range(start_number, start_number + unit_count)
+    ]
+    return provision_units(property_obj, units)
+
@@ -0,0 +1,152 @@
+"""
+Chunked tenant purges for the deposit and move-out cleanup jobs.
+
+Each purge kind is one set-based query over units: tenants who never paid
+their deposit within DEPOSIT_GRACE of being assigned, and tenants who
+moved out of a unit (Unit.previous_tenant) more than LEFT_GRACE ago and
+haven't been given another unit since. Candidates are deleted in
+tenant-id order, chunk_size at a time, each chunk in its own short
+transaction so the payment/report cascades never hold locks for long.
+Progress is recorded on a PurgeRun after every chunk; an interrupted run
+is resumed by the next purge of the same kind.
+"""
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Count, DateTimeField, Exists, ExpressionWrapper, F, OuterRef
+from django.utils import timezone
+
+from payments.models import Payment
+from .caching import invalidate_landlord_cache
+from .models import CustomUser, Property, PurgeRun, Unit
+
+UNPAID_DEPOSIT = 'unpaid_deposit'
+LEFT = 'left'
+
+DEPOSIT_GRACE = timedelta(days=14)
+LEFT_GRACE = timedelta(days=7)
+PURGE_CHUNK_SIZE = 100
+
+GRACE = {
+    UNPAID_DEPOSIT: DEPOSIT_GRACE,
+    LEFT: LEFT_GRACE,
+}
+
+
+def purge_candidates(kind, cutoff):
+    """
+    Units naming a tenant who should be purged, for a run with the given
+    cutoff. The tenant is annotated as purge_tenant_id / purge_email.
+    """
+    if kind == UNPAID_DEPOSIT:
+        deposit_paid = Payment.objects.filter(
+            tenant_id=OuterRef('tenant_id'),
+            payment_type='deposit',
+            status='Success',
+            created_at__lte=ExpressionWrapper(
+                OuterRef('assigned_date') + DEPOSIT_GRACE, output_field=DateTimeField()
+            ),
+        )
+        return Unit.objects.filter(
+            tenant__isnull=False,
+            assigned_date__isnull=False,
+            assigned_date__lte=cutoff,
+        ).filter(~Exists(deposit_paid)).annotate(
+            purge_tenant_id=F('tenant_id'), purge_email=F('tenant__email')
+        )
+
+    if kind == LEFT:
+        # Someone who moved out and was later given another unit is still a tenant
+        rehoused = Unit.objects.filter(tenant_id=OuterRef('previous_tenant_id'))
+        return Unit.objects.filter(
+            previous_tenant__isnull=False,
+            left_date__lte=cutoff,
+        ).filter(~Exists(rehoused)).annotate(
+            purge_tenant_id=F('previous_tenant_id'), purge_email=F('previous_tenant__email')
+        )
+
+    raise ValueError(f"Unknown purge kind: {kind}")
+
+
+def release_units(tenant_ids):
+    """
+    Vacate the units of tenants about to be purged, in one update, and
+    move the property counters to match. Deleting the users alone would
+    null Unit.tenant through SET_NULL but leave the units marked occupied.
+    Returns the number of units released.
+    """
+    units = Unit.objects.filter(tenant_id__in=tenant_ids)
+    occupied = list(
+        units.filter(is_available=False).values('property_obj_id').annotate(count=Count('id'))
+    )
+    landlord_ids = set(units.values_list('landlord_id', flat=True))
+    released = units.update(
+        tenant=None, is_available=True, next_reminder_date=None, left_date=timezone.now()
+    )
+    for row in occupied:
+        Property.adjust_counters(row['property_obj_id'], available=row['count'], occupied=-row['count'])
+    for landlord_id in landlord_ids:
+        invalidate_landlord_cache(landlord_id)
+    return released
+
+
+def purge_report(kind, now=None):
+    """
+    Dry run: the tenants a purge of this kind would delete right now.
+    """
+    cutoff = (now or timezone.now()) - GRACE[kind]
+    tenants = [
+        {'tenant_id': tenant_id, 'email': email, 'unit_code': unit_code}
+        for tenant_id, email, unit_code in purge_candidates(kind, cutoff)
+        .order_by('purge_tenant_id', 'id')
+        .values_list('purge_tenant_id', 'purge_email', 'unit_code')
+    ]
+    return {
+        'kind': kind,
+        'dry_run': True,
+        'cutoff': cutoff,
+        'candidates': len({tenant['tenant_id'] for tenant in tenants}),
+        'tenants': tenants,
+    }
+
+
+def purge_tenants(kind, chunk_size=PURGE_CHUNK_SIZE, now=None):
+    """
+    Delete every candidate tenant of this kind, resuming an unfinished run
+    if there is one. Returns a summary of the run.
+    """
+    if kind not in GRACE:
+        raise ValueError(f"Unknown purge kind: {kind}")
+
+    run = PurgeRun.objects.filter(kind=kind, finished_at__isnull=True).order_by('-id').first()
+    resumed = run is not None
+    if run is None:
+        run = PurgeRun.objects.create(kind=kind, cutoff=(now or timezone.now()) - GRACE[kind])
+
+    while True:
+        with transaction.atomic():
+            # Re-read progress under a row lock so two workers never delete the same chunk twice
+            run = PurgeRun.objects.select_for_update().get(pk=run.pk)
+            chunk = list(
+                purge_candidates(kind, run.cutoff)
+                .filter(purge_tenant_id__gt=run.last_tenant_id)
+                .order_by('purge_tenant_id')
+                .values_list('purge_tenant_id', flat=True)
+                .distinct()[:chunk_size]
+            )
+            if not chunk:
+                run.finished_at = timezone.now()
+                run.save(update_fields=['finished_at'])
+                break
+            release_units(chunk)
+            CustomUser.objects.filter(pk__in=chunk).delete()
+            run.last_tenant_id = chunk[-1]
+            run.deleted += len(chunk)
+            run.save(update_fields=['last_tenant_id', 'deleted'])
+
+    return {
+        'kind': kind,
+        'dry_run': False,
+        'run': run.pk,
+        'resumed': resumed,
+        'deleted': run.deleted,
+    }
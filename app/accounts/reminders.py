@@ -0,0 +1,74 @@
+"""
+Precomputed rent deadline reminder dates.
+
+Unit.next_reminder_date holds the next day its tenant should get a
+deadline reminder, derived from the unit's rent_due_date and the tenant's
+reminder_mode/reminder_value. Unit.save and accounts.signals keep it in
+step with those fields; the daily reminder job only has to look up units
+whose date is today, then move them on to their following reminder.
+"""
+from datetime import date, timedelta
+from django.utils import timezone
+
+from .models import Unit
+
+# fixed_day reminders only fire this many days ahead of the due date
+FIXED_DAY_WINDOW = 30
+REMINDER_CHUNK_SIZE = 500
+
+
+def next_reminder_date(mode, value, due_date, from_date=None):
+    """
+    First reminder date on or after from_date (default today), or None
+    when no reminder is left before the due date.
+    - days_before: value days before the due date
+    - fixed_day: the value-th of a month, within FIXED_DAY_WINDOW days of the due date
+    """
+    if due_date is None:
+        return None
+    from_date = from_date or timezone.now().date()
+
+    if mode == 'days_before':
+        reminder = due_date - timedelta(days=value)
+        return reminder if reminder >= from_date else None
+
+    if mode == 'fixed_day':
+        day = max(from_date, due_date - timedelta(days=FIXED_DAY_WINDOW))
+        year, month = day.year, day.month
+        while True:
+            try:
+                candidate = date(year, month, value)
+            except ValueError:
+                candidate = None  # the month has no such day, or value is out of range
+            if candidate is not None and candidate >= day:
+                return candidate if candidate <= due_date else None
+            if date(year, month, 1) > due_date:
+                return None
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+    return None
+
+
+def refresh_reminder_dates(units, from_date=None, chunk_size=REMINDER_CHUNK_SIZE):
+    """
+    Recompute next_reminder_date for a queryset of units, in chunks.
+    Returns the number of units whose date changed.
+    """
+    rows = (
+        units.order_by('id')
+        .values_list('id', 'rent_due_date', 'tenant__reminder_mode', 'tenant__reminder_value', 'next_reminder_date')
+    )
+    changed = []
+    updated = 0
+    for unit_id, due_date, mode, value, current in rows.iterator(chunk_size=chunk_size):
+        new = next_reminder_date(mode, value, due_date, from_date) if mode else None
+        if new != current:
+            changed.append(Unit(id=unit_id, next_reminder_date=new))
+        if len(changed) >= chunk_size:
+            Unit.objects.bulk_update(changed, ['next_reminder_date'])
+            updated += len(changed)
+            changed = []
+    if changed:
+        Unit.objects.bulk_update(changed, ['next_reminder_date'])
+        updated += len(changed)
+    return updated
@@ -0,0 +1,90 @@
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import F, Value, Count, Min, Max, Avg, Sum, DecimalField
+from django.db.models.functions import Greatest, Round
+import logging
+
+from .models import Unit
+from .caching import invalidate_landlord_cache
+
+logger = logging.getLogger(__name__)
+
+ADJUSTMENT_TYPES = ('percentage', 'fixed', 'absolute')
+RENT_CHUNK_SIZE = 500
+
+
+def _decimal(amount):
+    return Value(amount, output_field=DecimalField(max_digits=14, decimal_places=6))
+
+
+def new_rent_expression(adjustment_type, value):
+    """
+    SQL expression for a unit's new rent, rounded to cents and never negative.
+    - percentage: rent * (1 + value / 100)
+    - fixed: rent + value
+    - absolute: value
+    """
+    if adjustment_type == 'percentage':
+        # Multiplier is computed here; some backends do integer division on value / 100
+        expression = F('rent') * _decimal(Decimal(1) + Decimal(value) / Decimal(100))
+    elif adjustment_type == 'fixed':
+        expression = F('rent') + _decimal(Decimal(value))
+    elif adjustment_type == 'absolute':
+        expression = _decimal(Decimal(value))
+    else:
+        raise ValueError(f"adjustment_type must be one of {', '.join(ADJUSTMENT_TYPES)}")
+    return Greatest(
+        Round(expression, 2, output_field=DecimalField(max_digits=10, decimal_places=2)),
+        Value(Decimal(0)),
+        output_field=DecimalField(max_digits=10, decimal_places=2)
+    )
+
+
+def _distribution(queryset, field):
+    stats = queryset.aggregate(
+        units=Count('id'), min=Min(field), max=Max(field), average=Avg(field), total=Sum(field)
+    )
+    return {key: (round(Decimal(value), 2) if value is not None and key != 'units' else value)
+            for key, value in stats.items()}
+
+
+def adjust_rent(landlord, adjustment_type, value, unit_type=None, property_id=None,
+                dry_run=False, chunk_size=RENT_CHUNK_SIZE):
+    """
+    Adjust rent for a landlord's units, optionally limited to a unit type or
+    property, with set-based UPDATEs that also keep rent_remaining in step.
+    Units are updated in id chunks, each chunk in its own transaction, so a
+    large portfolio never holds every row lock at once.
+    With dry_run, nothing is written and the before/after rent distribution is returned.
+    Returns a dict with 'updated', plus 'before'/'after' distributions for dry runs.
+    """
+    new_rent = new_rent_expression(adjustment_type, value)
+
+    units = Unit.objects.for_landlord(landlord)
+    if unit_type is not None:
+        units = units.filter(unit_type=unit_type)
+    if property_id is not None:
+        units = units.filter(property_obj_id=property_id)
+
+    if dry_run:
+        return {
+            "updated": 0,
+            "before": _distribution(units, 'rent'),
+            "after": _distribution(units.annotate(new_rent=new_rent), 'new_rent'),
+        }
+
+    unit_ids = list(units.order_by('id').values_list('id', flat=True))
+    updated = 0
+    for start in range(0, len(unit_ids), chunk_size):
+        chunk = unit_ids[start:start + chunk_size]
+        with transaction.atomic():
+            # Both expressions read the pre-update rent/rent_paid values
+            updated += Unit.objects.filter(id__in=chunk).update(
+                rent=new_rent,
+                rent_remaining=new_rent - F('rent_paid'),
+            )
+
+    # update() bypasses Unit.save and its signals
+    invalidate_landlord_cache(landlord.id)
+    logger.info(f"Rent adjusted ({adjustment_type} {value}) for {updated} units by landlord {landlord.id}")
+    return {"updated": updated}
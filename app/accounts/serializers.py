@@ -8,10 +8,13 @@ from django.core.mail import send_mail
 
 # Overide the token to use email instead of username for JWT authentication
 # accounts/serializers.py
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework import serializers
 from django.contrib.auth import authenticate
 from .models import CustomUser
+from .tokens import apply_claims
 
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
     username_field = "email"
@@ -40,6 +43,29 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         data['user_type'] = user_type
         return data
 
+    @classmethod
+    def get_token(cls, user):
+        # Claims on the refresh token are copied into each access token it issues
+        return apply_claims(super().get_token(user), user)
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Re-reads role and subscription claims on refresh so a changed
+    subscription reaches the next access token, and refuses disabled users
+    """
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        refresh = self.token_class(data.get("refresh", attrs["refresh"]))
+
+        user = CustomUser.objects.select_related('subscription').filter(
+            pk=refresh[api_settings.USER_ID_CLAIM], is_active=True
+        ).first()
+        if user is None:
+            raise InvalidToken("User not found or inactive")
+
+        data["access"] = str(apply_claims(refresh.access_token, user))
+        return data
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -108,8 +134,9 @@ class UserSerializer(serializers.ModelSerializer):
 class PropertySerializer(serializers.ModelSerializer):
     class Meta:
         model = Property
-        fields = ['id', 'landlord', 'name', 'city', 'state', 'unit_count']
-        read_only_fields = ['id', 'landlord']
+        fields = ['id', 'landlord', 'name', 'city', 'state', 'unit_count',
+                  'units_total', 'units_available', 'units_occupied']
+        read_only_fields = ['id', 'landlord', 'units_total', 'units_available', 'units_occupied']
     def create(self, validated_data):
         property = Property.objects.create(**validated_data)
         return property
@@ -170,8 +197,7 @@ class UnitSerializer(serializers.ModelSerializer):
         if not validated_data.get('unit_code'):
             prop = validated_data.get('property_obj')
             if prop and getattr(prop, 'id', None):
-                existing_count = Unit.objects.filter(property_obj=prop).count()
-                validated_data['unit_code'] = f"U-{prop.id}-{existing_count+1}"
+                validated_data['unit_code'] = f"U-{prop.id}-{prop.units_total + 1}"
             else:
                 # fallback unique code
                 import uuid
@@ -0,0 +1,89 @@
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from .models import CustomUser, Property, Unit, Subscription
+from .caching import invalidate_landlord_cache
+from .tokens import mark_claims_changed
+from .reminders import refresh_reminder_dates
+
+
+def _tenant_landlord_id(tenant):
+    return Unit.objects.filter(tenant=tenant).values_list('landlord_id', flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=Unit)
+def unit_changed(sender, instance, **kwargs):
+    invalidate_landlord_cache(instance.landlord_id)
+
+
+@receiver(post_delete, sender=Unit)
+def unit_deleted(sender, instance, **kwargs):
+    Property.adjust_counters(
+        instance.property_obj_id, total=-1,
+        available=-1 if instance.is_available else 0,
+        occupied=0 if instance.is_available else -1,
+    )
+
+
+@receiver([post_save, post_delete], sender=Property)
+def property_changed(sender, instance, **kwargs):
+    invalidate_landlord_cache(instance.landlord_id)
+
+
+@receiver(post_save, sender=Property)
+def property_landlord_changed(sender, instance, created=False, **kwargs):
+    # Units, payments and reports carry a copy of the landlord; re-stamp them
+    # on the rare reassignment of a property
+    old_landlord_id = getattr(instance, '_loaded_landlord_id', None)
+    if created or old_landlord_id is None or old_landlord_id == instance.landlord_id:
+        return
+    from payments.models import Payment
+    from payments.rollups import rebuild_rollups
+    from communication.models import Report
+
+    Unit.objects.filter(property_obj=instance).update(landlord_id=instance.landlord_id)
+    Payment.objects.filter(unit__property_obj=instance).update(landlord_id=instance.landlord_id)
+    Report.objects.filter(unit__property_obj=instance).update(landlord_id=instance.landlord_id)
+    # Rollups are keyed on the landlord, so rebuild the property's rows under the new one
+    rebuild_rollups(property=instance)
+    invalidate_landlord_cache(old_landlord_id)
+    instance._loaded_landlord_id = instance.landlord_id
+
+
+@receiver(post_save, sender=CustomUser)
+def tenant_changed(sender, instance, update_fields=None, **kwargs):
+    # Tenant details show up in the landlord's tenant and unit lists; a
+    # login only touches last_login, which nothing cached depends on
+    if instance.user_type != 'tenant' or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        return
+    invalidate_landlord_cache(_tenant_landlord_id(instance))
+
+
+@receiver(pre_delete, sender=CustomUser)
+def tenant_deleted(sender, instance, **kwargs):
+    # Resolve the landlord before the unit's tenant link is nulled out
+    if instance.user_type == 'tenant':
+        invalidate_landlord_cache(_tenant_landlord_id(instance))
+
+
+@receiver([post_save, post_delete], sender=Subscription)
+def subscription_changed(sender, instance, **kwargs):
+    # Tokens carry the plan and expiry; make existing ones re-check
+    mark_claims_changed(instance.user_id)
+
+
+@receiver(post_save, sender=CustomUser)
+def user_deactivated(sender, instance, update_fields=None, **kwargs):
+    # Stateless token auth never loads the user, so flag its tokens instead
+    if not instance.is_active and (update_fields is None or 'is_active' in update_fields):
+        mark_claims_changed(instance.id)
+
+
+@receiver(post_save, sender=CustomUser)
+def reminder_preferences_changed(sender, instance, created=False, **kwargs):
+    # The tenant's unit stores its next reminder date; recompute it for the new preferences
+    current = (instance.reminder_mode, instance.reminder_value)
+    if created or instance.user_type != 'tenant' or getattr(instance, '_loaded_reminder', None) == current:
+        return
+    refresh_reminder_dates(Unit.objects.filter(tenant=instance))
+    instance._loaded_reminder = current
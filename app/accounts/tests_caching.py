@@ -0,0 +1,97 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .caching import landlord_key, invalidate_landlord_cache
+from .models import CustomUser, Property, Unit
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class LandlordNamespaceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.landlord = CustomUser.objects.create_user(
+            email='landlord@test.com',
+            full_name='Test Landlord',
+            user_type='landlord',
+            password='testpass123'
+        )
+        self.other_landlord = CustomUser.objects.create_user(
+            email='other@test.com',
+            full_name='Other Landlord',
+            user_type='landlord',
+            password='testpass123'
+        )
+        self.tenant = CustomUser.objects.create_user(
+            email='tenant@test.com',
+            full_name='Test Tenant',
+            user_type='tenant',
+            password='testpass123'
+        )
+        self.property = Property.objects.create(
+            landlord=self.landlord,
+            name='Test Property',
+            city='Nairobi',
+            state='Nairobi County',
+            unit_count=5
+        )
+        self.unit = Unit.objects.create(
+            property_obj=self.property,
+            unit_number='101',
+            unit_code='U-101',
+            rent=10000,
+            deposit=5000,
+            tenant=self.tenant,
+            is_available=False
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.landlord)
+
+    def test_bump_invalidates_every_key_in_namespace(self):
+        """Test one version bump drops properties, units and stats together"""
+        names = ['properties', f'property:{self.property.id}:units', 'stats']
+        for name in names:
+            cache.set(landlord_key(self.landlord.id, name), 'cached')
+        cache.set(landlord_key(self.other_landlord.id, 'properties'), 'cached')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_landlord_cache(self.landlord.id)
+
+        for name in names:
+            self.assertIsNone(cache.get(landlord_key(self.landlord.id, name)))
+        self.assertEqual(cache.get(landlord_key(self.other_landlord.id, 'properties')), 'cached')
+
+    def test_property_update_refreshes_lists(self):
+        """Test updating a property shows up in the cached property list"""
+        self.client.get(reverse('property-list'))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(
+                reverse('property-update', args=[self.property.id]), {'name': 'Renamed'}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(reverse('property-list'))
+        self.assertEqual(response.data[0]['name'], 'Renamed')
+
+    def test_tenant_update_refreshes_tenant_list(self):
+        """Test a tenant editing their profile invalidates their landlord's tenant list"""
+        self.client.get(reverse('tenants-list'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tenant.full_name = 'Renamed Tenant'
+            self.tenant.save()
+
+        response = self.client.get(reverse('tenants-list'))
+        self.assertEqual(response.data['results'][0]['full_name'], 'Renamed Tenant')
+
+    def test_property_units_not_shared_between_landlords(self):
+        """Test cached units of one landlord's property are never served to another"""
+        response = self.client.get(reverse('property-units', args=[self.property.id]))
+        self.assertEqual(len(response.data), 1)
+
+        other = APIClient()
+        other.force_authenticate(user=self.other_landlord)
+        response = other.get(reverse('property-units', args=[self.property.id]))
+        self.assertEqual(response.status_code, 404)
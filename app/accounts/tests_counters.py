@@ -0,0 +1,77 @@
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+
+from .models import CustomUser, Property, Unit, UnitType
+from .provisioning import provision_units_for_unit_type
+
+
+class PropertyCounterTests(TestCase):
+    def setUp(self):
+        self.landlord = CustomUser.objects.create_user(
+            email='landlord@test.com',
+            full_name='Test Landlord',
+            user_type='landlord',
+            password='testpass123'
+        )
+        self.tenant = CustomUser.objects.create_user(
+            email='tenant@test.com',
+            full_name='Test Tenant',
+            user_type='tenant',
+            password='testpass123'
+        )
+        self.property = Property.objects.create(
+            landlord=self.landlord,
+            name='Test Property',
+            city='Nairobi',
+            state='Nairobi County',
+            unit_count=10
+        )
+
+    def counters(self):
+        self.property.refresh_from_db()
+        return (self.property.units_total, self.property.units_available, self.property.units_occupied)
+
+    def test_counters_follow_unit_lifecycle(self):
+        """Test create, assign, vacate and delete keep the counters right"""
+        unit = Unit.objects.create(property_obj=self.property, unit_number='1', unit_code='U-1')
+        Unit.objects.create(property_obj=self.property, unit_number='2', unit_code='U-2', is_available=False)
+        self.assertEqual(self.counters(), (2, 1, 1))
+
+        unit.tenant = self.tenant
+        unit.is_available = False
+        unit.save()
+        self.assertEqual(self.counters(), (2, 0, 2))
+
+        unit.tenant = None
+        unit.is_available = True
+        unit.save()
+        self.assertEqual(self.counters(), (2, 1, 1))
+
+        unit.delete()
+        self.assertEqual(self.counters(), (1, 0, 1))
+
+    def test_bulk_provisioning_updates_counters(self):
+        """Test bulk-created units are counted"""
+        unit_type = UnitType.objects.create(landlord=self.landlord, name='Studio', rent=10000)
+        provision_units_for_unit_type(self.property, unit_type, 5)
+        self.assertEqual(self.counters(), (5, 5, 0))
+
+    def test_decrement_stops_at_zero(self):
+        """Test a decrement past zero leaves the counter at zero instead of failing"""
+        Unit.objects.create(property_obj=self.property, unit_number='1', unit_code='U-1')
+        Property.adjust_counters(self.property.pk, total=-3, available=-3, occupied=1)
+        self.assertEqual(self.counters(), (0, 0, 1))
+
+    def test_verify_command_repairs_drift(self):
+        """Test the verify command reports and fixes drifted counters"""
+        Unit.objects.create(property_obj=self.property, unit_number='1', unit_code='U-1')
+        Property.objects.filter(id=self.property.id).update(units_total=7, units_available=0)
+
+        out = StringIO()
+        call_command('verify_property_counters', stdout=out)
+        self.assertIn('1 properties drifted', out.getvalue())
+        self.assertEqual(self.counters(), (7, 0, 0))
+
+        call_command('verify_property_counters', '--fix', stdout=StringIO())
+        self.assertEqual(self.counters(), (1, 1, 0))
@@ -0,0 +1,123 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .models import CustomUser, Property, Unit, UnitType
+from payments.models import Payment
+from payments.settlement import settle_rent_payment
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class LandlordDashboardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.landlord = CustomUser.objects.create_user(
+            email='landlord@test.com',
+            full_name='Test Landlord',
+            user_type='landlord',
+            password='testpass123'
+        )
+        self.tenant = CustomUser.objects.create_user(
+            email='tenant@test.com',
+            full_name='Test Tenant',
+            user_type='tenant',
+            password='testpass123'
+        )
+        self.property = Property.objects.create(
+            landlord=self.landlord,
+            name='Test Property',
+            city='Nairobi',
+            state='Nairobi County',
+            unit_count=10
+        )
+        Property.objects.create(
+            landlord=self.landlord,
+            name='Empty Property',
+            city='Nairobi',
+            state='Nairobi County',
+            unit_count=5
+        )
+        self.unit_type = UnitType.objects.create(
+            landlord=self.landlord,
+            name='Studio',
+            deposit=5000,
+            rent=15000
+        )
+        self.occupied = Unit.objects.create(
+            property_obj=self.property,
+            unit_type=self.unit_type,
+            unit_number='101',
+            unit_code='U-101',
+            rent=15000,
+            deposit=5000,
+            tenant=self.tenant,
+            is_available=False
+        )
+        Unit.objects.create(
+            property_obj=self.property,
+            unit_type=self.unit_type,
+            unit_number='102',
+            unit_code='U-102',
+            rent=12000,
+            deposit=5000
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.landlord)
+
+    def test_dashboard_stats_and_cache_flag(self):
+        """Test the dashboard is computed once and then served from cache"""
+        response = self.client.get(reverse('dashboard-stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_active_tenants'], 1)
+        self.assertEqual(response.data['total_units_available'], 1)
+        self.assertEqual(response.data['total_units_occupied'], 1)
+        self.assertFalse(response.data['cached'])
+
+        self.assertTrue(self.client.get(reverse('dashboard-stats')).data['cached'])
+
+    def test_rent_summary_counts_empty_properties(self):
+        """Test the rent summary shares the cached stats"""
+        response = self.client.get(reverse('rent-summary'))
+        self.assertEqual(response.data['properties_count'], 2)
+        self.assertEqual(response.data['units_count'], 2)
+        self.assertEqual(response.data['total_outstanding'], 27000)
+
+    def test_unit_change_invalidates(self):
+        """Test changing a unit drops the cached stats"""
+        self.client.get(reverse('dashboard-stats'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.occupied.tenant = None
+            self.occupied.is_available = True
+            self.occupied.save()
+
+        response = self.client.get(reverse('dashboard-stats'))
+        self.assertFalse(response.data['cached'])
+        self.assertEqual(response.data['total_units_available'], 2)
+
+    def test_settlement_invalidates(self):
+        """Test a settled payment drops the cached stats"""
+        payment = Payment.objects.create(
+            tenant=self.tenant,
+            unit=self.occupied,
+            amount=15000,
+            status='Pending',
+            payment_type='rent'
+        )
+        self.client.get(reverse('rent-summary'))
+        with self.captureOnCommitCallbacks(execute=True):
+            settle_rent_payment(payment.id, 'QKA1', 15000)
+
+        response = self.client.get(reverse('rent-summary'))
+        self.assertFalse(response.data['cached'])
+        self.assertEqual(response.data['total_collected'], 15000)
+        self.assertEqual(response.data['total_outstanding'], 12000)
+
+    def test_unrelated_user_save_keeps_cache(self):
+        """Test last_login updates don't invalidate"""
+        self.client.get(reverse('dashboard-stats'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tenant.save(update_fields=['last_login'])
+        self.assertTrue(self.client.get(reverse('dashboard-stats')).data['cached'])
@@ -0,0 +1,88 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from .models import CustomUser, Property, Unit
+from .provisioning import build_unit, provision_units
+from communication.models import Report
+from payments.models import Payment
+
+
+class LandlordScopeTests(TestCase):
+    def setUp(self):
+        self.landlord = CustomUser.objects.create_user(
+            email='landlord@test.com',
+            full_name='Test Landlord',
+            user_type='landlord',
+            password='testpass123'
+        )
+        self.other_landlord = CustomUser.objects.create_user(
+            email='other@test.com',
+            full_name='Other Landlord',
+            user_type='landlord',
+            password='testpass123'
+        )
+        self.tenant = CustomUser.objects.create_user(
+            email='tenant@test.com',
+            full_name='Test Tenant',
+            user_type='tenant',
+            password='testpass123'
+        )
+        self.property = Property.objects.create(
+            landlord=self.landlord,
+            name='Test Property',
+            city='Nairobi',
+            state='Nairobi County',
+            unit_count=10
+        )
+        self.unit = Unit.objects.create(
+            property_obj=self.property,
+            unit_number='101',
+            unit_code='U-101',
+            rent=10000,
+            tenant=self.tenant,
+            is_available=False
+        )
+
+    def create_payment(self):
+        return Payment.objects.create(
+            tenant=self.tenant, unit=self.unit, amount=10000, status='Success', payment_type='rent'
+        )
+
+    def create_report(self):
+        return Report.objects.create(
+            tenant=self.tenant, unit=self.unit, issue_category='plumbing',
+            issue_title='Leak', description='Kitchen sink'
+        )
+
+    def test_landlord_stamped_on_save(self):
+        """Test units, payments and reports pick up the property's landlord"""
+        self.assertEqual(self.unit.landlord_id, self.landlord.id)
+        self.assertEqual(self.create_payment().landlord_id, self.landlord.id)
+        self.assertEqual(self.create_report().landlord_id, self.landlord.id)
+
+        unit, = provision_units(self.property, [build_unit(self.property, unit_number='102', unit_code='U-102')])
+        self.assertEqual(Unit.objects.get(pk=unit.pk).landlord_id, self.landlord.id)
+
+    def test_for_landlord_stays_on_one_table(self):
+        """Test landlord-scoped queries don't join through the property"""
+        payment = self.create_payment()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(list(Payment.objects.for_landlord(self.landlord)), [payment])
+            self.assertEqual(Unit.objects.for_landlord(self.landlord.id).count(), 1)
+        for query in queries.captured_queries:
+            self.assertNotIn('JOIN', query['sql'])
+
+        self.assertFalse(Payment.objects.for_landlord(self.other_landlord).exists())
+
+    def test_property_reassignment_restamps(self):
+        """Test moving a property to another landlord moves its rows too"""
+        payment = self.create_payment()
+        report = self.create_report()
+        property_obj = Property.objects.get(pk=self.property.pk)
+        property_obj.landlord = self.other_landlord
+        property_obj.save()
+
+        for obj in (self.unit, payment, report):
+            obj.refresh_from_db()
+            self.assertEqual(obj.landlord_id, self.other_landlord.id)
@@ -0,0 +1,98 @@
+from decimal import Decimal
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .models import CustomUser, Property, Unit, UnitType
+from .provisioning import provision_units_for_unit_type
+
+
+class UnitProvisioningTests(TestCase):
+    def setUp(self):
+        self.landlord = CustomUser.objects.create_user(
+            email='landlord@test.com',
+            full_name='Test Landlord',
+            user_type='landlord',
+            password='testpass123'
+        )
+        self.property = Property.objects.create(
+            landlord=self.landlord,
+            name='Test Property',
+            city='Nairobi',
+            state='Nairobi County',
+            unit_count=500
+        )
+        self.unit_type = UnitType.objects.create(
+            landlord=self.landlord,
+            name='One Bedroom',
+            deposit=10000,
+            rent=20000
+        )
+
+    def test_units_are_numbered_after_existing_ones(self):
+        """Test numbering continues from the highest numeric unit, not the last string"""
+        for number in ('2', '10', 'A1'):
+            Unit.objects.create(property_obj=self.property, unit_number=number, unit_code=f'EXISTING-{number}')
+
+        units = provision_units_for_unit_type(self.property, self.unit_type, 3)
+
+        self.assertEqual([unit.unit_number for unit in units], ['11', '12', '13'])
+        unit = Unit.objects.get(unit_number='11')
+        self.assertEqual(unit.unit_code, f'U-{self.property.id}-One-Bedroom-11')
+        self.assertEqual(unit.rent_remaining, Decimal('20000.00'))
+        self.assertTrue(unit.is_available)
+
+    def test_large_block_uses_constant_queries(self):
+        """Test a 200 unit block doesn't cost a round trip per unit"""
+        with CaptureQueriesContext(connection) as queries:
+            provision_units_for_unit_type(self.property, self.unit_type, 200)
+        # SQLite's variable limit may split the insert, but never per unit
+        self.assertLess(len(queries), 10)
+        self.assertEqual(Unit.objects.filter(property_obj=self.property).count(), 200)
+
+    def test_signup_with_nested_properties(self):
+        """Test landlord signup provisions units for each property"""
+        response = APIClient().post(reverse('signup'), {
+            'email': 'new@test.com',
+            'full_name': 'New Landlord',
+            'user_type': 'landlord',
+            'password': 'testpass123',
+            'properties': [
+                {'name': 'Block A', 'unit_count': 4, 'vacant_units': 3, 'unit_type': 'Studio'},
+                {'name': 'Block B', 'unit_count': 2},
+            ],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        block_a = Property.objects.get(name='Block A')
+        self.assertEqual(block_a.unit_list.count(), 4)
+        self.assertEqual(block_a.unit_list.filter(is_available=True).count(), 3)
+        self.assertEqual(block_a.unit_list.filter(unit_type__name='Studio').count(), 4)
+        self.assertEqual(Property.objects.get(name='Block B').unit_list.count(), 2)
+
+    def test_registration_skips_unit_types_of_failed_property(self):
+        """Test a property that fails after creating a unit type doesn't break later properties"""
+        response = APIClient().post(reverse('complete-landlord-registration'), {
+            'session_id': 'test-session',
+            'full_name': 'New Landlord',
+            'email': 'new@test.com',
+            'phone_number': '0712345678',
+            'national_id': '12345678',
+            'mpesa_till_number': '123456',
+            'password': 'testpass123',
+            'properties': [
+                {'name': 'Broken', 'units': [
+                    {'room_type': 'studio', 'monthlyRent': '5000'},
+                    {'room_type': 'studio', 'monthlyRent': 'abc'},
+                ]},
+                {'name': 'Good', 'units': [{'room_type': 'studio', 'monthlyRent': '5000'}]},
+            ],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        self.assertFalse(Property.objects.filter(name='Broken').exists())
+        unit = Unit.objects.get(property_obj__name='Good')
+        self.assertEqual(unit.unit_type.name, 'studio')
+        self.assertEqual(UnitType.objects.filter(landlord=unit.landlord).count(), 1)
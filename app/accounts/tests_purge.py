@@ -0,0 +1,219 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import CustomUser, Property, PurgeRun, Unit
+from .purge import purge_report, purge_tenants, LEFT, UNPAID_DEPOSIT
+from payments.models import Payment
+
+
+class TenantPurgeTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.landlord = CustomUser.objects.create_user(
+            email='landlord@test.com',
+            full_name='Test Landlord',
+            user_type='landlord',
+            password='testpass123'
+        )
+        self.property = Property.objects.create(
+            landlord=self.landlord,
+            name='Test Property',
+            city='Nairobi',
+            state='Nairobi County',
+            unit_count=10
+        )
+
+    def make_tenant(self, number, assigned_days_ago, **unit_fields):
+        tenant = CustomUser.objects.create_user(
+            email=f'tenant{number}@test.com',
+            full_name=f'Tenant {number}',
+            user_type='tenant',
+            password='testpass123'
+        )
+        unit = Unit.objects.create(
+            property_obj=self.property,
+            unit_number=str(number),
+            unit_code=f'U-{number}',
+            rent=10000,
+            tenant=tenant,
+            is_available=False,
+            **unit_fields
+        )
+        Unit.objects.filter(pk=unit.pk).update(assigned_date=self.now - timedelta(days=assigned_days_ago))
+        return tenant, unit
+
+    def pay_deposit(self, tenant, unit, paid_days_after_assignment):
+        payment = Payment.objects.create(
+            tenant=tenant,
+            unit=unit,
+            payment_type='deposit',
+            amount=5000,
+            status='Success'
+        )
+        unit.refresh_from_db()
+        Payment.objects.filter(pk=payment.pk).update(
+            created_at=unit.assigned_date + timedelta(days=paid_days_after_assignment)
+        )
+
+    def test_unpaid_deposit_candidates(self):
+        """Test only tenants past the grace period without an on-time deposit are purged"""
+        unpaid, _ = self.make_tenant(1, assigned_days_ago=20)
+        paid, paid_unit = self.make_tenant(2, assigned_days_ago=20)
+        self.pay_deposit(paid, paid_unit, paid_days_after_assignment=3)
+        late, late_unit = self.make_tenant(3, assigned_days_ago=20)
+        self.pay_deposit(late, late_unit, paid_days_after_assignment=16)
+        recent, _ = self.make_tenant(4, assigned_days_ago=5)
+
+        result = purge_tenants(UNPAID_DEPOSIT)
+
+        self.assertEqual(result['deleted'], 2)
+        remaining = set(CustomUser.objects.filter(user_type='tenant').values_list('pk', flat=True))
+        self.assertEqual(remaining, {paid.pk, recent.pk})
+
+    def move_out(self, unit, days_ago):
+        unit.tenant = None
+        unit.is_available = True
+        unit.save()
+        Unit.objects.filter(pk=unit.pk).update(left_date=self.now - timedelta(days=days_ago))
+
+    def test_left_candidates(self):
+        """Test tenants who moved out over a week ago are purged, unless they were rehoused"""
+        left, left_unit = self.make_tenant(1, assigned_days_ago=60)
+        self.move_out(left_unit, days_ago=10)
+        leaving_soon, recent_unit = self.make_tenant(2, assigned_days_ago=60)
+        self.move_out(recent_unit, days_ago=2)
+        rehoused, old_unit = self.make_tenant(3, assigned_days_ago=60)
+        self.move_out(old_unit, days_ago=10)
+        new_unit = Unit.objects.create(
+            property_obj=self.property, unit_number='9', unit_code='U-9', rent=10000
+        )
+        new_unit.tenant = rehoused
+        new_unit.is_available = False
+        new_unit.save()
+        # The next occupant of the vacated unit isn't the one who left
+        next_occupant = CustomUser.objects.create_user(
+            email='next@test.com', full_name='Next Occupant', user_type='tenant', password='testpass123'
+        )
+        left_unit = Unit.objects.get(pk=left_unit.pk)
+        left_unit.tenant = next_occupant
+        left_unit.is_available = False
+        left_unit.save()
+
+        self.assertEqual(Unit.objects.get(pk=left_unit.pk).previous_tenant_id, left.pk)
+        result = purge_tenants(LEFT)
+
+        self.assertEqual(result['deleted'], 1)
+        self.assertFalse(CustomUser.objects.filter(pk=left.pk).exists())
+        self.assertEqual(
+            CustomUser.objects.filter(pk__in=[leaving_soon.pk, rehoused.pk, next_occupant.pk]).count(), 3
+        )
+
+    def test_new_tenant_gets_fresh_assigned_date(self):
+        """Test a tenant moving into a vacated unit isn't judged by the previous tenant's assignment"""
+        _, unit = self.make_tenant(1, assigned_days_ago=60)
+        self.move_out(unit, days_ago=1)
+        newcomer = CustomUser.objects.create_user(
+            email='newcomer@test.com', full_name='Newcomer', user_type='tenant', password='testpass123'
+        )
+        unit = Unit.objects.get(pk=unit.pk)
+        unit.tenant = newcomer
+        unit.is_available = False
+        unit.save()
+
+        self.assertGreater(Unit.objects.get(pk=unit.pk).assigned_date, self.now)
+        self.assertEqual(purge_report(UNPAID_DEPOSIT)['candidates'], 0)
+
+    def test_candidate_query_is_set_based(self):
+        """Test finding candidates is a single query however many units there are"""
+        for number in range(5):
+            self.make_tenant(number, assigned_days_ago=20)
+        with self.assertNumQueries(1):
+            report = purge_report(UNPAID_DEPOSIT)
+        self.assertEqual(report['candidates'], 5)
+
+    def test_dry_run_deletes_nothing(self):
+        """Test the dry-run report lists candidates without deleting or recording a run"""
+        tenant, unit = self.make_tenant(1, assigned_days_ago=20)
+        report = purge_report(UNPAID_DEPOSIT)
+
+        self.assertTrue(report['dry_run'])
+        self.assertEqual(report['tenants'], [
+            {'tenant_id': tenant.pk, 'email': tenant.email, 'unit_code': unit.unit_code}
+        ])
+        self.assertTrue(CustomUser.objects.filter(pk=tenant.pk).exists())
+        self.assertFalse(PurgeRun.objects.exists())
+
+    def test_chunks_record_progress(self):
+        """Test deletions run in chunks and the run records how far it got"""
+        tenants = [self.make_tenant(number, assigned_days_ago=20)[0] for number in range(3)]
+        result = purge_tenants(UNPAID_DEPOSIT, chunk_size=2)
+
+        run = PurgeRun.objects.get(pk=result['run'])
+        self.assertEqual(run.deleted, 3)
+        self.assertEqual(run.last_tenant_id, tenants[-1].pk)
+        self.assertIsNotNone(run.finished_at)
+        self.assertFalse(result['resumed'])
+
+    def test_interrupted_run_resumes(self):
+        """Test an unfinished run is picked up from its last tenant with its original cutoff"""
+        done, _ = self.make_tenant(1, assigned_days_ago=20)
+        pending, _ = self.make_tenant(2, assigned_days_ago=20)
+        run = PurgeRun.objects.create(
+            kind=UNPAID_DEPOSIT,
+            cutoff=self.now - timedelta(days=14),
+            last_tenant_id=done.pk,
+            deleted=1
+        )
+
+        result = purge_tenants(UNPAID_DEPOSIT)
+
+        self.assertTrue(result['resumed'])
+        self.assertEqual(result['run'], run.pk)
+        self.assertEqual(result['deleted'], 2)
+        # Tenants at or below the recorded cursor are not revisited
+        self.assertTrue(CustomUser.objects.filter(pk=done.pk).exists())
+        self.assertFalse(CustomUser.objects.filter(pk=pending.pk).exists())
+
+    def test_purge_cascades_payments(self):
+        """Test a purged tenant's payments go with them"""
+        tenant, unit = self.make_tenant(1, assigned_days_ago=20)
+        self.pay_deposit(tenant, unit, paid_days_after_assignment=18)
+
+        purge_tenants(UNPAID_DEPOSIT)
+
+        self.assertFalse(Payment.objects.filter(tenant_id=tenant.pk).exists())
+        unit.refresh_from_db()
+        self.assertIsNone(unit.tenant_id)
+
+    def test_purge_releases_units(self):
+        """Test purged tenants' units are vacated and the property counters follow"""
+        _, unit = self.make_tenant(1, assigned_days_ago=20, rent_due_date=self.now.date())
+        self.make_tenant(2, assigned_days_ago=20)
+        kept, _ = self.make_tenant(3, assigned_days_ago=2)
+        self.property.refresh_from_db()
+        self.assertEqual((self.property.units_available, self.property.units_occupied), (0, 3))
+
+        purge_tenants(UNPAID_DEPOSIT)
+
+        unit.refresh_from_db()
+        self.assertTrue(unit.is_available)
+        self.assertIsNone(unit.next_reminder_date)
+        self.assertIsNotNone(unit.left_date)
+        self.property.refresh_from_db()
+        self.assertEqual((self.property.units_available, self.property.units_occupied), (2, 1))
+        out = StringIO()
+        call_command('verify_property_counters', stdout=out)
+        self.assertIn('All property counters match', out.getvalue())
+
+    def test_command_dry_run(self):
+        """Test the management command's dry run prints candidates and leaves them in place"""
+        tenant, _ = self.make_tenant(1, assigned_days_ago=20)
+        out = StringIO()
+        call_command('purge_tenants', UNPAID_DEPOSIT, '--dry-run', stdout=out)
+
+        self.assertIn(tenant.email, out.getvalue())
+        self.assertIn('1 tenants would be deleted', out.getvalue())
+        self.assertTrue(CustomUser.objects.filter(pk=tenant.pk).exists())
@@ -0,0 +1,85 @@
+import re
+import unittest
+from datetime import timedelta
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import CustomUser, Property, Unit
+from communication.models import Report
+from payments.models import Payment, SubscriptionPayment
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', "Plans are checked with SQLite's EXPLAIN QUERY PLAN")
+class QueryPlanTests(TestCase):
+    """
+    Guards the indexes behind the hot query shapes: each queryset must be
+    answered through an index, never a full table scan
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = CustomUser.objects.create_user(
+            email='landlord@test.com',
+            full_name='Test Landlord',
+            user_type='landlord',
+            password='testpass123'
+        )
+        cls.tenant = CustomUser.objects.create_user(
+            email='tenant@test.com',
+            full_name='Test Tenant',
+            user_type='tenant',
+            password='testpass123'
+        )
+        cls.property = Property.objects.create(
+            landlord=cls.landlord,
+            name='Test Property',
+            city='Nairobi',
+            state='Nairobi County',
+            unit_count=10
+        )
+        cls.unit = Unit.objects.create(
+            property_obj=cls.property,
+            unit_number='101',
+            unit_code='U-101',
+            rent=10000,
+            tenant=cls.tenant,
+            is_available=False
+        )
+
+    def assertNoFullScan(self, queryset):
+        plan = queryset.explain()
+        # "SCAN table" reads every row; "SCAN table USING INDEX" and "SEARCH" don't
+        full_scans = [line for line in plan.splitlines() if re.search(r'\bSCAN\b', line) and 'USING' not in line]
+        self.assertEqual(full_scans, [], f"Full table scan in plan:\n{plan}\nfor:\n{queryset.query}")
+
+    def test_payment_queries(self):
+        """Test reconciliation, cleanup, deposit and landlord payment queries use indexes"""
+        cutoff = timezone.now() - timedelta(minutes=2)
+        self.assertNoFullScan(Payment.objects.filter(
+            status='Pending', mpesa_checkout_request_id__isnull=False, created_at__lt=cutoff
+        ).order_by('id'))
+        self.assertNoFullScan(Payment.objects.filter(
+            status='Pending', mpesa_checkout_request_id__isnull=True, created_at__lt=cutoff
+        ))
+        self.assertNoFullScan(Payment.objects.filter(
+            tenant=self.tenant, payment_type='deposit', status='Success'
+        ))
+        self.assertNoFullScan(Payment.objects.for_landlord(self.landlord).filter(
+            status='Success', created_at__gte=cutoff
+        ))
+        self.assertNoFullScan(SubscriptionPayment.objects.filter(
+            status='Pending', mpesa_checkout_request_id__isnull=False, transaction_date__lt=cutoff
+        ))
+
+    def test_unit_queries(self):
+        """Test due-rent, availability and landlord unit queries use indexes"""
+        self.assertNoFullScan(Unit.objects.filter(
+            tenant__isnull=False, rent_due_date__lte=timezone.now().date(), rent_remaining__gt=0
+        ))
+        self.assertNoFullScan(Unit.objects.filter(property_obj=self.property, is_available=True))
+        self.assertNoFullScan(Unit.objects.for_landlord(self.landlord).filter(is_available=True))
+
+    def test_report_queries(self):
+        """Test landlord and per-unit report queries use indexes"""
+        self.assertNoFullScan(Report.objects.for_landlord(self.landlord).filter(status='open'))
+        self.assertNoFullScan(Report.objects.filter(unit=self.unit, status='open', priority_level='urgent'))
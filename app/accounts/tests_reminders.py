@@ -0,0 +1,111 @@
+from datetime import date, timedelta
+from io import StringIO
+from django.core import mail
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from .models import CustomUser, Property, Unit
+from .reminders import next_reminder_date
+from communication.messaging import queue_deadline_reminders
+from communication.outbox import deliver_notifications
+
+
+class NextReminderDateTests(SimpleTestCase):
+    def test_days_before(self):
+        """Test days_before counts back from the due date and skips past dates"""
+        due = date(2026, 3, 20)
+        self.assertEqual(next_reminder_date('days_before', 10, due, date(2026, 3, 1)), date(2026, 3, 10))
+        self.assertIsNone(next_reminder_date('days_before', 10, due, date(2026, 3, 11)))
+
+    def test_fixed_day(self):
+        """Test fixed_day picks the next matching day inside the window before the due date"""
+        due = date(2026, 3, 1)
+        self.assertEqual(next_reminder_date('fixed_day', 1, due, date(2026, 1, 15)), date(2026, 2, 1))
+        self.assertEqual(next_reminder_date('fixed_day', 1, due, date(2026, 2, 2)), date(2026, 3, 1))
+        # February has no 30th and January 30 is outside the window
+        self.assertIsNone(next_reminder_date('fixed_day', 30, due, date(2026, 1, 31)))
+
+    def test_missing_due_date(self):
+        """Test units without a due date get no reminder"""
+        self.assertIsNone(next_reminder_date('days_before', 10, None))
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class DeadlineReminderTests(TestCase):
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.landlord = CustomUser.objects.create_user(
+            email='landlord@test.com',
+            full_name='Test Landlord',
+            user_type='landlord',
+            password='testpass123'
+        )
+        self.property = Property.objects.create(
+            landlord=self.landlord,
+            name='Test Property',
+            city='Nairobi',
+            state='Nairobi County',
+            unit_count=10
+        )
+        self.tenant = CustomUser.objects.create_user(
+            email='tenant@test.com',
+            full_name='Test Tenant',
+            user_type='tenant',
+            password='testpass123',
+            reminder_mode='days_before',
+            reminder_value=5
+        )
+        self.unit = Unit.objects.create(
+            property_obj=self.property,
+            unit_number='101',
+            unit_code='U-101',
+            rent=10000,
+            tenant=self.tenant,
+            is_available=False,
+            rent_due_date=self.today + timedelta(days=5)
+        )
+
+    def test_save_and_preference_change_recompute(self):
+        """Test the date follows the due date and the tenant's preferences"""
+        self.assertEqual(self.unit.next_reminder_date, self.today)
+
+        self.unit.rent_due_date = self.today + timedelta(days=8)
+        self.unit.save()
+        self.assertEqual(Unit.objects.get(pk=self.unit.pk).next_reminder_date, self.today + timedelta(days=3))
+
+        tenant = CustomUser.objects.get(pk=self.tenant.pk)
+        tenant.reminder_value = 2
+        tenant.save()
+        self.assertEqual(Unit.objects.get(pk=self.unit.pk).next_reminder_date, self.today + timedelta(days=6))
+
+    def test_sends_todays_reminders_and_advances(self):
+        """Test today's reminders are queued once, delivered, and the unit moves past today"""
+        other_tenant = CustomUser.objects.create_user(
+            email='nodate@test.com',
+            full_name='No Date',
+            user_type='tenant',
+            password='testpass123'
+        )
+        # A unit without a due date must not break the run
+        Unit.objects.create(
+            property_obj=self.property, unit_number='102', unit_code='U-102',
+            rent=10000, tenant=other_tenant, is_available=False
+        )
+
+        self.assertEqual(queue_deadline_reminders(), 1)
+        self.assertIsNone(Unit.objects.get(pk=self.unit.pk).next_reminder_date)
+        self.assertEqual(queue_deadline_reminders(), 0)
+
+        self.assertEqual(deliver_notifications()['sent'], 1)
+        self.assertEqual(mail.outbox[0].to, ['tenant@test.com'])
+        self.assertIn('Rent Payment Deadline Reminder', mail.outbox[0].subject)
+
+    def test_backfill_command(self):
+        """Test the backfill computes dates for rows saved before the column existed"""
+        Unit.objects.filter(pk=self.unit.pk).update(next_reminder_date=None)
+        out = StringIO()
+        call_command('backfill_reminder_dates', stdout=out)
+
+        self.assertIn('Updated 1 units', out.getvalue())
+        self.assertEqual(Unit.objects.get(pk=self.unit.pk).next_reminder_date, self.today)
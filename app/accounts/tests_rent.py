@@ -0,0 +1,92 @@
+from decimal import Decimal
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .models import CustomUser, Property, Unit, UnitType
+from .rent import adjust_rent
+
+
+class RentAdjustmentTests(TestCase):
+    def setUp(self):
+        self.landlord = CustomUser.objects.create_user(
+            email='landlord@test.com',
+            full_name='Test Landlord',
+            user_type='landlord',
+            password='testpass123'
+        )
+        self.property = Property.objects.create(
+            landlord=self.landlord,
+            name='Test Property',
+            city='Nairobi',
+            state='Nairobi County',
+            unit_count=10
+        )
+        self.studio = UnitType.objects.create(landlord=self.landlord, name='Studio', rent=10000)
+        self.bedsitter = UnitType.objects.create(landlord=self.landlord, name='Bedsitter', rent=8000)
+        self.units = [
+            Unit.objects.create(
+                property_obj=self.property, unit_type=unit_type, unit_number=str(i),
+                unit_code=f'U-{i}', rent=rent, rent_paid=paid
+            )
+            for i, (unit_type, rent, paid) in enumerate([
+                (self.studio, 10000, 4000), (self.studio, 12000, 0), (self.bedsitter, 8000, 8000)
+            ], 1)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.landlord)
+
+    def rents(self):
+        return list(Unit.objects.order_by('id').values_list('rent', 'rent_remaining'))
+
+    def test_percentage_increase_keeps_remaining_consistent(self):
+        """Test a percentage adjustment updates rent and rent_remaining together"""
+        result = adjust_rent(self.landlord, 'percentage', Decimal('10'), chunk_size=2)
+
+        self.assertEqual(result['updated'], 3)
+        self.assertEqual(self.rents(), [
+            (Decimal('11000.00'), Decimal('7000.00')),
+            (Decimal('13200.00'), Decimal('13200.00')),
+            (Decimal('8800.00'), Decimal('800.00')),
+        ])
+
+    def test_rent_never_goes_negative(self):
+        """Test large decreases are clamped at zero"""
+        adjust_rent(self.landlord, 'fixed', Decimal('-9000'), unit_type=self.bedsitter)
+        self.assertEqual(Unit.objects.get(unit_code='U-3').rent, Decimal('0.00'))
+        self.assertEqual(Unit.objects.get(unit_code='U-1').rent, Decimal('10000.00'))
+
+    def test_dry_run_previews_without_writing(self):
+        """Test dry_run returns the before/after distribution only"""
+        response = self.client.post(reverse('adjust-rent'), {
+            'adjustment_type': 'fixed', 'value': '1000', 'unit_type_id': self.studio.id, 'dry_run': True
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['before']['units'], 2)
+        self.assertEqual(response.data['before']['max'], Decimal('12000.00'))
+        self.assertEqual(response.data['after']['max'], Decimal('13000.00'))
+        self.assertEqual(response.data['after']['total'], Decimal('24000.00'))
+        self.assertEqual(Unit.objects.get(unit_code='U-2').rent, Decimal('12000.00'))
+
+    def test_put_sets_absolute_rent(self):
+        """Test PUT sets the same rent on every matched unit"""
+        response = self.client.put(reverse('adjust-rent'), {'new_rent': '9500'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['message'], 'Rent set to 9500 for 3 units successfully')
+        self.assertEqual(set(Unit.objects.values_list('rent', flat=True)), {Decimal('9500.00')})
+        self.assertEqual(Unit.objects.get(unit_code='U-1').rent_remaining, Decimal('5500.00'))
+
+    def test_invalid_input_is_rejected(self):
+        """Test non-finite amounts and non-numeric ids get a 400, not a 500"""
+        url = reverse('adjust-rent')
+        for data in (
+            {'adjustment_type': 'fixed', 'value': 'NaN'},
+            {'adjustment_type': 'percentage', 'value': 'Infinity'},
+            {'adjustment_type': 'fixed', 'value': '100', 'property_id': 'abc'},
+            {'adjustment_type': 'fixed', 'value': '100', 'unit_type_id': 'abc'},
+        ):
+            self.assertEqual(self.client.post(url, data, format='json').status_code, 400, data)
+        self.assertEqual(self.client.put(url, {'new_rent': '-Infinity'}, format='json').status_code, 400)
+        self.assertEqual(Unit.objects.get(unit_code='U-1').rent, Decimal('10000.00'))
@@ -0,0 +1,96 @@
+from datetime import timedelta
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import CustomUser, Subscription
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE, JWT_CLAIMS_TRUSTED=True)
+class TokenClaimsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.landlord = CustomUser.objects.create_user(
+            email='landlord@test.com',
+            full_name='Test Landlord',
+            user_type='landlord',
+            password='testpass123'
+        )
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post(reverse('token_obtain_pair'), {
+            'email': 'landlord@test.com',
+            'password': 'testpass123',
+            'user_type': 'landlord',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_access_token_carries_claims(self):
+        """Test login embeds role, plan and expiry in the access token"""
+        token = AccessToken(self.login()['access'])
+        self.assertEqual(token['user_type'], 'landlord')
+        self.assertEqual(token['plan'], 'free')
+        self.assertEqual(
+            token['subscription_expiry'], int(self.landlord.subscription.expiry_date.timestamp())
+        )
+
+    def test_dashboard_skips_user_and_subscription_queries(self):
+        """Test a token with current claims is authorized without loading the user"""
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.login()['access']}")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('dashboard-stats'))
+
+        self.assertEqual(response.status_code, 200)
+        sql = ' '.join(query['sql'] for query in queries.captured_queries)
+        self.assertNotIn('FROM "accounts_customuser"', sql)
+        self.assertNotIn('accounts_subscription', sql)
+
+    def test_subscription_change_makes_claims_stale(self):
+        """Test an expired subscription takes effect before the old token expires"""
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.login()['access']}")
+        with self.captureOnCommitCallbacks(execute=True):
+            Subscription.objects.filter(user=self.landlord).update(
+                expiry_date=timezone.now() - timedelta(days=1)
+            )
+            self.landlord.subscription.refresh_from_db()
+            self.landlord.subscription.save()
+
+        self.assertEqual(self.client.get(reverse('dashboard-stats')).status_code, 403)
+
+    def test_refresh_reloads_claims(self):
+        """Test refreshing issues an access token with the current plan"""
+        refresh = self.login()['refresh']
+        with self.captureOnCommitCallbacks(execute=True):
+            subscription = self.landlord.subscription
+            subscription.plan = 'basic'
+            subscription.save()
+
+        response = self.client.post(reverse('token_refresh'), {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(AccessToken(response.data['access'])['plan'], 'basic')
+
+    def test_refresh_rejects_disabled_user(self):
+        """Test a deactivated user can't refresh"""
+        refresh = self.login()['refresh']
+        self.landlord.is_active = False
+        self.landlord.save()
+
+        response = self.client.post(reverse('token_refresh'), {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(JWT_CLAIMS_TRUSTED=False)
+    def test_untrusted_claims_check_database(self):
+        """Test a per-process cache falls back to the database, so deactivation applies at once"""
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.login()['access']}")
+        CustomUser.objects.filter(pk=self.landlord.pk).update(is_active=False)
+
+        self.assertEqual(self.client.get(reverse('dashboard-stats')).status_code, 401)
@@ -0,0 +1,117 @@
+from decimal import Decimal
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from .models import CustomUser, Property, Unit
+
+
+class UnitDirtyTrackingTests(TestCase):
+    def setUp(self):
+        self.landlord = CustomUser.objects.create_user(
+            email='landlord@test.com',
+            full_name='Test Landlord',
+            user_type='landlord',
+            password='testpass123'
+        )
+        self.tenant = CustomUser.objects.create_user(
+            email='tenant@test.com',
+            full_name='Test Tenant',
+            user_type='tenant',
+            password='testpass123'
+        )
+        self.property = Property.objects.create(
+            landlord=self.landlord,
+            name='Test Property',
+            city='Nairobi',
+            state='Nairobi County',
+            unit_count=10
+        )
+        Unit.objects.create(property_obj=self.property, unit_number='1', unit_code='U-1', rent=10000)
+
+    def test_assignment_is_one_update_of_changed_fields(self):
+        """Test assigning a tenant costs a single UPDATE of the changed columns"""
+        unit = Unit.objects.get(unit_code='U-1')
+        unit.tenant = self.tenant
+        unit.is_available = False
+
+        with CaptureQueriesContext(connection) as queries:
+            unit.save()
+
+        # Signals may touch the property; the unit row itself is only written, never re-read
+        unit_queries = [
+            query['sql'] for query in queries
+            if 'FROM "accounts_unit"' in query['sql'] or query['sql'].startswith('UPDATE "accounts_unit"')
+        ]
+        self.assertEqual(len(unit_queries), 1)
+        sql = unit_queries[0]
+        self.assertTrue(sql.startswith('UPDATE'))
+        self.assertIn('"tenant_id"', sql)
+        self.assertIn('"assigned_date"', sql)
+        self.assertNotIn('"rent"', sql)
+
+        unit.refresh_from_db()
+        self.assertEqual(unit.tenant, self.tenant)
+        self.assertIsNotNone(unit.assigned_date)
+
+    def test_vacating_stamps_left_date(self):
+        """Test removing the tenant is detected from the loaded values"""
+        unit = Unit.objects.get(unit_code='U-1')
+        unit.tenant = self.tenant
+        unit.save()
+
+        unit.tenant = None
+        unit.save()
+        unit.refresh_from_db()
+        self.assertIsNone(unit.tenant)
+        self.assertIsNotNone(unit.left_date)
+
+    def test_rent_change_keeps_remaining_in_step(self):
+        """Test derived rent_remaining is saved with the changed rent"""
+        unit = Unit.objects.get(unit_code='U-1')
+        unit.rent = Decimal('12000')
+        unit.save()
+        unit.refresh_from_db()
+        self.assertEqual(unit.rent_remaining, Decimal('12000.00'))
+
+    def test_unchanged_save_writes_nothing(self):
+        """Test saving an unmodified unit issues no queries"""
+        unit = Unit.objects.get(unit_code='U-1')
+        with self.assertNumQueries(0):
+            unit.save()
+
+    def test_partial_save_leaves_other_changes_dirty(self):
+        """Test fields changed but left out of update_fields are still written by the next save"""
+        unit = Unit.objects.get(unit_code='U-1')
+        unit.rent = Decimal('500')
+        unit.unit_number = '1A'
+        unit.save(update_fields=['unit_number'])
+        self.assertEqual(Unit.objects.get(pk=unit.pk).rent, Decimal('10000.00'))
+
+        unit.save()
+        self.assertEqual(Unit.objects.get(pk=unit.pk).rent, Decimal('500.00'))
+
+    def test_partial_save_keeps_assignment_pending(self):
+        """Test an assignment left out of update_fields still counts as a change on the next save"""
+        unit = Unit.objects.get(unit_code='U-1')
+        unit.tenant = self.tenant
+        unit.is_available = False
+        unit.save(update_fields=['unit_number'])
+
+        unit.save()
+        unit.refresh_from_db()
+        self.assertEqual(unit.tenant, self.tenant)
+        self.assertFalse(unit.is_available)
+        self.property.refresh_from_db()
+        self.assertEqual((self.property.units_available, self.property.units_occupied), (0, 1))
+
+    def test_assigning_deferred_field_is_saved(self):
+        """Test a field deferred at load time is written once assigned"""
+        unit = Unit.objects.only('id', 'rent').get(unit_code='U-1')
+        unit.unit_number = '1B'
+        unit.rent = Decimal('12000')
+        unit.save()
+
+        unit = Unit.objects.get(pk=unit.pk)
+        self.assertEqual(unit.unit_number, '1B')
+        self.assertEqual((unit.rent, unit.rent_remaining), (Decimal('12000.00'), Decimal('12000.00')))
@@ -0,0 +1,88 @@
+"""
+Role and subscription claims carried in JWTs.
+
+Access tokens embed the user's type, plan and subscription expiry so
+permission checks can be decided from the token instead of loading the
+user and their Subscription on every request. When a subscription
+changes, mark_claims_changed records the time; tokens whose claims were
+issued before that are treated as stale and checked against the database
+until the client refreshes (the refresh serializer re-reads the claims).
+
+That marker lives in the cache, so claims are only trusted when every
+process shares it (JWT_CLAIMS_TRUSTED, on by default when CACHE_URL is
+set). With a per-process cache every token is checked against the
+database, or other workers would miss a change or a deactivation.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+import time
+
+CLAIM_KEYS = ('user_type', 'plan', 'subscription_expiry', 'claims_at')
+
+
+def claims_changed_key(user_id):
+    return f"user:{user_id}:claims_changed_at"
+
+
+def subscription_claims(user):
+    """
+    Claims describing a user's role and subscription; expiry is a Unix
+    timestamp, or None for lifetime plans
+    """
+    plan = expiry = None
+    if user.user_type == 'landlord':
+        subscription = getattr(user, 'subscription', None)
+        if subscription is not None:
+            plan = subscription.plan
+            if subscription.expiry_date:
+                expiry = int(subscription.expiry_date.timestamp())
+    return {
+        'user_type': user.user_type,
+        'plan': plan,
+        'subscription_expiry': expiry,
+        'claims_at': time.time(),
+    }
+
+
+def apply_claims(token, user):
+    for key, value in subscription_claims(user).items():
+        token[key] = value
+    return token
+
+
+def mark_claims_changed(user_id):
+    """
+    Flag every token issued to a user so far as stale, once the current
+    transaction commits
+    """
+    def mark():
+        cache.set(claims_changed_key(user_id), time.time(), timeout=None)
+        cache.delete(f"subscription_status:{user_id}")
+    transaction.on_commit(mark)
+
+
+def claims_are_stale(user_id, token):
+    """
+    True if the token carries no claims or they were issued before the
+    user's subscription or account last changed, or claims aren't trusted
+    """
+    if not settings.JWT_CLAIMS_TRUSTED:
+        return True
+    if token is None or 'claims_at' not in token:
+        return True
+    changed_at = cache.get(claims_changed_key(user_id))
+    return changed_at is not None and token['claims_at'] < changed_at
+
+
+def subscription_active_from_claims(user_id, token):
+    """
+    Whether the token's claims grant an active subscription. Returns None
+    when the claims are stale, meaning the caller has to check the database.
+    """
+    if claims_are_stale(user_id, token):
+        return None
+    if token.get('plan') is None:
+        return False
+    expiry = token.get('subscription_expiry')
+    return expiry is None or expiry > time.time()
@@ -13,8 +13,15 @@ from .serializers import (
 )
 from rest_framework.permissions import IsAuthenticated
 from django.core.cache import cache
+from django.db import transaction
 from .models import Property, Unit, CustomUser, Subscription, UnitType
 from .permissions import IsLandlord, IsTenant, IsSuperuser, HasActiveSubscription
+from .authentication import ClaimsJWTAuthentication
+from .caching import landlord_key, invalidate_landlord_cache
+from .dashboard import get_landlord_stats
+from .rent import adjust_rent, ADJUSTMENT_TYPES
+from .provisioning import build_unit, provision_units, provision_units_for_unit_type
+from app.pagination import paginate, DateJoinedCursorPagination
 from django.core.exceptions import ValidationError
 
 import logging
@@ -27,7 +34,7 @@ from django.http import HttpResponse
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
-from django.db.models import Count, Sum, Q
+from django.db.models import Count, Q
 from django.utils import timezone
 from datetime import timedelta
 from decimal import Decimal
@@ -70,82 +77,22 @@ class UnitTypeListCreateView(APIView):
     
     def create_units_for_unit_type(self, property_obj, unit_type, unit_count):
         """Create multiple units for a given unit type"""
-        # Get existing units to determine next unit number
-        existing_units = Unit.objects.filter(property_obj=property_obj)
-        last_unit = existing_units.order_by('-unit_number').first()
+        return provision_units_for_unit_type(property_obj, unit_type, unit_count)
 
-        if last_unit and last_unit.unit_number.isdigit():
-            start_number = int(last_unit.unit_number) + 1
-        else:
-            start_number = 1
-
-        units_created = []
-        for i in range(unit_count):
-            unit_number = start_number + i
-            unit_code = f"U-{property_obj.id}-{unit_type.name.replace(' ', '-')}-{unit_number}"
-
-            unit = Unit.objects.create(
-                property_obj=property_obj,
-                unit_code=unit_code,
-                unit_number=str(unit_number),
-                unit_type=unit_type,
-                is_available=True,
-                rent=unit_type.rent,
-                deposit=unit_type.deposit,
-            )
-            units_created.append(unit)
-
-        # Invalidate caches after creating units
-        cache.delete(f"landlord:{unit_type.landlord.id}:properties")
-        cache.delete(f"property:{property_obj.id}:units")
-
-        return units_created
 
 class LandlordDashboardStatsView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated, IsLandlord, HasActiveSubscription]
 
     def get(self, request):
-        landlord = request.user
-
-        # Total active tenants: tenants assigned to units of this landlord and active
-        total_active_tenants = CustomUser.objects.filter(
-            user_type='tenant',
-            is_active=True,
-            unit__property_obj__landlord=landlord
-        ).distinct().count()
-
-        # Total units available
-        total_units_available = Unit.objects.filter(
-            property_obj__landlord=landlord,
-            is_available=True
-        ).count()
-
-        # Total units occupied
-        total_units_occupied = Unit.objects.filter(
-            property_obj__landlord=landlord,
-            is_available=False
-        ).count()
-
-        # Monthly revenue: sum of successful rent payments in the current month for this landlord
-        now = timezone.now()
-        start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        
-        # Use created_at field instead of transaction_date
-        from payments.models import Payment
-        monthly_revenue_agg = Payment.objects.filter(
-            unit__property_obj__landlord=landlord,
-            payment_type='rent',
-            status='Success',
-            created_at__gte=start_of_month,  # Changed from transaction_date
-            created_at__lte=now  # Changed from transaction_date
-        ).aggregate(total=Sum('amount'))
-        monthly_revenue = monthly_revenue_agg['total'] or 0
+        stats, cached = get_landlord_stats(request.user.id)
 
         data = {
-            "total_active_tenants": total_active_tenants,
-            "total_units_available": total_units_available,
-            "total_units_occupied": total_units_occupied,
-            "monthly_revenue": float(monthly_revenue),
+            "total_active_tenants": stats["total_active_tenants"],
+            "total_units_available": stats["total_units_available"],
+            "total_units_occupied": stats["total_units_occupied"],
+            "monthly_revenue": float(stats["monthly_revenue"]),
+            "cached": cached,
         }
 
         return Response(data)
@@ -211,7 +158,11 @@ class AdminLandlordSubscriptionStatusView(APIView):
     permission_classes = [IsAuthenticated, IsSuperuser]
 
     def get(self, request):
-        landlords = CustomUser.objects.filter(user_type='landlord')
+        landlords = CustomUser.objects.filter(user_type='landlord').select_related('subscription')
+        return paginate(self, landlords, self.serialize)
+
+    @staticmethod
+    def serialize(landlords):
         data = []
         for landlord in landlords:
             subscription = getattr(landlord, 'subscription', None)
@@ -224,7 +175,7 @@ class AdminLandlordSubscriptionStatusView(APIView):
                 'subscription_status': status,
                 'expiry_date': subscription.expiry_date if subscription else None,
             })
-        return Response(data)
+        return data
 
 
 # Lists all tenants (cached)
@@ -233,17 +184,22 @@ class UserListView(APIView):
     permission_classes = [IsAuthenticated, IsLandlord, HasActiveSubscription]
 
     def get(self, request):
-        cache_key = f"tenants:list:{request.user.id}"
+        # One cache entry per page; a namespace bump drops them all
+        cursor = request.query_params.get('cursor', '')
+        page_size = request.query_params.get('page_size', '')
+        cache_key = landlord_key(request.user.id, f"tenants:{cursor}:{page_size}")
         tenants_data = cache.get(cache_key)
 
         if not tenants_data:
             tenants = CustomUser.objects.filter(
                 user_type="tenant",
                 is_active=True,
-                unit__property_obj__landlord=request.user
-            ).distinct()
-            serializer = UserSerializer(tenants, many=True)
-            tenants_data = serializer.data
+                unit__landlord=request.user
+            )
+            tenants_data = paginate(
+                self, tenants, lambda page: UserSerializer(page, many=True).data,
+                pagination_class=DateJoinedCursorPagination,
+            ).data
             cache.set(cache_key, tenants_data, timeout=300)
 
         return Response(tenants_data)
@@ -268,20 +224,16 @@ class UserCreateView(APIView):
                 import uuid
 
                 if properties and isinstance(properties, list):
-                    for prop in properties:
-                        name = prop.get('name') or f"Property-{uuid.uuid4().hex[:6].upper()}"
-                        city = prop.get('city', '')
-                        state = prop.get('state', '')
-                        unit_count = int(prop.get('unit_count', 0))
-                        p = Property.objects.create(landlord=user, name=name, city=city, state=state, unit_count=unit_count)
-
-                        # Create at least one unit if unit_count > 0
-                        for i in range(1, unit_count + 1):
-                            unit_number = str(i)
-                            unit_code = f"U-{p.id}-{i}"
+                    with transaction.atomic():
+                        for prop in properties:
+                            name = prop.get('name') or f"Property-{uuid.uuid4().hex[:6].upper()}"
+                            city = prop.get('city', '')
+                            state = prop.get('state', '')
+                            unit_count = int(prop.get('unit_count', 0))
+                            p = Property.objects.create(landlord=user, name=name, city=city, state=state, unit_count=unit_count)
+
                             # Determine vacancy status based on optional vacant_units or default all vacant
                             vacant_units = int(prop.get('vacant_units', unit_count))
-                            is_available = i <= vacant_units
 
                             # Optionally link to a unit_type if provided via name
                             unit_type_obj = None
@@ -289,25 +241,29 @@ class UserCreateView(APIView):
                             if unit_type_name:
                                 unit_type_obj, _ = UnitType.objects.get_or_create(landlord=user, name=unit_type_name)
 
-                            Unit.objects.create(
-                                property_obj=p,
-                                unit_code=unit_code,
-                                unit_number=unit_number,
-                                unit_type=unit_type_obj,
-                                is_available=is_available,
-                                rent=unit_type_obj.rent if unit_type_obj else 0,
-                                deposit=unit_type_obj.deposit if unit_type_obj else 0,
-                            )
+                            units = [
+                                build_unit(
+                                    p,
+                                    unit_code=f"U-{p.id}-{i}",
+                                    unit_number=str(i),
+                                    unit_type=unit_type_obj,
+                                    is_available=i <= vacant_units,
+                                    rent=unit_type_obj.rent if unit_type_obj else 0,
+                                    deposit=unit_type_obj.deposit if unit_type_obj else 0,
+                                )
+                                for i in range(1, unit_count + 1)
+                            ]
+                            provision_units(p, units, invalidate=False)
+                    invalidate_landlord_cache(user.id)
 
             # Tenant created: attempt to assign unit if landlord_code and unit_code provided
             if user.user_type == "tenant":
-                cache.delete("tenants:list")
                 landlord_code = request.data.get('landlord_code')
                 unit_code = request.data.get('unit_code')
                 if landlord_code and unit_code:
                     try:
                         landlord = CustomUser.objects.get(landlord_code=landlord_code, user_type='landlord')
-                        unit = Unit.objects.get(unit_code=unit_code, property_obj__landlord=landlord)
+                        unit = Unit.objects.for_landlord(landlord).get(unit_code=unit_code)
                         # Check for deposit payments
                         from payments.models import Payment
                         deposit_payments = Payment.objects.filter(
@@ -386,11 +342,6 @@ class CreatePropertyView(APIView):
         if serializer.is_valid():
             logger.info(f"Serializer valid, saving property for user {user.id}")
             property = serializer.save(landlord=user)
-            try:
-                cache.delete(f"landlord:{user.id}:properties")  # clear cache if you're caching landlord properties
-                logger.info(f"Cache cleared for user {user.id}")
-            except Exception as e:
-                logger.warning(f"Cache delete failed: {e}")
             logger.info(f"Property created successfully: {property.id}")
             return Response(serializer.data, status=201)
 
@@ -402,7 +353,7 @@ class LandlordPropertiesView(APIView):
     permission_classes = [IsAuthenticated, IsLandlord, HasActiveSubscription]
 
     def get(self, request):
-        cache_key = f"landlord:{request.user.id}:properties"
+        cache_key = landlord_key(request.user.id, "properties")
         properties_data = cache.get(cache_key)
 
         if not properties_data:
@@ -421,9 +372,7 @@ class CreateUnitView(APIView):
     def post(self, request):
         serializer = UnitSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            unit = serializer.save()
-            cache.delete(f"landlord:{request.user.id}:properties")
-            cache.delete(f"property:{unit.property_obj.id}:units")
+            serializer.save()
             return Response(serializer.data, status=201)
         return Response(serializer.errors, status=400)
 
@@ -433,7 +382,7 @@ class PropertyUnitsView(APIView):
     permission_classes = [IsAuthenticated, IsLandlord, HasActiveSubscription]
 
     def get(self, request, property_id):
-        cache_key = f"property:{property_id}:units"
+        cache_key = landlord_key(request.user.id, f"property:{property_id}:units")
         units_data = cache.get(cache_key)
 
         if not units_data:
@@ -465,7 +414,7 @@ class AssignTenantView(APIView):
 
         try:
             # Validate unit exists and belongs to landlord
-            unit = Unit.objects.get(id=unit_id, property_obj__landlord=request.user)
+            unit = Unit.objects.for_landlord(request.user).get(id=unit_id)
             logger.info(f"Unit found: {unit.unit_code}, available: {unit.is_available}")
 
             # Validate unit is available
@@ -511,10 +460,6 @@ class AssignTenantView(APIView):
             unit.is_available = False
             unit.save()
 
-            # Invalidate caches
-            cache.delete(f"landlord:{request.user.id}:properties")
-            cache.delete(f"property:{unit.property_obj.id}:units")
-
             logger.info(f"✅ Tenant {tenant.full_name} assigned to unit {unit.unit_number}")
 
             return Response({
@@ -563,8 +508,6 @@ class UpdatePropertyView(APIView):
             serializer = PropertySerializer(property, data=request.data, partial=True)
             if serializer.is_valid():
                 serializer.save()
-                cache.delete(f"landlord:{request.user.id}:properties")
-                cache.delete(f"property:{property_id}:units")
                 return Response(serializer.data)
             return Response(serializer.errors, status=400)
         except Property.DoesNotExist:
@@ -574,8 +517,6 @@ class UpdatePropertyView(APIView):
         try:
             property = Property.objects.get(id=property_id, landlord=request.user)
             property.delete()
-            cache.delete(f"landlord:{request.user.id}:properties")
-            cache.delete(f"property:{property_id}:units")
             return Response({"message": "Property deleted successfully."}, status=200)
         except Property.DoesNotExist:
             return Response({"error": "Property not found or you do not have permission"}, status=404)
@@ -586,12 +527,10 @@ class UpdateUnitView(APIView):
 
     def put(self, request, unit_id):
         try:
-            unit = Unit.objects.get(id=unit_id, property_obj__landlord=request.user)
+            unit = Unit.objects.for_landlord(request.user).get(id=unit_id)
             serializer = UnitSerializer(unit, data=request.data, partial=True, context={'request': request})
             if serializer.is_valid():
                 serializer.save()
-                cache.delete(f"landlord:{request.user.id}:properties")
-                cache.delete(f"property:{unit.property_obj.id}:units")
                 return Response(serializer.data)
             return Response(serializer.errors, status=400)
         except Unit.DoesNotExist:
@@ -599,11 +538,8 @@ class UpdateUnitView(APIView):
 
     def delete(self, request, unit_id):
         try:
-            unit = Unit.objects.get(id=unit_id, property_obj__landlord=request.user)
-            property_id = unit.property_obj.id
+            unit = Unit.objects.for_landlord(request.user).get(id=unit_id)
             unit.delete()
-            cache.delete(f"landlord:{request.user.id}:properties")
-            cache.delete(f"property:{property_id}:units")
             return Response({"message": "Unit deleted successfully."}, status=200)
         except Unit.DoesNotExist:
             return Response({"error": "Unit not found or you do not have permission"}, status=404)
@@ -618,7 +554,6 @@ class TenantUpdateUnitView(APIView):
             serializer = UnitNumberSerializer(unit, data=request.data, partial=True)
             if serializer.is_valid():
                 serializer.save()
-                cache.delete(f"property:{unit.property_obj.id}:units")
                 return Response(serializer.data)
             return Response(serializer.errors, status=400)
         except Unit.DoesNotExist:
@@ -637,8 +572,6 @@ class UpdateUserView(APIView):
             if serializer.is_valid():
                 serializer.save()
                 cache.delete(f"user:{user_id}")
-                if user.user_type == "tenant":
-                    cache.delete("tenants:list")
                 return Response(serializer.data)
             return Response(serializer.errors, status=400)
         except CustomUser.DoesNotExist:
@@ -651,101 +584,89 @@ class UpdateUserView(APIView):
             user = CustomUser.objects.get(id=user_id)
             user.delete()
             cache.delete(f"user:{user_id}")
-            if user.user_type == "tenant":
-                cache.delete("tenants:list")
             return Response({"message": "User deleted successfully."}, status=200)
         except CustomUser.DoesNotExist:
             return Response({"error": "User not found"}, status=404)
 
 
 class AdjustRentView(APIView):
+    """
+    Adjust rent for a landlord's units in bulk.
+    POST: adjustment_type 'percentage', 'fixed' or 'absolute' with a value
+    PUT: new_rent for every matched unit
+    Both accept optional unit_type_id / property_id filters and dry_run,
+    which returns the before/after rent distribution without saving.
+    """
     permission_classes = [IsAuthenticated, IsLandlord, HasActiveSubscription]
 
     def post(self, request):
         landlord = request.user
-        adjustment_type = request.data.get('adjustment_type')  # 'percentage' or 'fixed'
+        adjustment_type = request.data.get('adjustment_type')  # 'percentage', 'fixed' or 'absolute'
         value = request.data.get('value')  # decimal, positive for increase, negative for decrease
-        unit_type_id = request.data.get('unit_type_id')  # optional, if provided, adjust only units of this type
 
-        logger.info(f"AdjustRentView POST: Landlord {landlord.id} adjusting rent, adjustment_type={adjustment_type}, value={value}, unit_type_id={unit_type_id}")
+        logger.info(f"AdjustRentView POST: Landlord {landlord.id} adjusting rent, adjustment_type={adjustment_type}, value={value}, unit_type_id={request.data.get('unit_type_id')}")
 
-        if adjustment_type not in ['percentage', 'fixed']:
-            return Response({"error": "adjustment_type must be 'percentage' or 'fixed'"}, status=400)
+        if adjustment_type not in ADJUSTMENT_TYPES:
+            return Response({"error": "adjustment_type must be 'percentage', 'fixed' or 'absolute'"}, status=400)
 
         try:
-            value = Decimal(value)
-        except (ValueError, TypeError):
+            value = Decimal(str(value))
+            if not value.is_finite():
+                raise ValueError("NaN and Infinity are not amounts")
+        except (ValueError, TypeError, ArithmeticError):
             return Response({"error": "value must be a valid number"}, status=400)
 
-        # Filter units
-        units = Unit.objects.filter(property_obj__landlord=landlord)
-        if unit_type_id:
-            try:
-                unit_type = UnitType.objects.get(id=unit_type_id, landlord=landlord)
-                units = units.filter(unit_type=unit_type)
-            except UnitType.DoesNotExist:
-                return Response({"error": "UnitType not found or not owned by you"}, status=404)
-
-        updated_count = 0
-        for unit in units:
-            old_rent = unit.rent
-            if adjustment_type == 'percentage':
-                new_rent = old_rent * (Decimal(1) + value / Decimal(100))
-            else:  # fixed
-                new_rent = old_rent + value
-            # Ensure rent doesn't go negative
-            new_rent = max(Decimal(0), new_rent)
-            unit.rent = new_rent
-            unit.save()  # This will update rent_remaining
-            updated_count += 1
-
-        logger.info(f"AdjustRentView POST: Rent adjusted for {updated_count} units by landlord {landlord.id}")
-
-        # Invalidate caches
-        cache.delete(f"landlord:{landlord.id}:properties")
-        # Also invalidate rent_summary cache
-        from payments.views import RentSummaryView
-        cache.delete(f"rent_summary:{landlord.id}")
-
-        return Response({"message": f"Rent adjusted for {updated_count} units successfully"})
+        return self.adjust(request, adjustment_type, value, "Rent adjusted for {count} units successfully")
 
     def put(self, request):
         landlord = request.user
         new_rent = request.data.get('new_rent')
-        unit_type_id = request.data.get('unit_type_id')  # optional
 
-        logger.info(f"AdjustRentView PUT: Landlord {landlord.id} setting new rent, new_rent={new_rent}, unit_type_id={unit_type_id}")
+        logger.info(f"AdjustRentView PUT: Landlord {landlord.id} setting new rent, new_rent={new_rent}, unit_type_id={request.data.get('unit_type_id')}")
 
         if new_rent is None:
             return Response({"error": "new_rent is required"}, status=400)
 
         try:
-            new_rent = Decimal(new_rent)
-        except (ValueError, TypeError):
+            new_rent = Decimal(str(new_rent))
+            if not new_rent.is_finite():
+                raise ValueError("NaN and Infinity are not amounts")
+        except (ValueError, TypeError, ArithmeticError):
             return Response({"error": "new_rent must be a valid number"}, status=400)
 
-        units = Unit.objects.filter(property_obj__landlord=landlord)
+        return self.adjust(request, 'absolute', new_rent, f"Rent set to {new_rent} for {{count}} units successfully")
+
+    def adjust(self, request, adjustment_type, value, message):
+        landlord = request.user
+        unit_type_id = request.data.get('unit_type_id')  # optional, if provided, adjust only units of this type
+        property_id = request.data.get('property_id')  # optional, if provided, adjust only this property
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+
+        try:
+            unit_type_id = int(unit_type_id) if unit_type_id else None
+            property_id = int(property_id) if property_id else None
+        except (ValueError, TypeError):
+            return Response({"error": "unit_type_id and property_id must be integers"}, status=400)
+
+        unit_type = None
         if unit_type_id:
             try:
                 unit_type = UnitType.objects.get(id=unit_type_id, landlord=landlord)
-                units = units.filter(unit_type=unit_type)
             except UnitType.DoesNotExist:
                 return Response({"error": "UnitType not found or not owned by you"}, status=404)
 
-        updated_count = 0
-        for unit in units:
-            unit.rent = new_rent
-            unit.save()
-            updated_count += 1
+        if property_id and not Property.objects.filter(id=property_id, landlord=landlord).exists():
+            return Response({"error": "Property not found or not owned by you"}, status=404)
 
-        logger.info(f"AdjustRentView PUT: Rent set to {new_rent} for {updated_count} units by landlord {landlord.id}")
+        result = adjust_rent(
+            landlord, adjustment_type, value,
+            unit_type=unit_type, property_id=property_id, dry_run=dry_run
+        )
 
-        # Invalidate caches
-        cache.delete(f"landlord:{landlord.id}:properties")
-        from payments.views import RentSummaryView
-        cache.delete(f"rent_summary:{landlord.id}")
+        if dry_run:
+            return Response({"dry_run": True, "before": result["before"], "after": result["after"]})
+        return Response({"message": message.format(count=result["updated"])})
 
-        return Response({"message": f"Rent set to {new_rent} for {updated_count} units successfully"})
 
 # View to check subscription status (landlord only)
 class SubscriptionStatusView(APIView):
@@ -831,7 +752,7 @@ class LandlordAvailableUnitsView(APIView):
     permission_classes = [IsAuthenticated, IsLandlord, HasActiveSubscription]
 
     def get(self, request):
-        units = Unit.objects.filter(property_obj__landlord=request.user, is_available=True)
+        units = Unit.objects.for_landlord(request.user).filter(is_available=True)
         serializer = AvailableUnitsSerializer(units, many=True)
         return Response(serializer.data)
 
@@ -847,7 +768,11 @@ class LandlordsListView(APIView):
     permission_classes = [IsAuthenticated, IsSuperuser]
 
     def get(self, request):
-        landlords = CustomUser.objects.filter(user_type='landlord')
+        landlords = CustomUser.objects.filter(user_type='landlord').select_related('subscription')
+        return paginate(self, landlords, self.serialize)
+
+    @staticmethod
+    def serialize(landlords):
         data = []
         for landlord in landlords:
             subscription = getattr(landlord, 'subscription', None)
@@ -860,7 +785,7 @@ class LandlordsListView(APIView):
                 'subscription_status': status,
                 'expiry_date': subscription.expiry_date if subscription else None,
             })
-        return Response(data)
+        return data
 
 
 class PendingApplicationsView(APIView):
@@ -885,7 +810,7 @@ class EvictedTenantsView(APIView):
         evicted_tenants = CustomUser.objects.filter(
             user_type="tenant",
             is_active=False,
-            unit__property_obj__landlord=request.user
+            unit__landlord=request.user
         ).distinct()
         serializer = UserSerializer(evicted_tenants, many=True)
         return Response(serializer.data)
@@ -1196,62 +1121,73 @@ class CompleteLandlordRegistrationView(APIView):
                 properties_data = all_data.get('properties', [])
                 created_properties = []
                 
+                unit_types = {}
+
                 for property_data in properties_data:
                     try:
-                        # Create property
-                        property_obj = Property.objects.create(
-                            landlord=landlord,
-                            name=property_data.get('name', f'Property-{uuid.uuid4().hex[:6].upper()}'),
-                            city='Nairobi',
-                            state='Nairobi',
-                            unit_count=len(property_data.get('units', []))
-                        )
-                        
-                        # Create units for this property
-                        units_data = property_data.get('units', [])
-                        created_units = []
-                        
-                        for i, unit_data in enumerate(units_data, 1):
-                            # Create unit type if it doesn't exist
-                            room_type = unit_data.get('room_type', 'studio')
-                            unit_type, created = UnitType.objects.get_or_create(
+                        with transaction.atomic():
+                            # Unit types created here roll back with this property if it
+                            # fails, so only keep them once the property is saved
+                            property_unit_types = dict(unit_types)
+
+                            # Create property
+                            property_obj = Property.objects.create(
                                 landlord=landlord,
-                                name=room_type,
-                                defaults={
-                                    'deposit': Decimal('0.00'),
-                                    'rent': Decimal(unit_data.get('monthlyRent', '0')),
-                                    'number_of_units': 0
-                                }
-                            )
-                            
-                            # Generate unique unit code
-                            unit_number = unit_data.get('unitNumber', f'Unit-{i}')
-                            unit_code = f"U-{property_obj.id}-{unit_number}-{uuid.uuid4().hex[:8]}"
-                            
-                            # Create the unit
-                            unit = Unit.objects.create(
-                                property_obj=property_obj,
-                                unit_code=unit_code,  # Use the unique generated code
-                                unit_number=unit_number,
-                                bedrooms=self.get_bedroom_count(room_type),
-                                bathrooms=1,
-                                unit_type=unit_type,
-                                rent=Decimal(unit_data.get('monthlyRent', '0')),
-                                deposit=Decimal(unit_data.get('monthlyRent', '0')),  # Deposit = 1 month rent
-                                is_available=True
+                                name=property_data.get('name', f'Property-{uuid.uuid4().hex[:6].upper()}'),
+                                city='Nairobi',
+                                state='Nairobi',
+                                unit_count=len(property_data.get('units', []))
                             )
-                            created_units.append(unit.id)
-                        
+
+                            # Build units for this property in memory, then insert them in bulk
+                            units_data = property_data.get('units', [])
+                            units = []
+
+                            for i, unit_data in enumerate(units_data, 1):
+                                # Create unit type if it doesn't exist (once per room type)
+                                room_type = unit_data.get('room_type', 'studio')
+                                if room_type not in property_unit_types:
+                                    property_unit_types[room_type], _ = UnitType.objects.get_or_create(
+                                        landlord=landlord,
+                                        name=room_type,
+                                        defaults={
+                                            'deposit': Decimal('0.00'),
+                                            'rent': Decimal(unit_data.get('monthlyRent', '0')),
+                                            'number_of_units': 0
+                                        }
+                                    )
+
+                                # Generate unique unit code
+                                unit_number = unit_data.get('unitNumber', f'Unit-{i}')
+                                unit_code = f"U-{property_obj.id}-{unit_number}-{uuid.uuid4().hex[:8]}"
+
+                                units.append(build_unit(
+                                    property_obj,
+                                    unit_code=unit_code,  # Use the unique generated code
+                                    unit_number=unit_number,
+                                    bedrooms=self.get_bedroom_count(room_type),
+                                    bathrooms=1,
+                                    unit_type=property_unit_types[room_type],
+                                    rent=Decimal(unit_data.get('monthlyRent', '0')),
+                                    deposit=Decimal(unit_data.get('monthlyRent', '0')),  # Deposit = 1 month rent
+                                    is_available=True
+                                ))
+
+                            created_units = provision_units(property_obj, units, invalidate=False)
+
+                        unit_types = property_unit_types
                         created_properties.append({
                             'id': property_obj.id,
                             'name': property_obj.name,
                             'units_count': len(created_units)
                         })
-                        
+
                     except Exception as prop_error:
                         logger.error(f"Error creating property: {str(prop_error)}")
                         continue
 
+                invalidate_landlord_cache(landlord.id)
+
                 # FIX 2: Check if subscription already exists before creating
                 try:
                     subscription = Subscription.objects.get(user=landlord)
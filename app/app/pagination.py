@@ -0,0 +1,47 @@
+"""
+Cursor (keyset) pagination for list endpoints.
+
+Pages are fetched with WHERE <ordering field> < <cursor position> instead of
+OFFSET, so a deep page costs the same as the first one. Orderings always end
+in the primary key so rows sharing a timestamp still come back in a stable
+order.
+"""
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Default for every list endpoint; newest rows first by primary key.
+    Clients can ask for ?page_size= up to MAX_PAGE_SIZE.
+    """
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+    ordering = ('-id',)
+
+
+class CreatedAtCursorPagination(KeysetCursorPagination):
+    ordering = ('-created_at', '-id')
+
+
+class ReportedDateCursorPagination(KeysetCursorPagination):
+    ordering = ('-reported_date', '-id')
+
+
+class TransactionDateCursorPagination(KeysetCursorPagination):
+    ordering = ('-transaction_date', '-id')
+
+
+class DateJoinedCursorPagination(KeysetCursorPagination):
+    ordering = ('-date_joined', '-id')
+
+
+def paginate(view, queryset, serialize, pagination_class=KeysetCursorPagination):
+    """
+    Paginated response for APIView-based lists. serialize turns the page's
+    model instances into response data.
+    """
+    paginator = pagination_class()
+    page = paginator.paginate_queryset(queryset, view.request, view=view)
+    return paginator.get_paginated_response(serialize(page))
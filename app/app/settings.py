@@ -46,6 +46,21 @@ CELERY_BEAT_SCHEDULE = {
         "task": "app.tasks.deadline_reminder_task",
         "schedule": crontab(hour=10, minute=0),
     },
+    # Query Daraja for pending payments whose callback never arrived
+    "reconcile-pending-payments": {
+        "task": "app.tasks.reconcile_pending_payments_task",
+        "schedule": crontab(minute='*/5'),
+    },
+    # Send whatever the reminder and summary jobs queued in the notification outbox
+    "deliver-notifications": {
+        "task": "app.tasks.deliver_notifications_task",
+        "schedule": timedelta(seconds=30),
+    },
+    # Settle callbacks queued in the M-Pesa callback inbox
+    "drain-mpesa-callback-inbox": {
+        "task": "app.tasks.process_callback_inbox_task",
+        "schedule": timedelta(seconds=10),
+    },
 }
 
 
@@ -81,7 +96,6 @@ INSTALLED_APPS = [
     #dependencies
     'rest_framework',
     'rest_framework_simplejwt',
-    "django_crontab",
     'corsheaders',
     #local apps
     'accounts',
@@ -153,7 +167,11 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    # Keyset pagination on every list endpoint (see app/pagination.py)
+    'DEFAULT_PAGINATION_CLASS': 'app.pagination.KeysetCursorPagination',
+    'PAGE_SIZE': config('API_PAGE_SIZE', default=50, cast=int),
 }
+API_MAX_PAGE_SIZE = config('API_MAX_PAGE_SIZE', default=200, cast=int)
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -203,14 +221,42 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'ROTATE_REFRESH_TOKENS': False,
     'BLACKLIST_AFTER_ROTATION': True,
+    # Refreshing re-reads the role/subscription claims (accounts/tokens.py)
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.serializers.ClaimsTokenRefreshSerializer',
 }
 
-# Cache Configuration - Use DummyCache for Render deployment
-CACHES = {
-    "default": {
-        "BACKEND": "django.core.cache.backends.dummy.DummyCache",
+# Cache Configuration - Redis when CACHE_URL is set (shared by all web and
+# worker processes), otherwise a per-process local-memory cache for dev/tests.
+# Landlord data is invalidated by bumping namespace versions (accounts/caching.py),
+# which only works if every process sees the same cache.
+CACHE_URL = config('CACHE_URL', default='')
+if CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": CACHE_URL,
+            "KEY_PREFIX": config('CACHE_KEY_PREFIX', default='makau'),
+            "TIMEOUT": 300,
+            "OPTIONS": {
+                "CLIENT_CLASS": "django_redis.client.DefaultClient",
+                # A Redis outage degrades to cache misses instead of 500s
+                "IGNORE_EXCEPTIONS": True,
+            },
+        }
     }
-}
+    DJANGO_REDIS_LOG_IGNORED_EXCEPTIONS = True
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "makau-rentals",
+        }
+    }
+
+# Decide permissions from JWT claims without a database lookup. Revocation is
+# signalled through the cache (accounts/tokens.py), so only enable this when
+# the cache is shared by every process.
+JWT_CLAIMS_TRUSTED = config('JWT_CLAIMS_TRUSTED', default=bool(CACHE_URL), cast=bool)
 
 # Logging Configuration
 LOGGING = {
@@ -243,6 +289,22 @@ EMAIL_USE_TLS = True
 # TODO: Creaete a dedicated email for the application
 EMAIL_HOST_USER = config('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD')
+# Tenants per rent reminder subtask; each subtask sends over one SMTP connection
+RENT_REMINDER_CHUNK_SIZE = config('RENT_REMINDER_CHUNK_SIZE', default=200, cast=int)
+# Outbound mail (communication.mailer): messages per batch, messages per SMTP
+# session before reconnecting, and retries for a message whose session drops
+MAIL_BATCH_SIZE = config('MAIL_BATCH_SIZE', default=50, cast=int)
+MAIL_MAX_PER_CONNECTION = config('MAIL_MAX_PER_CONNECTION', default=100, cast=int)
+MAIL_SEND_RETRIES = config('MAIL_SEND_RETRIES', default=1, cast=int)
+# Notification outbox (communication.outbox): rows leased per delivery batch,
+# how long a lease lasts, sends per row before giving up, and per-channel
+# messages per minute
+NOTIFICATION_BATCH_SIZE = config('NOTIFICATION_BATCH_SIZE', default=100, cast=int)
+NOTIFICATION_LEASE_SECONDS = config('NOTIFICATION_LEASE_SECONDS', default=300, cast=int)
+NOTIFICATION_MAX_ATTEMPTS = config('NOTIFICATION_MAX_ATTEMPTS', default=3, cast=int)
+NOTIFICATION_RATE_LIMITS = {
+    'email': config('NOTIFICATION_EMAIL_PER_MINUTE', default=120, cast=int),
+}
 
 # Mpesa Configuration
 # TODO: Update these settings with your actual Mpesa credentials
@@ -261,6 +323,35 @@ MPESA_DEPOSIT_CALLBACK_URL = config('MPESA_DEPOSIT_CALLBACK_URL', default=MPESA_
 # B2C callback URLs
 MPESA_B2C_RESULT_URL = config('MPESA_B2C_RESULT_URL', default=MPESA_CALLBACK_URL)
 MPESA_B2C_TIMEOUT_URL = config('MPESA_B2C_TIMEOUT_URL', default=MPESA_CALLBACK_URL)
+# Seconds before Daraja's expires_in at which a cached access token is considered stale
+MPESA_TOKEN_EXPIRY_MARGIN = config('MPESA_TOKEN_EXPIRY_MARGIN', default=60, cast=int)
+# When True, STK push views create the pending payment, queue the Daraja call on Celery
+# and answer 202 immediately instead of holding the worker for Daraja's response
+MPESA_ASYNC_STK = config('MPESA_ASYNC_STK', default=False, cast=bool)
+# Daraja HTTP client: keep-alive pool size per worker process, retries for idempotent calls only
+MPESA_HTTP_POOL_SIZE = config('MPESA_HTTP_POOL_SIZE', default=10, cast=int)
+MPESA_HTTP_MAX_RETRIES = config('MPESA_HTTP_MAX_RETRIES', default=2, cast=int)
+MPESA_HTTP_BACKOFF = config('MPESA_HTTP_BACKOFF', default=0.5, cast=float)
+# When True, callback views store the raw body in the MpesaCallback inbox and ack at once;
+# process_callback_inbox_task settles the entries in batches
+MPESA_CALLBACK_INBOX = config('MPESA_CALLBACK_INBOX', default=False, cast=bool)
+MPESA_CALLBACK_BATCH_SIZE = config('MPESA_CALLBACK_BATCH_SIZE', default=100, cast=int)
+MPESA_CALLBACK_MAX_ATTEMPTS = config('MPESA_CALLBACK_MAX_ATTEMPTS', default=5, cast=int)
+# Reconciler: pending payments older than MIN_AGE seconds are checked with STK Push Query,
+# CONCURRENCY queries in flight at most and RATE queries per second overall; ones Daraja
+# still has no result for after MAX_AGE seconds are failed as abandoned
+MPESA_RECONCILE_MIN_AGE = config('MPESA_RECONCILE_MIN_AGE', default=120, cast=int)
+MPESA_RECONCILE_MAX_AGE = config('MPESA_RECONCILE_MAX_AGE', default=3600, cast=int)
+MPESA_RECONCILE_CHUNK_SIZE = config('MPESA_RECONCILE_CHUNK_SIZE', default=200, cast=int)
+MPESA_RECONCILE_CONCURRENCY = config('MPESA_RECONCILE_CONCURRENCY', default=4, cast=int)
+MPESA_RECONCILE_RATE = config('MPESA_RECONCILE_RATE', default=5, cast=float)
+# (connect, read) timeouts in seconds per Daraja endpoint
+MPESA_HTTP_TIMEOUTS = {
+    "oauth": (3.05, 10),
+    "stk_push": (3.05, 30),
+    "stk_query": (3.05, 15),
+    "b2c": (3.05, 30),
+}
 
 # Logging Configuration - Enhanced for payment callbacks
 LOGGING = {
@@ -11,137 +11,171 @@ def send_report_email_task(report_id):
     except Report.DoesNotExist:
         print(f"Report with id {report_id} does not exist.")
 from django.utils import timezone
-from datetime import timedelta
-from accounts.models import Unit, CustomUser
-from payments.models import Payment
-from communication.messaging import send_bulk_emails
-from django.core.mail import send_mail
+from accounts.models import Unit
+from accounts.purge import purge_tenants, UNPAID_DEPOSIT, LEFT, PURGE_CHUNK_SIZE
+from communication.messaging import rent_reminder_message, landlord_summary_message
+from communication.outbox import dedupe_key, deliver_notifications, enqueue, notification
 from django.conf import settings
+from itertools import groupby
+from operator import itemgetter
+import logging
+import time
+
+logger = logging.getLogger(__name__)
 
 
 @shared_task
-def notify_due_rent_task():
+def notify_due_rent_task(chunk_size=None):
     """
     Celery task to notify tenants whose rent is due today or overdue.
+    Streams the due units in one query and bulk-queues one reminder per
+    tenant per day in the notification outbox, chunk_size at a time;
+    deliver_notifications_task sends them.
     """
+    chunk_size = chunk_size or settings.RENT_REMINDER_CHUNK_SIZE
+    started = time.monotonic()
     today = timezone.now().date()
-    due_units = Unit.objects.filter(
+    rows = Unit.objects.filter(
         tenant__isnull=False,
         rent_due_date__lte=today,
         rent_remaining__gt=0
+    ).order_by('id').values_list(
+        'tenant_id', 'tenant__email', 'tenant__full_name', 'rent_due_date', 'rent_remaining'
     )
-    tenants = [u.tenant for u in due_units if u.tenant]
-
-    if tenants:
-        send_bulk_emails(tenants)
 
-    return f"Notified {len(tenants)} tenants with due/overdue rent"
+    tenants, queued, chunk = 0, 0, []
+    for tenant_id, email, full_name, due_date, balance in rows.iterator(chunk_size=chunk_size):
+        # Re-running the task on the same day finds these keys already queued
+        chunk.append(notification(
+            'rent_reminder', tenant_id,
+            dedupe_key('rent_reminder', tenant_id, due_date, today),
+            rent_reminder_message(email, full_name, balance),
+        ))
+        if len(chunk) == chunk_size:
+            tenants, queued, chunk = tenants + len(chunk), queued + enqueue(chunk), []
+    if chunk:
+        tenants, queued = tenants + len(chunk), queued + enqueue(chunk)
+
+    return (
+        f"Queued reminders for {queued} of {tenants} tenants with due/overdue rent "
+        f"({time.monotonic() - started:.2f}s)"
+    )
 
 
 @shared_task
-def landlord_summary_task():
+def landlord_summary_task(chunk_size=None):
     """
     Celery task to send landlords a summary of tenants with due/overdue rent.
     Runs daily (or weekly if you prefer).
+    All overdue units come back in one query ordered by landlord; each
+    landlord's digest is queued once per day in the notification outbox,
+    chunk_size landlords per insert.
     """
+    chunk_size = chunk_size or settings.MAIL_BATCH_SIZE
     today = timezone.now().date()
-    landlords = CustomUser.objects.filter(user_type="landlord")
-
-    for landlord in landlords:
-        # Get all units owned by this landlord
-        units = Unit.objects.filter(property_obj__landlord=landlord)
-
-        # Filter tenants who are due/overdue
-        overdue_units = units.filter(
-            tenant__isnull=False,
-            rent_due_date__lte=today,
-            rent_remaining__gt=0
-        )
-
-        if not overdue_units.exists():
-            continue  # Skip landlords with no overdue tenants
-
-        # Build summary message
-        summary_lines = []
-        total_outstanding = 0
-        for unit in overdue_units:
-            tenant = unit.tenant
-            summary_lines.append(
-                f"Unit {unit.unit_number} - Tenant: {tenant.full_name} "
-                f"({tenant.email}) | Due: {unit.rent_due_date} | Outstanding: KES {unit.rent_remaining}"
-            )
-            total_outstanding += float(unit.rent_remaining)
-
-        subject = "Daily Rent Summary - Overdue Tenants"
-        message = (
-            f"Hello {landlord.full_name},\n\n"
-            f"Here is the summary of overdue tenants in your properties:\n\n"
-            + "\n".join(summary_lines)
-            + f"\n\nTotal Outstanding: KES {total_outstanding}\n\n"
-            "Regards,\nYour Rental Management System"
-        )
-
-        try:
-            send_mail(subject, message, settings.EMAIL_HOST_USER, [landlord.email])
-        except Exception as e:
-            print(f"Failed to send summary to {landlord.email}: {e}")
-
-    return "Landlord summaries sent"
+    rows = Unit.objects.filter(
+        tenant__isnull=False,
+        rent_due_date__lte=today,
+        rent_remaining__gt=0
+    ).order_by('landlord_id', 'id').values_list(
+        'landlord_id', 'landlord__email', 'landlord__full_name',
+        'unit_number', 'tenant__full_name', 'tenant__email', 'rent_due_date', 'rent_remaining',
+    )
+
+    landlords, queued, chunk = 0, 0, []
+    for (landlord_id, email, full_name), group in groupby(rows.iterator(), key=itemgetter(0, 1, 2)):
+        units = [
+            (unit_number, tenant_name, tenant_email, due_date, balance)
+            for _, _, _, unit_number, tenant_name, tenant_email, due_date, balance in group
+        ]
+        chunk.append(notification(
+            'landlord_summary', landlord_id,
+            dedupe_key('landlord_summary', landlord_id, today),
+            landlord_summary_message(email, full_name, units),
+        ))
+        landlords += 1
+        if len(chunk) >= chunk_size:
+            queued, chunk = queued + enqueue(chunk), []
+    if chunk:
+        queued += enqueue(chunk)
+
+    return f"Queued summaries for {queued} of {landlords} landlords"
 
 
 @shared_task
-def delete_unpaid_deposit_tenants():
+def deliver_notifications_task(channel='email'):
     """
-    Celery task to delete tenants who haven't paid deposit within 14 days of assignment.
+    Celery task to send what's waiting in the notification outbox for one
+    channel, within that channel's rate limit.
     """
-    now = timezone.now()
-    cutoff_date = now - timedelta(days=14)
-    units = Unit.objects.filter(
-        tenant__isnull=False,
-        assigned_date__isnull=False,
-        assigned_date__lte=cutoff_date
+    stats = deliver_notifications(channel)
+    logger.info(
+        f"Notification delivery ({channel}): {stats['sent']} sent, {stats['retrying']} to retry, "
+        f"{stats['failed']} failed, {stats['expired']} leases expired"
+        + (", rate limited" if stats['throttled'] else "")
     )
-    deleted_count = 0
-    for unit in units:
-        tenant = unit.tenant
-        # Check if there is a successful deposit payment within 14 days
-        deposit_deadline = unit.assigned_date + timedelta(days=14)
-        has_deposit = Payment.objects.filter(
-            tenant=tenant,
-            payment_type='deposit',
-            status='Success',
-            transaction_date__lte=deposit_deadline
-        ).exists()
-        if not has_deposit:
-            tenant.delete()
-            deleted_count += 1
-    return f"Deleted {deleted_count} tenants for unpaid deposit"
+    return stats
+
+
+@shared_task
+def delete_unpaid_deposit_tenants(chunk_size=None):
+    """
+    Celery task to delete tenants who haven't paid deposit within 14 days of assignment.
+    """
+    result = purge_tenants(UNPAID_DEPOSIT, chunk_size=chunk_size or PURGE_CHUNK_SIZE)
+    return f"Deleted {result['deleted']} tenants for unpaid deposit"
 
 
 @shared_task
-def delete_left_tenants():
+def delete_left_tenants(chunk_size=None):
     """
     Celery task to delete tenants who have been out of a unit for 7 days.
     """
-    now = timezone.now()
-    cutoff_date = now - timedelta(days=7)
-    units = Unit.objects.filter(
-        left_date__isnull=False,
-        left_date__lte=cutoff_date
+    result = purge_tenants(LEFT, chunk_size=chunk_size or PURGE_CHUNK_SIZE)
+    return f"Deleted {result['deleted']} tenants who left units"
+
+
+@shared_task
+def initiate_stk_push_task(kind, payment_id, phone_number):
+    """
+    Celery task to send a queued STK push to Daraja.
+    The checkout request ID or failure reason is written back to the payment.
+    """
+    from payments.stk import initiate_stk_push
+    result = initiate_stk_push(kind, payment_id, phone_number)
+    if result["success"]:
+        return f"STK push sent for {kind} payment {payment_id}: {result['checkout_request_id']}"
+    return f"STK push failed for {kind} payment {payment_id}: {result['error']}"
+
+
+@shared_task
+def process_callback_inbox_task():
+    """
+    Celery task to settle callbacks waiting in the M-Pesa callback inbox.
+    """
+    from payments.inbox import drain_callback_inbox
+    stats = drain_callback_inbox()
+    return f"Settled {stats['processed']} callbacks, {stats['failed']} failed"
+
+
+@shared_task
+def reconcile_pending_payments_task():
+    """
+    Celery task to settle or fail pending payments via STK Push Query.
+    """
+    from payments.reconcile import reconcile_pending_payments
+    stats = reconcile_pending_payments()
+    return (
+        f"Checked {stats['checked']} pending payments: {stats['settled']} settled, "
+        f"{stats['failed']} failed, {stats['expired']} expired, backlog {stats['backlog']}"
     )
-    deleted_count = 0
-    for unit in units:
-        if unit.tenant:  # Though it should be None, but to be safe
-            unit.tenant.delete()
-            deleted_count += 1
-    return f"Deleted {deleted_count} tenants who left units"
 
 
 @shared_task
 def deadline_reminder_task():
     """
-    Celery task to send reminders to tenants whose rent payment deadline is 10 days away.
+    Celery task to queue reminders for tenants whose rent payment deadline is coming up.
     """
-    from communication.messaging import send_deadline_reminders
-    send_deadline_reminders()
-    return "Deadline reminders sent"
+    from communication.messaging import queue_deadline_reminders
+    queued = queue_deadline_reminders()
+    return f"Queued {queued} deadline reminders"
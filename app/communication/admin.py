@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Report
+from .models import Report, Notification
 
 @admin.register(Report)
 class ReportAdmin(admin.ModelAdmin):
@@ -53,4 +53,18 @@ class ReportAdmin(admin.ModelAdmin):
     
     def unit_number(self, obj):
         return obj.unit.unit_number if obj.unit else 'No Unit'
-    unit_number.short_description = 'Unit Number'
\ No newline at end of file
+    unit_number.short_description = 'Unit Number'
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'channel', 'address', 'status', 'attempts', 'created_at', 'sent_at')
+    list_filter = ('kind', 'channel', 'status')
+    search_fields = ('address', 'dedupe_key')
+    readonly_fields = ('created_at', 'sent_at', 'leased_until')
+    actions = ['requeue']
+
+    @admin.action(description="Requeue selected failed notifications")
+    def requeue(self, request, queryset):
+        requeued = queryset.filter(status='failed').update(status='pending', attempts=0, last_error='')
+        self.message_user(request, f"Requeued {requeued} notifications")
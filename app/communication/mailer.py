@@ -0,0 +1,112 @@
+"""
+Outbound email over reused SMTP connections.
+
+Mailer takes an iterable of EmailMessages and sends them MAIL_BATCH_SIZE
+at a time over one open connection, instead of a new SMTP/TLS session
+per email. Each message in a batch is handed to the open connection on
+its own, so a refused recipient is recorded against exactly that message
+while the rest of the batch still goes out. The connection is recycled
+after MAIL_MAX_PER_CONNECTION messages, since relays cap how much they
+accept per session; if it drops mid-batch, the mailer reconnects and
+retries the message up to MAIL_SEND_RETRIES times.
+"""
+import logging
+import smtplib
+from itertools import islice
+from django.conf import settings
+from django.core.mail import get_connection, EmailMessage
+
+logger = logging.getLogger(__name__)
+
+# The relay rejected this message; retrying it on a new session won't help
+MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+# The session is gone (SMTPException subclasses OSError, so check MESSAGE_ERRORS first)
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError)
+
+
+def build_message(subject, body, to):
+    """
+    An EmailMessage from the application's sender address to one or more recipients.
+    """
+    return EmailMessage(subject, body, settings.EMAIL_HOST_USER, to if isinstance(to, list) else [to])
+
+
+class Mailer:
+    """
+    Sends messages in batches over reused connections.
+    connection_kwargs are passed to get_connection() (backend, host, port, ...).
+    """
+
+    def __init__(self, batch_size=None, max_per_connection=None, retries=None, **connection_kwargs):
+        self.batch_size = batch_size or settings.MAIL_BATCH_SIZE
+        self.max_per_connection = max_per_connection or settings.MAIL_MAX_PER_CONNECTION
+        self.retries = settings.MAIL_SEND_RETRIES if retries is None else retries
+        self.connection_kwargs = connection_kwargs
+        self.connection = None
+        self.connections_opened = 0
+        self._sent_on_connection = 0
+
+    def send(self, messages):
+        """
+        Send every message. Returns {"sent": n, "failed": [messages]}.
+        """
+        sent, failed = 0, []
+        messages = iter(messages)
+        try:
+            while True:
+                batch = list(islice(messages, self.batch_size))
+                if not batch:
+                    break
+                batch_sent = 0
+                for message in batch:
+                    if self._deliver(message):
+                        batch_sent += 1
+                    else:
+                        failed.append(message)
+                sent += batch_sent
+                logger.debug(f"Mail batch: {batch_sent}/{len(batch)} sent")
+        finally:
+            self.close()
+        return {"sent": sent, "failed": failed}
+
+    def close(self):
+        if self.connection is None:
+            return
+        try:
+            self.connection.close()
+        except Exception:
+            pass  # the server may already have hung up
+        self.connection = None
+        self._sent_on_connection = 0
+
+    def _connect(self):
+        self.close()
+        self.connection = get_connection(fail_silently=False, **self.connection_kwargs)
+        self.connection.open()
+        self.connections_opened += 1
+
+    def _deliver(self, message):
+        for attempt in range(self.retries + 1):
+            try:
+                if self.connection is None or self._sent_on_connection >= self.max_per_connection:
+                    self._connect()
+                self.connection.send_messages([message])
+                self._sent_on_connection += 1
+                return True
+            except MESSAGE_ERRORS as e:
+                logger.warning(f"Email refused for {message.to}: {e}")
+                return False
+            except CONNECTION_ERRORS as e:
+                logger.warning(f"Mail connection lost sending to {message.to} (attempt {attempt + 1}): {e}")
+                self.close()
+            except Exception as e:
+                logger.warning(f"Email failed for {message.to}: {e}")
+                return False
+        return False
+
+
+def send_messages(messages, **options):
+    """
+    Send messages with a Mailer built from settings. Same return value as Mailer.send.
+    """
+    return Mailer(**options).send(messages)
@@ -0,0 +1,53 @@
+import time
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from communication.mailer import Mailer, build_message
+from communication.smtp_stub import LocalSMTPServer
+
+
+class Command(BaseCommand):
+    help = "Measure messages per second through the mailer against a local SMTP server"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=500, help="Messages to send per run")
+        parser.add_argument('--batch-size', type=int, help="Messages per batch")
+        parser.add_argument('--max-per-connection', type=int, help="Messages per SMTP session before reconnecting")
+        parser.add_argument('--latency', type=float, default=0.001,
+                            help="Seconds the local server waits before each reply, standing in for network round trips")
+        parser.add_argument('--skip-baseline', action='store_true',
+                            help="Don't time the one-connection-per-email baseline")
+
+    def handle(self, *args, **options):
+        count = options['messages']
+
+        def messages():
+            return (build_message("Benchmark", f"Message {n}", f"tenant{n}@example.com") for n in range(count))
+
+        with LocalSMTPServer(latency=options['latency']) as server:
+            kwargs = server.connection_kwargs()
+
+            if not options['skip_baseline']:
+                started = time.perf_counter()
+                for message in messages():
+                    # What send_mail does: a new connection for every email
+                    get_connection(fail_silently=False, **kwargs).send_messages([message])
+                self.report("one connection per email", count, time.perf_counter() - started, count)
+
+            mailer = Mailer(
+                batch_size=options['batch_size'],
+                max_per_connection=options['max_per_connection'],
+                **kwargs
+            )
+            started = time.perf_counter()
+            stats = mailer.send(messages())
+            self.report(
+                f"mailer (batch {mailer.batch_size}, {mailer.max_per_connection}/connection)",
+                stats['sent'], time.perf_counter() - started, mailer.connections_opened,
+            )
+
+    def report(self, label, sent, elapsed, connections):
+        rate = sent / elapsed if elapsed else float('inf')
+        self.stdout.write(
+            f"{label}: {sent} sent over {connections} connections in {elapsed:.2f}s ({rate:.0f} msg/s)"
+        )
@@ -1,89 +1,114 @@
 # services/messaging.py
 from django.conf import settings
-from django.core.mail import send_mail
+from decimal import Decimal
 
+from .mailer import build_message, send_messages
 
-def send_bulk_emails(tenants):
+
+def rent_reminder_message(email, full_name, balance):
     """
-    Send rent reminder emails to a list of tenants.
-    Each tenant receives a personalized message with their outstanding balance.
+    A tenant's reminder to pay their outstanding rent.
     """
-    for tenant in tenants:
-        subject = "Rent Payment Reminder"
-        message = (
-            f"Hello {tenant.full_name},\n\n"
+    return build_message(
+        "Rent Payment Reminder",
+        (
+            f"Hello {full_name},\n\n"
             f"This is a reminder to pay your rent.\n"
-            f"Outstanding balance: KES {tenant.unit.rent_remaining}."
-        )
-        try:
-            send_mail(subject, message, settings.EMAIL_HOST_USER, [tenant.email])
-        except Exception as e:
-            print(f"Email failed for {tenant.email}: {e}")
+            f"Outstanding balance: KES {balance}."
+        ),
+        email,
+    )
 
 
+def landlord_summary_message(email, full_name, units):
+    """
+    A landlord's daily summary of overdue tenants. units holds
+    (unit_number, tenant_name, tenant_email, due_date, balance) tuples.
+    """
+    summary_lines = [
+        f"Unit {unit_number} - Tenant: {tenant_name} "
+        f"({tenant_email}) | Due: {due_date} | Outstanding: KES {balance}"
+        for unit_number, tenant_name, tenant_email, due_date, balance in units
+    ]
+    total_outstanding = sum(Decimal(balance) for *_, balance in units)
+
+    subject = "Daily Rent Summary - Overdue Tenants"
+    message = (
+        f"Hello {full_name},\n\n"
+        f"Here is the summary of overdue tenants in your properties:\n\n"
+        + "\n".join(summary_lines)
+        + f"\n\nTotal Outstanding: KES {total_outstanding}\n\n"
+        "Regards,\nYour Rental Management System"
+    )
 
+    return build_message(subject, message, email)
 
 
-def send_deadline_reminder_emails(tenants):
+def deadline_reminder_message(email, full_name, due_date, balance):
     """
-    Send rent deadline reminder emails to a list of tenants.
-    Each email includes the payment deadline date, outstanding balance, and login link.
+    A tenant's reminder of their rent deadline, with the outstanding
+    balance and a login link.
     """
-    for tenant in tenants:
-        unit = tenant.unit
-        subject = "Rent Payment Deadline Reminder"
-        login_link = f"{settings.FRONTEND_URL}/login"
-        message = (
-            f"Hello {tenant.full_name},\n\n"
-            f"This is a reminder that your rent payment is due on {unit.rent_due_date}.\n"
-            f"Outstanding balance: KES {unit.rent_remaining}.\n\n"
+    login_link = f"{settings.FRONTEND_URL}/login"
+    return build_message(
+        "Rent Payment Deadline Reminder",
+        (
+            f"Hello {full_name},\n\n"
+            f"This is a reminder that your rent payment is due on {due_date}.\n"
+            f"Outstanding balance: KES {balance}.\n\n"
             f"Please log in to your account to make the payment: {login_link}\n\n"
             "Thank you,\n"
             "Makau Rentals Team"
-        )
-        try:
-            send_mail(subject, message, settings.EMAIL_HOST_USER, [tenant.email])
-        except Exception as e:
-            print(f"Email failed for {tenant.email}: {e}")
+        ),
+        email,
+    )
 
 
-def send_deadline_reminders():
+def queue_deadline_reminders(chunk_size=None):
     """
-    Send reminders to tenants based on their custom reminder preferences.
+    Queue reminders in the notification outbox for tenants whose
+    precomputed next_reminder_date is today, in chunks, then move each unit
+    on to its following reminder date.
+    Returns the number of reminders queued.
     """
     from datetime import timedelta
     from django.utils import timezone
-    from accounts.models import CustomUser
+    from accounts.models import Unit
+    from accounts.reminders import refresh_reminder_dates, REMINDER_CHUNK_SIZE
+    from .outbox import dedupe_key, enqueue, notification
 
+    chunk_size = chunk_size or REMINDER_CHUNK_SIZE
     today = timezone.now().date()
-    tenants_to_remind = []
-
-    # Get all tenants with units and outstanding rent
-    tenants = CustomUser.objects.filter(
-        user_type="tenant",
-        unit__isnull=False,
-        unit__rent_remaining__gt=0
-    ).select_related('unit')
-
-    for tenant in tenants:
-        unit = tenant.unit
-        if tenant.reminder_mode == 'days_before':
-            reminder_date = unit.rent_due_date - timedelta(days=tenant.reminder_value)
-            if reminder_date == today:
-                tenants_to_remind.append(tenant)
-        elif tenant.reminder_mode == 'fixed_day':
-            if today.day == tenant.reminder_value:
-                # Optionally, check if due date is within a reasonable period, e.g., next 30 days
-                if unit.rent_due_date and unit.rent_due_date >= today and (unit.rent_due_date - today).days <= 30:
-                    tenants_to_remind.append(tenant)
-
-    if tenants_to_remind:
-        send_deadline_reminder_emails(tenants_to_remind)
+    due = Unit.objects.filter(next_reminder_date=today, tenant__isnull=False, rent_remaining__gt=0)
+
+    queued, last_id = 0, 0
+    while True:
+        rows = list(
+            due.filter(id__gt=last_id).order_by('id').values_list(
+                'id', 'tenant_id', 'tenant__email', 'tenant__full_name', 'rent_due_date', 'rent_remaining'
+            )[:chunk_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        queued += enqueue(
+            notification(
+                'deadline_reminder', tenant_id,
+                dedupe_key('deadline_reminder', tenant_id, due_date, today),
+                deadline_reminder_message(email, full_name, due_date, balance),
+            )
+            for _, tenant_id, email, full_name, due_date, balance in rows
+        )
+        refresh_reminder_dates(
+            Unit.objects.filter(id__in=[row[0] for row in rows]), from_date=today + timedelta(days=1)
+        )
+    return queued
 
 # TODO:
 # - This module handles sending bulk emails to tenants for rent reminders.
-# - It uses Django's send_mail for email notifications.
-# - The send_deadline_reminders() function is scheduled via Celery Beat to run automatically.
+# - Emails go out through communication.mailer, batched over reused SMTP connections.
+# - Scheduled reminders are queued in the notification outbox (communication.outbox) and
+#   sent by deliver_notifications_task, both run by Celery Beat.
 
 def send_report_email(report):
     """
@@ -104,18 +129,12 @@ def send_report_email(report):
         "Best regards,\n"
         "Makau Rentals System"
     )
-    try:
-        send_mail(subject, message, settings.EMAIL_HOST_USER, [landlord.email])
-    except Exception as e:
-        print(f"Failed to send report email: {e}")
+    send_messages([build_message(subject, message, landlord.email)])
 
 
 def send_landlord_email(subject, message, tenants):
     """
     Send a custom email from landlord to a list of tenants.
+    Each tenant gets their own copy, so addresses aren't shared between tenants.
     """
-    recipient_emails = [tenant.email for tenant in tenants]
-    try:
-        send_mail(subject, message, settings.EMAIL_HOST_USER, recipient_emails)
-    except Exception as e:
-        print(f"Failed to send landlord email: {e}")
+    return send_messages(build_message(subject, message, tenant.email) for tenant in tenants)
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communication', '0002_report_landlord'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['unit', 'status', 'priority_level'], name='report_unit_status_idx'),
+        ),
+    ]
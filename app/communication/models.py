@@ -1,5 +1,5 @@
 from django.db import models
-from accounts.models import CustomUser, Unit
+from accounts.models import CustomUser, Unit, LandlordScopedQuerySet
 from django.utils import timezone
 
 from django.db import models
@@ -68,11 +68,22 @@ class Report(models.Model):
     
     # File attachments
     attachment = models.FileField(upload_to='report_attachments/', null=True, blank=True)
+
+    # Copy of unit.landlord, set on save, so landlord queries stay on this table
+    landlord = models.ForeignKey(
+        CustomUser, on_delete=models.CASCADE, related_name='landlord_reports', editable=False
+    )
+
+    objects = LandlordScopedQuerySet.as_manager()
     
     class Meta:
         ordering = ['-reported_date']
         verbose_name = 'Maintenance Report'
         verbose_name_plural = 'Maintenance Reports'
+        indexes = [
+            models.Index(fields=['landlord', 'status', 'reported_date'], name='report_landlord_status_idx'),
+            models.Index(fields=['unit', 'status', 'priority_level'], name='report_unit_status_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         # Auto-assign priority based on category if not set
@@ -85,6 +96,12 @@ class Report(models.Model):
             self.resolved_date = timezone.now()
         elif self.status != 'resolved' and self.resolved_date:
             self.resolved_date = None
+
+        if not self.landlord_id:
+            if Report.unit.is_cached(self):
+                self.landlord_id = self.unit.landlord_id
+            else:
+                self.landlord_id = Unit.objects.filter(pk=self.unit_id).values_list('landlord_id', flat=True).first()
             
         super().save(*args, **kwargs)
 
@@ -101,4 +118,52 @@ class Report(models.Model):
         return self.priority_level == 'urgent' or self.days_open > 7
 
     def __str__(self):
-        return f"Report #{self.id} - {self.issue_title} ({self.tenant.full_name})"
\ No newline at end of file
+        return f"Report #{self.id} - {self.issue_title} ({self.tenant.full_name})"
+
+
+class Notification(models.Model):
+    """
+    Outbox of notifications to send. Producers bulk-insert rows and skip any
+    whose dedupe_key already exists, so a retried or doubled task queues
+    nothing new. Delivery workers lease pending rows in batches and send
+    each row at most once (see communication/outbox.py).
+    """
+    KIND_CHOICES = [
+        ('rent_reminder', 'Rent reminder'),
+        ('deadline_reminder', 'Deadline reminder'),
+        ('landlord_summary', 'Landlord summary'),
+    ]
+
+    CHANNEL_CHOICES = [
+        ('email', 'Email'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES, default='email')
+    recipient = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='notifications')
+    dedupe_key = models.CharField(max_length=200, unique=True)
+    address = models.CharField(max_length=254)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    leased_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['channel', 'status', 'id'], name='notification_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} to {self.address} ({self.status})"
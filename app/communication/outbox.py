@@ -0,0 +1,183 @@
+"""
+Notification outbox.
+
+Producers build Notification rows from rendered messages and enqueue()
+them; the unique dedupe_key makes a re-run producer a no-op. Delivery
+workers claim pending rows per channel with select_for_update(skip_locked),
+mark them 'sending' with a lease and commit before talking to the mail
+server, so no lock is held while sending and no other worker can pick the
+same rows up.
+
+Delivery is at most once: a row whose lease runs out while still
+'sending' (the worker died mid-batch) is marked failed, never resent.
+Only messages the mailer reports as not accepted go back to 'pending',
+up to NOTIFICATION_MAX_ATTEMPTS. Each channel is also held to
+NOTIFICATION_RATE_LIMITS messages per minute, counted in the cache so
+every worker shares the same budget.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .mailer import build_message, send_messages
+from .models import Notification
+
+RATE_WINDOW_SECONDS = 60
+
+
+def dedupe_key(kind, *parts):
+    """
+    Key that identifies one logical notification, e.g.
+    dedupe_key('rent_reminder', tenant_id, due_date, today).
+    """
+    return ":".join(str(part) for part in (kind, *parts))
+
+
+def notification(kind, recipient_id, key, message, channel='email'):
+    """
+    An unsaved Notification for a rendered EmailMessage.
+    """
+    return Notification(
+        kind=kind,
+        channel=channel,
+        recipient_id=recipient_id,
+        dedupe_key=key,
+        address=message.to[0],
+        subject=message.subject,
+        body=message.body,
+    )
+
+
+def enqueue(notifications):
+    """
+    Bulk-insert notifications, skipping any whose dedupe_key is already
+    queued or sent. Returns the number of new rows.
+    """
+    notifications = list(notifications)
+    if not notifications:
+        return 0
+    existing = set(
+        Notification.objects.filter(
+            dedupe_key__in=[n.dedupe_key for n in notifications]
+        ).values_list('dedupe_key', flat=True)
+    )
+    new = [n for n in notifications if n.dedupe_key not in existing]
+    # ignore_conflicts still covers a producer racing us between the check and the insert
+    Notification.objects.bulk_create(new, ignore_conflicts=True)
+    return len(new)
+
+
+def _rate_key(channel, now):
+    return f"notification_rate:{channel}:{int(now.timestamp()) // RATE_WINDOW_SECONDS}"
+
+
+def take_quota(channel, wanted, now=None):
+    """
+    Reserve up to wanted sends from the channel's budget for the current
+    minute. Returns how many were granted.
+    """
+    limit = settings.NOTIFICATION_RATE_LIMITS.get(channel)
+    if limit is None:
+        return wanted
+    key = _rate_key(channel, now or timezone.now())
+    cache.add(key, 0, timeout=RATE_WINDOW_SECONDS * 2)
+    used = cache.incr(key, wanted)
+    granted = max(0, min(wanted, limit - (used - wanted)))
+    if granted < wanted:
+        cache.decr(key, wanted - granted)
+    return granted
+
+
+def return_quota(channel, unused, now=None):
+    """
+    Give back reserved sends that weren't used.
+    """
+    if unused and settings.NOTIFICATION_RATE_LIMITS.get(channel) is not None:
+        try:
+            cache.decr(_rate_key(channel, now or timezone.now()), unused)
+        except ValueError:
+            pass  # the window rolled over; nothing left to give back
+
+
+def expire_leases(channel, now=None):
+    """
+    Fail rows whose lease ran out mid-send. Whether they reached the mail
+    server is unknown, so they are not retried. Returns the number expired.
+    """
+    return Notification.objects.filter(
+        channel=channel, status='sending', leased_until__lt=now or timezone.now()
+    ).update(status='failed', last_error="Lease expired during delivery; not retried")
+
+
+def claim_notifications(channel, limit, after_id=0, lease_seconds=None):
+    """
+    Lease up to limit pending rows with ids above after_id for this worker
+    and return them.
+    """
+    lease_seconds = lease_seconds or settings.NOTIFICATION_LEASE_SECONDS
+    with transaction.atomic():
+        # skip_locked lets several delivery workers claim side by side
+        batch = list(
+            Notification.objects.select_for_update(skip_locked=True)
+            .filter(channel=channel, status='pending', id__gt=after_id)
+            .order_by('id')[:limit]
+        )
+        if batch:
+            Notification.objects.filter(id__in=[n.id for n in batch]).update(
+                status='sending',
+                leased_until=timezone.now() + timedelta(seconds=lease_seconds),
+                attempts=F('attempts') + 1,
+            )
+    for n in batch:
+        n.status = 'sending'
+        n.attempts += 1
+    return batch
+
+
+def deliver_notifications(channel='email', batch_size=None, max_attempts=None):
+    """
+    Send pending notifications for a channel in leased batches until the
+    outbox is empty or the channel's rate limit is reached.
+    Returns {"sent", "failed", "retrying", "expired", "throttled"}.
+    """
+    batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+    max_attempts = max_attempts or settings.NOTIFICATION_MAX_ATTEMPTS
+    stats = {
+        "sent": 0, "failed": 0, "retrying": 0,
+        "expired": expire_leases(channel), "throttled": False,
+    }
+
+    last_id = 0  # rows sent back to pending are only retried on the next run
+    while True:
+        granted = take_quota(channel, batch_size)
+        if not granted:
+            stats["throttled"] = True
+            return stats
+        batch = claim_notifications(channel, granted, after_id=last_id)
+        return_quota(channel, granted - len(batch))
+        if not batch:
+            return stats
+
+        last_id = batch[-1].id
+        messages = [build_message(n.subject, n.body, n.address) for n in batch]
+        not_accepted = {id(message) for message in send_messages(messages)["failed"]}
+
+        now = timezone.now()
+        for n, message in zip(batch, messages):
+            n.leased_until = None
+            if id(message) not in not_accepted:
+                n.status, n.sent_at, n.last_error = 'sent', now, ""
+                stats["sent"] += 1
+            elif n.attempts < max_attempts:
+                n.status, n.last_error = 'pending', "Not accepted by the mail server"
+                stats["retrying"] += 1
+            else:
+                n.status, n.last_error = 'failed', "Not accepted by the mail server"
+                stats["failed"] += 1
+        Notification.objects.bulk_update(batch, ['status', 'sent_at', 'leased_until', 'last_error'])
+
+        if len(batch) < granted:
+            return stats
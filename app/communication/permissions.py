@@ -1,6 +1,6 @@
 from rest_framework import permissions
-from django.core.cache import cache
-from accounts.models import CustomUser, Subscription
+from accounts.models import CustomUser, Unit
+from accounts.permissions import has_active_subscription
 
 class IsTenantWithUnit(permissions.BasePermission):
     """
@@ -10,16 +10,8 @@ class IsTenantWithUnit(permissions.BasePermission):
         if not request.user.is_authenticated or request.user.user_type != 'tenant':
             return False
         
-        # Check cache first
-        cache_key = f"tenant_has_unit:{request.user.id}"
-        has_unit = cache.get(cache_key)
-        
-        if has_unit is None:
-            # Check if tenant has any units assigned (OneToOneField so use hasattr)
-            has_unit = hasattr(request.user, 'unit') and request.user.unit is not None
-            cache.set(cache_key, has_unit, timeout=300)  # Cache for 5 minutes
-        
-        return has_unit
+        # A single indexed lookup; a cached answer would lag behind assignments and evictions
+        return Unit.objects.filter(tenant_id=request.user.id).exists()
 
 class IsLandlordWithActiveSubscription(permissions.BasePermission):
     """
@@ -28,17 +20,5 @@ class IsLandlordWithActiveSubscription(permissions.BasePermission):
     def has_permission(self, request, view):
         if not request.user.is_authenticated or request.user.user_type != 'landlord':
             return False
-        
-        # Use cache to avoid repeated database queries
-        cache_key = f"subscription_status:{request.user.id}"
-        has_active_sub = cache.get(cache_key)
-        
-        if has_active_sub is None:
-            try:
-                subscription = Subscription.objects.get(user=request.user)
-                has_active_sub = subscription.is_active()
-            except Subscription.DoesNotExist:
-                has_active_sub = False
-            cache.set(cache_key, has_active_sub, timeout=300)  # Cache for 5 minutes
-        
-        return has_active_sub
+
+        return has_active_subscription(request)
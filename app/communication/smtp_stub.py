@@ -0,0 +1,136 @@
+"""
+A local SMTP server for tests and the mailer benchmark.
+
+LocalSMTPServer speaks just enough SMTP for Django's smtp EmailBackend
+(EHLO/HELO, AUTH PLAIN, MAIL, RCPT, DATA, RSET, NOOP, QUIT) and records
+every accepted message. It can also misbehave like a real relay: drop
+the session after a number of messages, refuse recipients, or add a
+delay to every reply to stand in for network round trips.
+"""
+import socketserver
+import threading
+import time
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        if self.server.stub.latency:
+            time.sleep(self.server.stub.latency)
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        stub = self.server.stub
+        stub._session_opened()
+        self.reply("220 localhost SMTP stub ready")
+        sender, recipients, delivered = None, [], 0
+
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode(errors='replace').rstrip("\r\n")
+            command = line[:4].upper()
+
+            if command == 'EHLO':
+                self.wfile.write(b"250-localhost\r\n")
+                self.reply("250 AUTH PLAIN")
+            elif command == 'HELO':
+                self.reply("250 localhost")
+            elif command == 'AUTH':
+                self.reply("235 2.7.0 Authentication successful")
+            elif command == 'MAIL':
+                sender, recipients = line.split(':', 1)[1].strip().strip('<>'), []
+                self.reply("250 OK")
+            elif command == 'RCPT':
+                recipient = line.split(':', 1)[1].strip().strip('<>')
+                if recipient in stub.refuse:
+                    self.reply(f"550 5.1.1 {recipient} mailbox unavailable")
+                else:
+                    recipients.append(recipient)
+                    self.reply("250 OK")
+            elif command == 'DATA':
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                body = []
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data in (b".\r\n", b".\n"):
+                        break
+                    body.append(data[1:] if data.startswith(b"..") else data)
+                stub._accept(sender, recipients, b"".join(body))
+                self.reply("250 OK queued")
+                delivered += 1
+                if stub.max_messages_per_session and delivered >= stub.max_messages_per_session:
+                    # Like a relay enforcing a per-session cap: hang up without a QUIT
+                    return
+            elif command == 'RSET':
+                sender, recipients = None, []
+                self.reply("250 OK")
+            elif command == 'NOOP':
+                self.reply("250 OK")
+            elif command == 'QUIT':
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class _ThreadingSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class LocalSMTPServer:
+    """
+    Threaded SMTP stand-in bound to a free localhost port. Use as a context
+    manager; connection_kwargs() gives get_connection() what it needs.
+    """
+
+    def __init__(self, max_messages_per_session=None, refuse=(), latency=0):
+        self.max_messages_per_session = max_messages_per_session
+        self.refuse = set(refuse)
+        self.latency = latency
+        self.messages = []
+        self.sessions = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def __enter__(self):
+        self._server = _ThreadingSMTPServer(('127.0.0.1', 0), _SMTPHandler)
+        self._server.stub = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def connection_kwargs(self):
+        return {
+            'backend': 'django.core.mail.backends.smtp.EmailBackend',
+            'host': '127.0.0.1',
+            'port': self.port,
+            'use_tls': False,
+            'use_ssl': False,
+            'username': '',
+            'password': '',
+            'timeout': 5,
+        }
+
+    def recipients(self):
+        with self._lock:
+            return [to for _, recipients, _ in self.messages for to in recipients]
+
+    def _session_opened(self):
+        with self._lock:
+            self.sessions += 1
+
+    def _accept(self, sender, recipients, data):
+        with self._lock:
+            self.messages.append((sender, recipients, data))
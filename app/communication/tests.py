@@ -3,9 +3,11 @@ from django.urls import reverse
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from django.contrib.auth import get_user_model
+from types import SimpleNamespace
 from unittest.mock import patch
 
 from .models import Report
+from .permissions import IsTenantWithUnit
 from accounts.models import Property, Unit, UnitType
 
 CustomUser = get_user_model()
@@ -165,19 +167,35 @@ class ReportViewTests(APITestCase):
         response = self.client.post(reverse('create-report'), report_data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
+    def test_tenant_with_unit_follows_assignment(self):
+        """Test report access is granted and revoked as soon as the unit changes hands"""
+        permission = IsTenantWithUnit()
+        request = SimpleNamespace(user=self.tenant)
+        self.assertTrue(permission.has_permission(request, None))
+
+        self.unit.tenant = None
+        self.unit.is_available = True
+        self.unit.save()
+        self.assertFalse(permission.has_permission(request, None))
+
+        self.unit.tenant = self.tenant
+        self.unit.is_available = False
+        self.unit.save()
+        self.assertTrue(permission.has_permission(request, None))
+
     def test_open_reports_view_tenant(self):
         """Test tenant can view their open reports"""
         self.client.force_authenticate(user=self.tenant)
         response = self.client.get(reverse('open-reports'))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test_open_reports_view_landlord(self):
         """Test landlord can view open reports for their properties"""
         self.client.force_authenticate(user=self.landlord)
         response = self.client.get(reverse('open-reports'))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test_urgent_reports_view(self):
         """Test urgent reports view"""
@@ -194,7 +212,7 @@ class ReportViewTests(APITestCase):
         self.client.force_authenticate(user=self.tenant)
         response = self.client.get(reverse('urgent-reports'))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test_in_progress_reports_view(self):
         """Test in-progress reports view"""
@@ -205,7 +223,7 @@ class ReportViewTests(APITestCase):
         self.client.force_authenticate(user=self.tenant)
         response = self.client.get(reverse('in-progress-reports'))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test_resolved_reports_view(self):
         """Test resolved reports view"""
@@ -216,7 +234,7 @@ class ReportViewTests(APITestCase):
         self.client.force_authenticate(user=self.tenant)
         response = self.client.get(reverse('resolved-reports'))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test_update_report_status_landlord(self):
         """Test landlord can update report status"""
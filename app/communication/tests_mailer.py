@@ -0,0 +1,69 @@
+from io import StringIO
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from .mailer import Mailer, build_message
+from .smtp_stub import LocalSMTPServer
+
+
+def messages(count):
+    return [build_message("Subject", f"Body {n}", f"tenant{n}@test.com") for n in range(count)]
+
+
+class MailerTests(SimpleTestCase):
+    def test_batches_share_one_connection(self):
+        """Test several batches go out over a single SMTP session"""
+        with LocalSMTPServer() as server:
+            stats = Mailer(batch_size=2, max_per_connection=100, **server.connection_kwargs()).send(messages(5))
+
+        self.assertEqual(stats, {"sent": 5, "failed": []})
+        self.assertEqual(server.sessions, 1)
+        self.assertEqual(server.recipients(), [f"tenant{n}@test.com" for n in range(5)])
+
+    def test_connection_recycled_at_cap(self):
+        """Test the mailer opens a new session after max_per_connection messages"""
+        with LocalSMTPServer() as server:
+            mailer = Mailer(batch_size=10, max_per_connection=2, **server.connection_kwargs())
+            stats = mailer.send(messages(5))
+
+        self.assertEqual(stats["sent"], 5)
+        self.assertEqual(mailer.connections_opened, 3)
+        self.assertEqual(server.sessions, 3)
+
+    def test_reconnects_when_server_hangs_up(self):
+        """Test a dropped session is reopened and no message is lost or sent twice"""
+        with LocalSMTPServer(max_messages_per_session=2) as server:
+            mailer = Mailer(batch_size=10, max_per_connection=100, **server.connection_kwargs())
+            stats = mailer.send(messages(5))
+
+        self.assertEqual(stats, {"sent": 5, "failed": []})
+        self.assertEqual(server.recipients(), [f"tenant{n}@test.com" for n in range(5)])
+        self.assertEqual(mailer.connections_opened, 3)
+
+    def test_refused_recipient_does_not_stop_batch(self):
+        """Test a refused recipient is reported without retrying or dropping the session"""
+        with LocalSMTPServer(refuse={"tenant1@test.com"}) as server:
+            stats = Mailer(batch_size=10, **server.connection_kwargs()).send(messages(3))
+
+        self.assertEqual(stats["sent"], 2)
+        self.assertEqual([message.to for message in stats["failed"]], [["tenant1@test.com"]])
+        self.assertEqual(server.recipients(), ["tenant0@test.com", "tenant2@test.com"])
+        self.assertEqual(server.sessions, 1)
+
+    def test_unreachable_server_fails_after_retries(self):
+        """Test messages fail once reconnect attempts are used up"""
+        with LocalSMTPServer() as server:
+            kwargs = server.connection_kwargs()
+        mailer = Mailer(retries=1, **kwargs)
+        stats = mailer.send(messages(2))
+
+        self.assertEqual(stats["sent"], 0)
+        self.assertEqual(len(stats["failed"]), 2)
+
+    def test_benchmark_command(self):
+        """Test the benchmark reports throughput for the baseline and the mailer"""
+        out = StringIO()
+        call_command('benchmark_mailer', '--messages', '4', '--batch-size', '2', '--latency', '0', stdout=out)
+
+        self.assertIn("one connection per email: 4 sent over 4 connections", out.getvalue())
+        self.assertIn("mailer (batch 2, 100/connection): 4 sent over 1 connections", out.getvalue())
@@ -0,0 +1,101 @@
+import smtplib
+from datetime import timedelta
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from .mailer import build_message
+from .models import Notification
+from .outbox import claim_notifications, deliver_notifications, dedupe_key, enqueue, notification, take_quota
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class NotificationOutboxTests(TestCase):
+    def setUp(self):
+        cache.clear()  # per-minute send budgets live in the cache
+        self.tenant = CustomUser.objects.create_user(
+            email='tenant@test.com',
+            full_name='Test Tenant',
+            user_type='tenant',
+            password='testpass123'
+        )
+
+    def queue(self, count, kind='rent_reminder'):
+        return enqueue(
+            notification(
+                kind, self.tenant.id, dedupe_key(kind, self.tenant.id, n),
+                build_message("Reminder", f"Body {n}", f"tenant{n}@test.com"),
+            )
+            for n in range(count)
+        )
+
+    def test_enqueue_skips_existing_keys(self):
+        """Test re-queuing the same notifications adds no rows"""
+        self.assertEqual(self.queue(2), 2)
+        self.assertEqual(self.queue(3), 1)
+        self.assertEqual(Notification.objects.count(), 3)
+
+    def test_claim_leases_rows(self):
+        """Test claimed rows are leased so a second claim doesn't get them"""
+        self.queue(3)
+        first = claim_notifications('email', 2)
+
+        self.assertEqual([n.address for n in first], ['tenant0@test.com', 'tenant1@test.com'])
+        self.assertEqual(
+            set(Notification.objects.filter(status='sending').values_list('id', flat=True)),
+            {n.id for n in first}
+        )
+        self.assertEqual([n.address for n in claim_notifications('email', 2)], ['tenant2@test.com'])
+        self.assertEqual(claim_notifications('email', 2), [])
+
+    def test_expired_lease_is_not_resent(self):
+        """Test a row left mid-send by a dead worker is failed instead of sent again"""
+        self.queue(1)
+        claim_notifications('email', 1)
+        Notification.objects.update(leased_until=timezone.now() - timedelta(seconds=1))
+
+        stats = deliver_notifications()
+
+        self.assertEqual((stats['expired'], stats['sent']), (1, 0))
+        self.assertEqual(Notification.objects.get().status, 'failed')
+        self.assertEqual(len(mail.outbox), 0)
+
+    @override_settings(NOTIFICATION_RATE_LIMITS={'email': 2})
+    def test_rate_limit_per_channel(self):
+        """Test delivery stops at the channel's per-minute budget and resumes in the next window"""
+        self.queue(5)
+        stats = deliver_notifications(batch_size=10)
+
+        self.assertEqual(stats['sent'], 2)
+        self.assertTrue(stats['throttled'])
+        self.assertEqual(Notification.objects.filter(status='pending').count(), 3)
+        self.assertEqual(take_quota('email', 1), 0)
+        self.assertEqual(take_quota('email', 1, now=timezone.now() + timedelta(minutes=1)), 1)
+
+    @override_settings(NOTIFICATION_RATE_LIMITS={'email': 10})
+    def test_unused_quota_returned(self):
+        """Test reserving a batch larger than the outbox only spends what was sent"""
+        self.queue(2)
+        deliver_notifications(batch_size=5)
+
+        self.assertEqual(take_quota('email', 10), 8)
+
+    @override_settings(EMAIL_BACKEND='communication.tests_outbox.RefusingBackend')
+    def test_refused_rows_fail_after_max_attempts(self):
+        """Test a refused row is retried on later runs, then given up on"""
+        self.queue(1)
+
+        self.assertEqual(deliver_notifications(max_attempts=2)['retrying'], 1)
+        self.assertEqual(deliver_notifications(max_attempts=2)['failed'], 1)
+
+        row = Notification.objects.get()
+        self.assertEqual((row.status, row.attempts), ('failed', 2))
+        self.assertEqual(deliver_notifications(max_attempts=2)['failed'], 0)
+
+
+class RefusingBackend(locmem.EmailBackend):
+    def send_messages(self, messages):
+        raise smtplib.SMTPRecipientsRefused({messages[0].to[0]: (550, b'mailbox unavailable')})
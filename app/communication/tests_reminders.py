@@ -0,0 +1,142 @@
+import smtplib
+from datetime import date, timedelta
+from unittest.mock import patch
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import get_connection
+from django.core.mail.backends import locmem
+from django.test import TestCase, override_settings
+
+from accounts.models import CustomUser, Property, Unit
+from app.tasks import notify_due_rent_task, landlord_summary_task, deliver_notifications_task
+from .messaging import landlord_summary_message
+from .models import Notification
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class DueRentReminderTests(TestCase):
+    def setUp(self):
+        cache.clear()  # per-minute send budgets live in the cache
+        self.landlord = CustomUser.objects.create_user(
+            email='landlord@test.com',
+            full_name='Test Landlord',
+            user_type='landlord',
+            password='testpass123'
+        )
+        self.property = Property.objects.create(
+            landlord=self.landlord,
+            name='Test Property',
+            city='Nairobi',
+            state='Nairobi County',
+            unit_count=10
+        )
+        yesterday = date.today() - timedelta(days=1)
+        for i in range(3):
+            self.create_unit(i, rent=10000 + i, rent_due_date=yesterday)
+        # Paid up and not yet due: no reminder
+        self.create_unit(3, rent=10000, rent_paid=10000, rent_due_date=yesterday)
+        self.create_unit(4, rent=10000, rent_due_date=date.today() + timedelta(days=5))
+
+    def create_unit(self, i, **fields):
+        tenant = CustomUser.objects.create_user(
+            email=f'tenant{i}@test.com',
+            full_name=f'Tenant {i}',
+            user_type='tenant',
+            password='testpass123'
+        )
+        return Unit.objects.create(
+            property_obj=self.property,
+            unit_number=f'10{i}',
+            unit_code=f'U-10{i}',
+            tenant=tenant,
+            is_available=False,
+            **fields
+        )
+
+    def test_due_tenants_queued_in_chunks(self):
+        """Test due tenants are read in one query and bulk-queued in chunks, once per day"""
+        # One read of the units, then a dedupe check and an insert per chunk
+        with self.assertNumQueries(5):
+            result = notify_due_rent_task(chunk_size=2)
+
+        self.assertIn('3 of 3 tenants', result)
+        queued = list(Notification.objects.values_list('kind', 'address', 'status'))
+        self.assertEqual(queued, [
+            ('rent_reminder', f'tenant{i}@test.com', 'pending') for i in range(3)
+        ])
+        self.assertIn('KES 10000.00', Notification.objects.first().body)
+
+        # A retried or doubled run queues nothing new
+        self.assertIn('0 of 3 tenants', notify_due_rent_task(chunk_size=2))
+        self.assertEqual(Notification.objects.count(), 3)
+
+    def test_queued_reminders_sent_over_one_connection(self):
+        """Test delivery sends a batch over one SMTP connection and marks the rows sent"""
+        notify_due_rent_task()
+        with patch('communication.mailer.get_connection', wraps=get_connection) as mock_connection:
+            stats = deliver_notifications_task()
+
+        mock_connection.assert_called_once()
+        self.assertEqual(stats['sent'], 3)
+        self.assertEqual([m.to for m in mail.outbox], [[f'tenant{i}@test.com'] for i in range(3)])
+        self.assertIn('KES 10002.00', mail.outbox[2].body)
+        self.assertFalse(Notification.objects.exclude(status='sent').exists())
+
+        # Sent rows are never picked up again
+        self.assertEqual(deliver_notifications_task()['sent'], 0)
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_failed_recipient_does_not_stop_batch(self):
+        """Test a refused email goes back to the outbox and the rest still go out"""
+        notify_due_rent_task()
+        original_send = locmem.EmailBackend.send_messages
+
+        def send_messages(backend, messages):
+            if messages[0].to == ['tenant0@test.com']:
+                raise smtplib.SMTPRecipientsRefused({'tenant0@test.com': (550, b'mailbox unavailable')})
+            return original_send(backend, messages)
+
+        with patch.object(locmem.EmailBackend, 'send_messages', send_messages):
+            stats = deliver_notifications_task()
+
+        self.assertEqual(stats['sent'], 2)
+        self.assertEqual(stats['retrying'], 1)
+        self.assertEqual(len(mail.outbox), 2)
+        refused = Notification.objects.get(address='tenant0@test.com')
+        self.assertEqual((refused.status, refused.attempts), ('pending', 1))
+
+    def test_landlord_summaries_grouped_in_one_query(self):
+        """Test overdue units are read once and each landlord gets one digest a day"""
+        other = CustomUser.objects.create_user(
+            email='other@test.com',
+            full_name='Other Landlord',
+            user_type='landlord',
+            password='testpass123'
+        )
+        self.property = Property.objects.create(
+            landlord=other, name='Other Property', city='Nairobi', state='Nairobi County', unit_count=5
+        )
+        self.create_unit(5, rent=8000, rent_due_date=date.today())
+
+        # One read of the units, then a dedupe check and an insert per chunk
+        with self.assertNumQueries(5):
+            result = landlord_summary_task(chunk_size=1)
+
+        self.assertEqual(result, "Queued summaries for 2 of 2 landlords")
+        summaries = {n.address: n for n in Notification.objects.filter(kind='landlord_summary')}
+        self.assertEqual(summaries['landlord@test.com'].body.count('\nUnit '), 3)
+        self.assertIn('Hello Other Landlord', summaries['other@test.com'].body)
+        self.assertIn('Unit 105 - Tenant: Tenant 5 (tenant5@test.com)', summaries['other@test.com'].body)
+        self.assertEqual(landlord_summary_task(), "Queued summaries for 0 of 2 landlords")
+
+    def test_landlord_summary_email(self):
+        """Test the digest lists each unit and the total outstanding"""
+        units = [
+            ('101', 'Tenant 1', 't1@test.com', '2026-01-01', '100.50'),
+            ('102', 'Tenant 2', 't2@test.com', '2026-01-02', '200.00'),
+        ]
+        message = landlord_summary_message('landlord@test.com', 'Test Landlord', units)
+
+        self.assertEqual(message.to, ['landlord@test.com'])
+        self.assertIn('Unit 102 - Tenant: Tenant 2 (t2@test.com)', message.body)
+        self.assertIn('Total Outstanding: KES 300.50', message.body)
@@ -9,6 +9,7 @@ from accounts.permissions import CanAccessReport
 from accounts.models import CustomUser, Unit
 from .messaging import send_landlord_email
 from rest_framework.permissions import IsAuthenticated
+from app.pagination import ReportedDateCursorPagination
 
 
 class CreateReportView(generics.CreateAPIView):
@@ -25,6 +26,7 @@ class CreateReportView(generics.CreateAPIView):
 class OpenReportsView(generics.ListAPIView):
     serializer_class = ReportSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ReportedDateCursorPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -32,43 +34,46 @@ class OpenReportsView(generics.ListAPIView):
         if user.user_type == 'tenant':
             return Report.objects.filter(tenant=user, status='open')
         elif user.user_type == 'landlord':
-            return Report.objects.filter(unit__property_obj__landlord=user, status='open')
+            return Report.objects.for_landlord(user).filter(status='open')
         return Report.objects.none()
 
 class UrgentReportsView(generics.ListAPIView):
     serializer_class = ReportSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ReportedDateCursorPagination
 
     def get_queryset(self):
         user = self.request.user
         if user.user_type == 'tenant':
             return Report.objects.filter(tenant=user, priority_level='urgent')
         elif user.user_type == 'landlord':
-            return Report.objects.filter(unit__property_obj__landlord=user, priority_level='urgent')
+            return Report.objects.for_landlord(user).filter(priority_level='urgent')
         return Report.objects.none()
 
 class InProgressReportsView(generics.ListAPIView):
     serializer_class = ReportSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ReportedDateCursorPagination
 
     def get_queryset(self):
         user = self.request.user
         if user.user_type == 'tenant':
             return Report.objects.filter(tenant=user, status='in_progress')
         elif user.user_type == 'landlord':
-            return Report.objects.filter(unit__property_obj__landlord=user, status='in_progress')
+            return Report.objects.for_landlord(user).filter(status='in_progress')
         return Report.objects.none()
 
 class ResolvedReportsView(generics.ListAPIView):
     serializer_class = ReportSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ReportedDateCursorPagination
 
     def get_queryset(self):
         user = self.request.user
         if user.user_type == 'tenant':
             return Report.objects.filter(tenant=user, status='resolved')
         elif user.user_type == 'landlord':
-            return Report.objects.filter(unit__property_obj__landlord=user, status='resolved')
+            return Report.objects.for_landlord(user).filter(status='resolved')
         return Report.objects.none()
 
 class UpdateReportStatusView(generics.UpdateAPIView):
@@ -88,10 +93,9 @@ class SendEmailView(APIView):
 
             if send_to_all:
                 # Get all tenants of the landlord
-                landlord_properties = request.user.property_set.all()
                 tenants = CustomUser.objects.filter(
                     user_type='tenant',
-                    unit__property_obj__in=landlord_properties
+                    unit__landlord=request.user
                 ).distinct()
             else:
                 tenants = serializer.validated_data['tenants']
@@ -106,7 +110,7 @@ class ReportStatisticsView(APIView):
     def get(self, request):
         user = request.user
         if user.user_type == 'landlord':
-            reports = Report.objects.filter(unit__property_obj__landlord=user)
+            reports = Report.objects.for_landlord(user)
         else:
             reports = Report.objects.filter(tenant=user)
             
@@ -1,7 +1,19 @@
 from django.contrib import admin
-from .models import Payment, SubscriptionPayment
+from .models import Payment, SubscriptionPayment, MpesaCallback
+from .inbox import replay_callback
 
 admin.site.register(Payment)
 admin.site.register(SubscriptionPayment)
 
-# Register your models here.
+
+@admin.register(MpesaCallback)
+class MpesaCallbackAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'received_at', 'processed_at', 'outcome', 'attempts')
+    list_filter = ('kind', 'outcome')
+    readonly_fields = ('received_at',)
+    actions = ['replay']
+
+    @admin.action(description="Replay selected callbacks")
+    def replay(self, request, queryset):
+        replayed = sum(1 for entry in queryset if replay_callback(entry))
+        self.message_user(request, f"Replayed {replayed} of {queryset.count()} callbacks")
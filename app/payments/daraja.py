@@ -0,0 +1,162 @@
+import base64
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SANDBOX_BASE_URL = "https://sandbox.safaricom.co.ke"
+PRODUCTION_BASE_URL = "https://api.safaricom.co.ke"
+
+
+class DarajaClient:
+    """
+    Thin HTTP client for the Safaricom Daraja API.
+
+    Holds one pooled keep-alive requests.Session so STK pushes, queries, B2C
+    calls and OAuth refreshes reuse TCP+TLS connections instead of opening a
+    new one per call.
+    """
+    ENDPOINTS = {
+        "oauth": "/oauth/v1/generate?grant_type=client_credentials",
+        "stk_push": "/mpesa/stkpush/v1/processrequest",
+        "stk_query": "/mpesa/stkpushquery/v1/query",
+        "b2c": "/mpesa/b2c/v1/paymentrequest",
+    }
+
+    # (connect, read) timeouts in seconds
+    DEFAULT_TIMEOUTS = {
+        "oauth": (3.05, 10),
+        "stk_push": (3.05, 30),
+        "stk_query": (3.05, 15),
+        "b2c": (3.05, 30),
+    }
+
+    # Only operations that can't move money twice are retried
+    IDEMPOTENT_OPERATIONS = {"oauth", "stk_query"}
+    RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+    def __init__(self, env=None, pool_size=None, timeouts=None, max_retries=None, backoff_factor=None):
+        self.env = env or settings.MPESA_ENV
+        self.base_url = SANDBOX_BASE_URL if self.env == "sandbox" else PRODUCTION_BASE_URL
+        self.pool_size = pool_size or getattr(settings, "MPESA_HTTP_POOL_SIZE", 10)
+        self.timeouts = {**self.DEFAULT_TIMEOUTS, **(timeouts or getattr(settings, "MPESA_HTTP_TIMEOUTS", {}))}
+        self.max_retries = max_retries if max_retries is not None else getattr(settings, "MPESA_HTTP_MAX_RETRIES", 2)
+        self.backoff_factor = backoff_factor if backoff_factor is not None else getattr(settings, "MPESA_HTTP_BACKOFF", 0.5)
+        self.session = self._build_session()
+
+    def _build_session(self):
+        session = requests.Session()
+        # Retries are handled in _request so they only apply to idempotent calls
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+        session.mount("https://", adapter)
+        session.headers.update({"Content-Type": "application/json"})
+        return session
+
+    def url(self, operation):
+        return f"{self.base_url}{self.ENDPOINTS[operation]}"
+
+    # ------------------------------
+    # STK helpers
+    # ------------------------------
+    def stk_password(self, timestamp=None):
+        """
+        Build the (password, timestamp) pair Daraja expects on STK requests
+        """
+        timestamp = timestamp or datetime.now().strftime('%Y%m%d%H%M%S')
+        password_string = settings.MPESA_SHORTCODE + settings.MPESA_PASSKEY + timestamp
+        password = base64.b64encode(password_string.encode('utf-8')).decode('utf-8')
+        return password, timestamp
+
+    def build_stk_payload(self, phone_number, amount, callback_url, account_reference, transaction_desc):
+        password, timestamp = self.stk_password()
+        return {
+            "BusinessShortCode": settings.MPESA_SHORTCODE,
+            "Password": password,
+            "Timestamp": timestamp,
+            "TransactionType": "CustomerPayBillOnline",
+            "Amount": int(amount),
+            "PartyA": phone_number,
+            "PartyB": settings.MPESA_SHORTCODE,
+            "PhoneNumber": phone_number,
+            "CallBackURL": callback_url,
+            "AccountReference": account_reference,
+            "TransactionDesc": transaction_desc,
+        }
+
+    # ------------------------------
+    # API operations
+    # ------------------------------
+    def request_token(self):
+        return self._request(
+            "GET", "oauth",
+            auth=HTTPBasicAuth(settings.MPESA_CONSUMER_KEY, settings.MPESA_CONSUMER_SECRET),
+        )
+
+    def stk_push(self, access_token, phone_number, amount, callback_url, account_reference, transaction_desc):
+        payload = self.build_stk_payload(phone_number, amount, callback_url, account_reference, transaction_desc)
+        logger.info(f"Sending STK push to: {self.url('stk_push')} ({account_reference})")
+        return self._request("POST", "stk_push", access_token=access_token, json=payload)
+
+    def stk_query(self, access_token, checkout_request_id):
+        password, timestamp = self.stk_password()
+        payload = {
+            "BusinessShortCode": settings.MPESA_SHORTCODE,
+            "Password": password,
+            "Timestamp": timestamp,
+            "CheckoutRequestID": checkout_request_id,
+        }
+        return self._request("POST", "stk_query", access_token=access_token, json=payload)
+
+    def b2c(self, access_token, payload):
+        return self._request("POST", "b2c", access_token=access_token, json=payload)
+
+    def _request(self, method, operation, access_token=None, **kwargs):
+        headers = kwargs.pop("headers", {})
+        if access_token:
+            headers["Authorization"] = f"Bearer {access_token}"
+
+        attempts = 1 + (self.max_retries if operation in self.IDEMPOTENT_OPERATIONS else 0)
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            try:
+                response = self.session.request(
+                    method, self.url(operation), headers=headers,
+                    timeout=self.timeouts[operation], **kwargs
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if last_attempt:
+                    raise
+                logger.warning(f"Daraja {operation} attempt {attempt + 1} failed: {e}")
+            else:
+                if last_attempt or response.status_code not in self.RETRY_STATUS_CODES:
+                    return response
+                logger.warning(f"Daraja {operation} attempt {attempt + 1} returned {response.status_code}")
+            time.sleep(self.backoff_factor * (2 ** attempt))
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_daraja_client():
+    """
+    Return the per-process DarajaClient.
+    A new client is built after a fork so gunicorn/celery workers never share sockets.
+    """
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = DarajaClient()
+                _client_pid = pid
+    return _client
@@ -0,0 +1,56 @@
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from datetime import datetime, time, timedelta
+import csv
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """
+    File-like object whose write() just hands the row back, so csv.writer
+    can format rows one at a time for a streaming response
+    """
+    def write(self, value):
+        return value
+
+
+def streaming_csv_response(filename, header, rows):
+    """
+    Stream `rows` (any iterable of sequences) as a CSV attachment.
+    Memory stays flat however many rows the queryset yields.
+    """
+    writer = csv.writer(Echo())
+
+    def generate():
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(generate(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def parse_date_range(params):
+    """
+    Read optional start_date/end_date (YYYY-MM-DD, inclusive) query params.
+    Returns a dict of created_at filters; raises ValueError on bad input.
+    Bounds are datetimes rather than __date lookups so the created_at index stays usable.
+    """
+    filters = {}
+    start_date = params.get('start_date')
+    end_date = params.get('end_date')
+    if start_date:
+        start = datetime.strptime(start_date, '%Y-%m-%d').date()
+        filters['created_at__gte'] = timezone.make_aware(datetime.combine(start, time.min))
+    if end_date:
+        end = datetime.strptime(end_date, '%Y-%m-%d').date() + timedelta(days=1)
+        filters['created_at__lt'] = timezone.make_aware(datetime.combine(end, time.min))
+    if start_date and end_date and filters['created_at__gte'] >= filters['created_at__lt']:
+        raise ValueError("start_date must not be after end_date")
+    return filters
+
+
+def format_date(value):
+    return timezone.localtime(value).strftime('%Y-%m-%d') if value else ''
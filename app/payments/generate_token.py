@@ -1,31 +1,117 @@
 import requests
 from django.conf import settings
-from requests.auth import HTTPBasicAuth
+from django.core.cache import cache
 import logging
-import datetime
-import base64
+import threading
+import time
+
+from .daraja import get_daraja_client
 logger = logging.getLogger(__name__)
 
-def generate_access_token():
+
+class MpesaTokenManager:
     """
-    Generate M-Pesa access token with proper error handling
+    Caches the Daraja OAuth token until shortly before it expires.
+
+    The token is kept in process memory and shared across workers through the
+    Django cache. Refreshes are single-flight: one thread per process (local lock)
+    and one process per deployment (cache.add lock) talks to the OAuth endpoint,
+    everybody else waits for the token it stores.
     """
-    try:
-        # Use sandbox or production URL
-        if settings.MPESA_ENV == "sandbox":
-            url = "https://sandbox.safaricom.co.ke/oauth/v1/generate?grant_type=client_credentials"
-        else:
-            url = "https://api.safaricom.co.ke/oauth/v1/generate?grant_type=client_credentials"
+    CACHE_KEY = "mpesa:access_token"
+    LOCK_KEY = "mpesa:access_token:lock"
+
+    def __init__(self, expiry_margin=60, lock_timeout=10, wait_timeout=5):
+        self.expiry_margin = expiry_margin
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._token = None
+        self._expires_at = 0
+        self._stats = {"hits": 0, "misses": 0, "refreshes": 0, "failures": 0}
+
+    def get_token(self):
+        token = self._cached_token()
+        if token:
+            self._stats["hits"] += 1
+            return token
+
+        self._stats["misses"] += 1
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock
+            token = self._cached_token()
+            if token:
+                return token
 
-        response = requests.get(
-            url,
-            auth=HTTPBasicAuth(settings.MPESA_CONSUMER_KEY, settings.MPESA_CONSUMER_SECRET),
-            timeout=30
-        )
+            if cache.add(self.LOCK_KEY, True, timeout=self.lock_timeout):
+                try:
+                    return self._refresh()
+                finally:
+                    cache.delete(self.LOCK_KEY)
+
+            # Another process is refreshing; wait for it to publish the token
+            deadline = time.monotonic() + self.wait_timeout
+            while time.monotonic() < deadline:
+                time.sleep(0.1)
+                token = self._cached_token()
+                if token:
+                    return token
+
+            logger.warning("Timed out waiting for M-Pesa token refresh, refreshing locally")
+            return self._refresh()
+
+    def invalidate(self):
+        """Drop the cached token, e.g. after Daraja rejects it with 401."""
+        with self._lock:
+            self._token = None
+            self._expires_at = 0
+        cache.delete(self.CACHE_KEY)
+
+    def stats(self):
+        return dict(self._stats)
+
+    def _cached_token(self):
+        now = time.time()
+        if self._token and self._expires_at > now:
+            return self._token
+
+        shared = cache.get(self.CACHE_KEY)
+        if shared and shared.get("expires_at", 0) > now:
+            self._token = shared["token"]
+            self._expires_at = shared["expires_at"]
+            return self._token
+        return None
+
+    def _refresh(self):
+        self._stats["refreshes"] += 1
+        data = request_access_token()
+        if not data or not data.get("access_token"):
+            self._stats["failures"] += 1
+            return None
+
+        try:
+            expires_in = int(data.get("expires_in", 3599))
+        except (TypeError, ValueError):
+            expires_in = 3599
+        ttl = max(expires_in - self.expiry_margin, 1)
+
+        self._token = data["access_token"]
+        self._expires_at = time.time() + ttl
+        cache.set(self.CACHE_KEY, {"token": self._token, "expires_at": self._expires_at}, timeout=ttl)
+        logger.info(f"M-Pesa access token refreshed, valid for {ttl}s")
+        return self._token
+
+
+def request_access_token():
+    """
+    Fetch a fresh token from the Daraja OAuth endpoint.
+    Returns the decoded response ({"access_token", "expires_in"}) or None.
+    """
+    try:
+        response = get_daraja_client().request_token()
 
         if response.status_code == 200:
-            data = response.json()
-            return data.get('access_token')
+            return response.json()
         else:
             logger.error(f"M-Pesa token generation failed: {response.status_code} - {response.text}")
             return None
@@ -34,6 +120,18 @@ def generate_access_token():
         logger.error(f"M-Pesa token generation error: {str(e)}")
         return None
 
+
+token_manager = MpesaTokenManager(
+    expiry_margin=getattr(settings, "MPESA_TOKEN_EXPIRY_MARGIN", 60),
+)
+
+
+def generate_access_token():
+    """
+    Return a valid M-Pesa access token, reusing the cached one when possible
+    """
+    return token_manager.get_token()
+
 def initiate_b2c_payment(amount, recipient, payment_id, remarks="Rent disbursement"):
     """
     Initiate B2C payment to disburse funds to landlord.
@@ -49,15 +147,6 @@ def initiate_b2c_payment(amount, recipient, payment_id, remarks="Rent disburseme
     # Generate access token
     access_token = generate_access_token()
 
-    # Use sandbox or production URL based on env
-    base_url = "https://sandbox.safaricom.co.ke" if settings.MPESA_ENV == "sandbox" else "https://api.safaricom.co.ke"
-    url = f"{base_url}/mpesa/b2c/v1/paymentrequest"
-
-    timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-    password = base64.b64encode(
-        (settings.MPESA_SHORTCODE + settings.MPESA_PASSKEY + timestamp).encode("utf-8")
-    ).decode("utf-8")
-
     payload = {
         "InitiatorName": settings.MPESA_INITIATOR_NAME,  # Need to add to settings
         "SecurityCredential": settings.MPESA_SECURITY_CREDENTIAL,  # Need to add to settings
@@ -71,10 +160,8 @@ def initiate_b2c_payment(amount, recipient, payment_id, remarks="Rent disburseme
         "Occasion": f"Payment {payment_id}"
     }
 
-    headers = {"Authorization": f"Bearer {access_token}"}
-
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=30)
+        response = get_daraja_client().b2c(access_token, payload)
         response.raise_for_status()
         data = response.json()
         logger.info(f"B2C payment initiated: {data}")
@@ -0,0 +1,93 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+import json
+import logging
+
+from .models import MpesaCallback
+from .settlement import process_stk_callback, process_b2c_callback
+
+logger = logging.getLogger(__name__)
+
+
+def record_callback(kind, body):
+    """
+    Append a raw callback body to the inbox. Does no parsing so the
+    callback view can ack Daraja as fast as possible.
+    """
+    if isinstance(body, bytes):
+        body = body.decode('utf-8', errors='replace')
+    return MpesaCallback.objects.create(kind=kind, body=body)
+
+
+def settle_callback(entry):
+    """
+    Run settlement for one inbox entry and return the outcome.
+    Settlement is idempotent, so replaying an entry is always safe.
+    """
+    callback_data = json.loads(entry.body)
+    if entry.kind == "b2c":
+        return process_b2c_callback(callback_data)
+    return process_stk_callback(entry.kind, callback_data)
+
+
+def drain_callback_inbox(batch_size=None, max_attempts=None):
+    """
+    Settle unprocessed inbox entries in batches, one transaction per batch.
+    Each entry runs in its own savepoint so one bad payload doesn't roll back
+    the rest of the batch; it is retried on later drains up to max_attempts.
+    Returns a dict with processed/failed counts.
+    """
+    batch_size = batch_size or settings.MPESA_CALLBACK_BATCH_SIZE
+    max_attempts = max_attempts or settings.MPESA_CALLBACK_MAX_ATTEMPTS
+    stats = {"processed": 0, "failed": 0}
+    last_id = 0  # entries that fail are only retried on the next drain
+
+    while True:
+        with transaction.atomic():
+            # skip_locked lets several workers drain the inbox side by side
+            entries = list(
+                MpesaCallback.objects.select_for_update(skip_locked=True)
+                .filter(processed_at__isnull=True, attempts__lt=max_attempts, id__gt=last_id)
+                .order_by('id')[:batch_size]
+            )
+            if not entries:
+                return stats
+
+            last_id = entries[-1].id
+            for entry in entries:
+                entry.attempts += 1
+                try:
+                    with transaction.atomic():
+                        entry.outcome = settle_callback(entry)
+                        entry.processed_at = timezone.now()
+                        entry.last_error = ""
+                    stats["processed"] += 1
+                except Exception as e:
+                    logger.error(f"Error settling {entry.kind} callback {entry.id}: {str(e)}", exc_info=True)
+                    entry.last_error = str(e)
+                    stats["failed"] += 1
+
+            MpesaCallback.objects.bulk_update(
+                entries, ['attempts', 'outcome', 'processed_at', 'last_error']
+            )
+
+        if len(entries) < batch_size:
+            return stats
+
+
+def replay_callback(entry):
+    """
+    Re-run settlement for an inbox entry, e.g. after fixing a settlement bug.
+    """
+    entry.attempts += 1
+    try:
+        with transaction.atomic():
+            entry.outcome = settle_callback(entry)
+            entry.processed_at = timezone.now()
+            entry.last_error = ""
+    except Exception as e:
+        logger.error(f"Error replaying {entry.kind} callback {entry.id}: {str(e)}", exc_info=True)
+        entry.last_error = str(e)
+    entry.save(update_fields=['attempts', 'outcome', 'processed_at', 'last_error'])
+    return entry.outcome if not entry.last_error else None
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import CustomUser
+from payments.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-landlord monthly payment rollups from payment history"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--landlord', type=int, help="Only rebuild rollups for this landlord id")
+
+    def handle(self, *args, **options):
+        landlord = None
+        if options['landlord']:
+            try:
+                landlord = CustomUser.objects.get(id=options['landlord'], user_type='landlord')
+            except CustomUser.DoesNotExist:
+                raise CommandError(f"Landlord {options['landlord']} does not exist")
+
+        count = rebuild_rollups(landlord)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} rollup rows"))
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscriptionpayment',
+            name='failure_reason',
+            field=models.TextField(blank=True, null=True),
+        ),
+    ]
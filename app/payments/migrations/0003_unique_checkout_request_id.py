@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:01
+
+from django.db import migrations, models
+
+
+def blank_checkout_ids_to_null(apps, schema_editor):
+    # Empty strings would collide under the unique index; NULLs don't
+    for model_name in ('Payment', 'SubscriptionPayment'):
+        model = apps.get_model('payments', model_name)
+        model.objects.filter(mpesa_checkout_request_id='').update(mpesa_checkout_request_id=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0002_subscriptionpayment_failure_reason'),
+    ]
+
+    operations = [
+        migrations.RunPython(blank_checkout_ids_to_null, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='payment',
+            name='mpesa_checkout_request_id',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='subscriptionpayment',
+            name='mpesa_checkout_request_id',
+            field=models.CharField(blank=True, help_text='M-Pesa checkout request ID for tracking STK push', max_length=100, null=True, unique=True),
+        ),
+    ]
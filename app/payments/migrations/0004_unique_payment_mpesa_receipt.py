@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:05
+
+from django.db import migrations, models
+
+
+def clear_duplicate_receipts(apps, schema_editor):
+    # Keep the receipt on the first payment that recorded it; later copies
+    # would collide under the unique index, so they lose theirs
+    Payment = apps.get_model('payments', 'Payment')
+    duplicated = (
+        Payment.objects.exclude(mpesa_receipt__isnull=True).exclude(mpesa_receipt='')
+        .values('mpesa_receipt')
+        .annotate(first_id=models.Min('id'), copies=models.Count('id'))
+        .filter(copies__gt=1)
+        .order_by()
+    )
+    for row in duplicated.iterator():
+        Payment.objects.filter(mpesa_receipt=row['mpesa_receipt']).exclude(id=row['first_id']).update(mpesa_receipt=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0003_unique_checkout_request_id'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_duplicate_receipts, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='payment',
+            constraint=models.UniqueConstraint(condition=models.Q(('mpesa_receipt__isnull', False), models.Q(('mpesa_receipt', ''), _negated=True)), fields=('mpesa_receipt',), name='unique_payment_mpesa_receipt'),
+        ),
+    ]
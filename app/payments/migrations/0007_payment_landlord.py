@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:40
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def backfill_payment_landlord(apps, schema_editor):
+    Payment = apps.get_model('payments', 'Payment')
+    Unit = apps.get_model('accounts', 'Unit')
+    Payment.objects.update(
+        landlord_id=Subquery(Unit.objects.filter(pk=OuterRef('unit_id')).values('landlord_id')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accounts', '0004_unit_landlord'),
+        ('payments', '0006_paymentrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='landlord',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='landlord_payments', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_payment_landlord, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='payment',
+            name='landlord',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='landlord_payments', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['landlord', 'status', 'created_at'], name='payment_landlord_status_idx'),
+        ),
+    ]
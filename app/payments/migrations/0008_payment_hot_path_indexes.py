@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0007_payment_landlord'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['status', 'created_at'], name='payment_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['tenant', 'payment_type', 'status'], name='payment_tenant_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscriptionpayment',
+            index=models.Index(fields=['status', 'transaction_date'], name='sub_payment_status_date_idx'),
+        ),
+    ]
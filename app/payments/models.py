@@ -1,5 +1,5 @@
 from django.db import models
-from accounts.models import CustomUser, Unit, Subscription
+from accounts.models import CustomUser, Unit, Subscription, Property, LandlordScopedQuerySet
 from datetime import timedelta
 from django.core.exceptions import ValidationError
 import uuid
@@ -34,7 +34,7 @@ class Payment(models.Model):
     
     # M-Pesa fields
     mpesa_receipt = models.CharField(max_length=50, blank=True, null=True)
-    mpesa_checkout_request_id = models.CharField(max_length=100, blank=True, null=True)
+    mpesa_checkout_request_id = models.CharField(max_length=100, blank=True, null=True, unique=True)
     
     # Additional fields
     reference_number = models.CharField(max_length=50, unique=True, blank=True)
@@ -50,6 +50,30 @@ class Payment(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     failure_reason = models.TextField(blank=True, null=True)
 
+    # Copy of unit.landlord, set on save, so landlord queries stay on this table
+    landlord = models.ForeignKey(
+        CustomUser, on_delete=models.CASCADE, related_name='landlord_payments', editable=False
+    )
+
+    objects = LandlordScopedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['landlord', 'status', 'created_at'], name='payment_landlord_status_idx'),
+            # Pending-payment reconciliation and cleanup
+            models.Index(fields=['status', 'created_at'], name='payment_status_created_idx'),
+            # Deposit checks before assigning a tenant
+            models.Index(fields=['tenant', 'payment_type', 'status'], name='payment_tenant_type_idx'),
+        ]
+        # A receipt can only settle one payment, so replayed callbacks can't double-count
+        constraints = [
+            models.UniqueConstraint(
+                fields=['mpesa_receipt'],
+                name='unique_payment_mpesa_receipt',
+                condition=models.Q(mpesa_receipt__isnull=False) & ~models.Q(mpesa_receipt='')
+            )
+        ]
+
     def clean(self):
         if self.payment_type == 'rent' and not self.unit:
             raise ValidationError("Rent payments must be associated with a unit")
@@ -58,6 +82,11 @@ class Payment(models.Model):
         # Generate reference number if not set
         if not self.reference_number:
             self.reference_number = f"PAY-{uuid.uuid4().hex[:12].upper()}"
+        if not self.landlord_id:
+            if Payment.unit.is_cached(self):
+                self.landlord_id = self.unit.landlord_id
+            else:
+                self.landlord_id = Unit.objects.filter(pk=self.unit_id).values_list('landlord_id', flat=True).first()
         super().save(*args, **kwargs)
         
     def __str__(self):
@@ -82,6 +111,7 @@ class SubscriptionPayment(models.Model):
         max_length=100,
         blank=True,
         null=True,
+        unique=True,
         help_text="M-Pesa checkout request ID for tracking STK push"
     )
     transaction_date = models.DateTimeField(auto_now_add=True)
@@ -91,8 +121,12 @@ class SubscriptionPayment(models.Model):
         choices=[("Pending", "Pending"), ("Success", "Success"), ("Failed", "Failed")],
         default="Pending"
     )
+    failure_reason = models.TextField(blank=True, null=True)
 
     class Meta:
+        indexes = [
+            models.Index(fields=['status', 'transaction_date'], name='sub_payment_status_date_idx'),
+        ]
         # Simple unique constraint for non-empty receipt numbers
         constraints = [
             models.UniqueConstraint(
@@ -117,3 +151,62 @@ class SubscriptionPayment(models.Model):
             # "onetime" will be treated as lifetime (None) by the subscription logic
         }
         return durations.get(self.subscription_type, timedelta(days=30))
+
+
+class MpesaCallback(models.Model):
+    """
+    Inbox of raw Daraja callback bodies.
+    Callback views append here and ack straight away; a Celery worker
+    settles the entries in batches (see payments/inbox.py).
+    """
+    KIND_CHOICES = [
+        ('rent', 'Rent'),
+        ('deposit', 'Deposit'),
+        ('subscription', 'Subscription'),
+        ('b2c', 'B2C'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    body = models.TextField()
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+    outcome = models.CharField(max_length=20, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['processed_at', 'id'], name='mpesa_callback_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} callback {self.id} ({self.outcome or 'unprocessed'})"
+
+
+class PaymentRollup(models.Model):
+    """
+    Running totals of successful payments per landlord, property, month and
+    payment type. Kept up to date by settlement (payments/rollups.py) so
+    dashboards read a few rows instead of scanning payment history.
+    """
+    landlord = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='payment_rollups')
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='payment_rollups')
+    month = models.DateField(help_text="First day of the month")
+    payment_type = models.CharField(max_length=20, choices=Payment.PAYMENT_TYPES)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['landlord', 'property', 'month', 'payment_type'],
+                name='unique_payment_rollup'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['landlord', 'month'], name='payment_rollup_landlord_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.property_id} {self.month:%Y-%m} {self.payment_type}: {self.total} ({self.count})"
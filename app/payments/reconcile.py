@@ -0,0 +1,161 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
+import logging
+import threading
+import time
+
+from .models import Payment, SubscriptionPayment
+from .generate_token import generate_access_token
+from .daraja import get_daraja_client
+from .settlement import settle_payment, fail_payment, FAILED
+
+logger = logging.getLogger(__name__)
+
+# Outcome for payments Daraja is still processing
+STILL_PENDING = "pending"
+QUERY_ERROR = "error"
+# Outcome for payments still unresolved past MPESA_RECONCILE_MAX_AGE
+EXPIRED = "expired"
+
+
+class RateLimiter:
+    """
+    Spaces calls out to at most `rate` per second across threads
+    """
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self.lock = threading.Lock()
+        self.next_slot = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def pending_checkouts(min_age, chunk_size):
+    """
+    Yield chunks of (kind, payment_id, checkout_request_id, created) for
+    pending payments that reached Daraja at least `min_age` ago.
+    Keyset pagination keeps each chunk query on the primary key index.
+    """
+    cutoff = timezone.now() - min_age
+    sources = [
+        (Payment, 'created_at', ['payment_type']),
+        (SubscriptionPayment, 'transaction_date', []),
+    ]
+    for model, date_field, extra in sources:
+        last_id = 0
+        while True:
+            rows = list(
+                model.objects.filter(
+                    status='Pending',
+                    mpesa_checkout_request_id__isnull=False,
+                    id__gt=last_id,
+                    **{f'{date_field}__lt': cutoff}
+                )
+                .order_by('id')
+                .values_list('id', 'mpesa_checkout_request_id', date_field, *extra)[:chunk_size]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            if model is SubscriptionPayment:
+                yield [("subscription", row[0], row[1], row[2]) for row in rows]
+            else:
+                yield [("deposit" if row[3] == 'deposit' else "rent", row[0], row[1], row[2]) for row in rows]
+
+
+def pending_backlog(min_age):
+    cutoff = timezone.now() - min_age
+    return (
+        Payment.objects.filter(status='Pending', mpesa_checkout_request_id__isnull=False, created_at__lt=cutoff).count() +
+        SubscriptionPayment.objects.filter(status='Pending', mpesa_checkout_request_id__isnull=False, transaction_date__lt=cutoff).count()
+    )
+
+
+def query_checkout(client, access_token, limiter, checkout_request_id):
+    """
+    Ask Daraja for the status of one STK push. Runs in a worker thread and
+    touches no database state.
+    """
+    limiter.wait()
+    try:
+        return client.stk_query(access_token, checkout_request_id).json()
+    except Exception as e:
+        logger.error(f"STK query failed for {checkout_request_id}: {str(e)}")
+        return None
+
+
+def apply_query_result(kind, payment_id, result, expired=False):
+    """
+    Settle or fail a payment from an STK Push Query response, through the
+    same settlement path the callbacks use. An expired payment Daraja
+    still has no result for is failed instead of being left pending.
+    """
+    if result is None:
+        return QUERY_ERROR
+    # Daraja answers with an errorCode while the customer hasn't completed the prompt
+    if "ResultCode" not in result:
+        if not expired:
+            return STILL_PENDING
+        outcome = fail_payment(kind, payment_id, "STK query timed out")
+        return EXPIRED if outcome == FAILED else outcome
+    if str(result["ResultCode"]) == "0":
+        return settle_payment(kind, payment_id)
+    return fail_payment(kind, payment_id, result.get("ResultDesc", "STK push query reported failure"))
+
+
+def reconcile_pending_payments(min_age=None, chunk_size=None, concurrency=None, rate=None, max_age=None):
+    """
+    Query Daraja for pending payments whose callback never arrived and
+    settle or fail them. Payments older than `max_age` that Daraja still
+    has no result for are failed as expired (abandoned prompts).
+    Daraja calls run concurrently (bounded and rate-limited); settlement
+    runs on the calling thread.
+    Returns a stats dict including throughput and the remaining backlog.
+    """
+    min_age = min_age or timedelta(seconds=settings.MPESA_RECONCILE_MIN_AGE)
+    max_age = max_age or timedelta(seconds=settings.MPESA_RECONCILE_MAX_AGE)
+    chunk_size = chunk_size or settings.MPESA_RECONCILE_CHUNK_SIZE
+    concurrency = concurrency or settings.MPESA_RECONCILE_CONCURRENCY
+    limiter = RateLimiter(rate or settings.MPESA_RECONCILE_RATE)
+
+    stats = {"checked": 0, "settled": 0, "failed": 0, "pending": 0, "expired": 0, "duplicate": 0, "error": 0}
+    started = time.monotonic()
+
+    access_token = generate_access_token()
+    if not access_token:
+        logger.error("Reconciliation skipped: failed to generate M-Pesa access token")
+        stats["backlog"] = pending_backlog(min_age)
+        return stats
+
+    client = get_daraja_client()
+    expire_before = timezone.now() - max_age
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for chunk in pending_checkouts(min_age, chunk_size):
+            results = executor.map(
+                lambda row: query_checkout(client, access_token, limiter, row[2]), chunk
+            )
+            for (kind, payment_id, _, created), result in zip(chunk, results):
+                try:
+                    outcome = apply_query_result(kind, payment_id, result, expired=created < expire_before)
+                except Exception as e:
+                    logger.error(f"Error reconciling {kind} payment {payment_id}: {str(e)}", exc_info=True)
+                    outcome = QUERY_ERROR
+                stats[outcome] = stats.get(outcome, 0) + 1
+                stats["checked"] += 1
+
+    elapsed = time.monotonic() - started
+    stats["elapsed"] = round(elapsed, 2)
+    stats["throughput"] = round(stats["checked"] / elapsed, 2) if elapsed else 0
+    stats["backlog"] = pending_backlog(min_age)
+    logger.info(f"Reconciliation finished: {stats}")
+    return stats
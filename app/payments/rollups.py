@@ -0,0 +1,94 @@
+from django.db import transaction, IntegrityError
+from django.db.models import F, Sum, Count, DateField
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+import logging
+
+from accounts.models import Unit
+from accounts.caching import invalidate_landlord_cache
+from .models import Payment, PaymentRollup
+
+logger = logging.getLogger(__name__)
+
+
+def month_start(value):
+    """
+    First day of the (local) month a datetime falls in
+    """
+    return timezone.localtime(value).date().replace(day=1)
+
+
+def add_to_rollup(payment):
+    """
+    Add a newly settled payment to its rollup row.
+    Must run inside the settlement transaction so the rollup and the
+    payment status commit together.
+    """
+    landlord_id = payment.landlord_id
+    property_id = Unit.objects.filter(pk=payment.unit_id).values_list('property_obj_id', flat=True).get()
+    key = {
+        'landlord_id': landlord_id,
+        'property_id': property_id,
+        'month': month_start(payment.created_at),
+        'payment_type': payment.payment_type,
+    }
+
+    invalidate_landlord_cache(landlord_id)
+
+    updated = PaymentRollup.objects.filter(**key).update(
+        total=F('total') + payment.amount, count=F('count') + 1
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            PaymentRollup.objects.create(total=payment.amount, count=1, **key)
+    except IntegrityError:
+        # Another settlement created the row first
+        PaymentRollup.objects.filter(**key).update(
+            total=F('total') + payment.amount, count=F('count') + 1
+        )
+
+
+def rebuild_rollups(landlord=None, property=None):
+    """
+    Recompute rollup rows from payment history, for one landlord, one
+    property or everyone. Returns the number of rollup rows written.
+    """
+    payments = Payment.objects.filter(status='Success')
+    rollups = PaymentRollup.objects.all()
+    if landlord is not None:
+        payments = payments.for_landlord(landlord)
+        rollups = rollups.filter(landlord=landlord)
+    if property is not None:
+        payments = payments.filter(unit__property_obj=property)
+        rollups = rollups.filter(property=property)
+
+    grouped = (
+        payments
+        .annotate(month=TruncMonth('created_at', output_field=DateField()))
+        .values('landlord_id', 'unit__property_obj_id', 'month', 'payment_type')
+        .annotate(total=Sum('amount'), count=Count('id'))
+        .order_by()
+    )
+    rows = [
+        PaymentRollup(
+            landlord_id=row['landlord_id'],
+            property_id=row['unit__property_obj_id'],
+            month=row['month'],
+            payment_type=row['payment_type'],
+            total=row['total'],
+            count=row['count'],
+        )
+        for row in grouped.iterator()
+    ]
+
+    with transaction.atomic():
+        affected = set(rollups.values_list('landlord_id', flat=True)) | {row.landlord_id for row in rows}
+        rollups.delete()
+        PaymentRollup.objects.bulk_create(rows, batch_size=1000)
+        for landlord_id in affected:
+            invalidate_landlord_cache(landlord_id)
+
+    logger.info(f"Rebuilt {len(rows)} payment rollup rows")
+    return len(rows)
@@ -0,0 +1,264 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
+import logging
+import uuid
+
+from accounts.models import Unit, Subscription
+from .models import Payment, SubscriptionPayment
+from .stk import STK_CACHE_PREFIXES
+from .rollups import add_to_rollup
+
+logger = logging.getLogger(__name__)
+
+CORRELATION_CACHE_TIMEOUT = 300  # 5 minutes
+
+# Outcomes returned by the settle/fail helpers
+SETTLED = "settled"
+FAILED = "failed"
+DUPLICATE = "duplicate"
+NOT_FOUND = "not_found"
+
+
+def find_payment_for_checkout(kind, checkout_request_id):
+    """
+    Resolve a Daraja CheckoutRequestID to its Payment (rent/deposit) or
+    SubscriptionPayment (subscription).
+    The cache is only a read-through accelerator; the unique index on
+    mpesa_checkout_request_id is the source of truth, so late callbacks,
+    cache evictions and other nodes still find the payment.
+    """
+    if not checkout_request_id:
+        return None
+
+    if kind == "subscription":
+        model, id_field = SubscriptionPayment, "subscription_payment_id"
+    else:
+        model, id_field = Payment, "payment_id"
+    cache_key = f"{STK_CACHE_PREFIXES[kind]}{checkout_request_id}"
+
+    cached_data = cache.get(cache_key)
+    if cached_data:
+        payment = model.objects.filter(id=cached_data[id_field]).first()
+        if payment:
+            return payment
+
+    payment = model.objects.filter(mpesa_checkout_request_id=checkout_request_id).first()
+    if payment:
+        cache.set(cache_key, {id_field: payment.id}, timeout=CORRELATION_CACHE_TIMEOUT)
+    else:
+        logger.warning(f"No {kind} payment found for checkout: {checkout_request_id}")
+    return payment
+
+
+def parse_stk_callback(callback_data):
+    """
+    Flatten a Daraja STK callback body into the fields settlement needs
+    """
+    stk_callback = callback_data.get("Body", {}).get("stkCallback", {})
+    parsed = {
+        "result_code": stk_callback.get("ResultCode"),
+        "result_desc": stk_callback.get("ResultDesc", ""),
+        "checkout_request_id": stk_callback.get("CheckoutRequestID"),
+        "mpesa_receipt": None,
+        "amount": None,
+        "phone_number": None,
+    }
+    for item in stk_callback.get("CallbackMetadata", {}).get("Item", []):
+        if item.get("Name") == "MpesaReceiptNumber":
+            parsed["mpesa_receipt"] = item.get("Value")
+        elif item.get("Name") == "Amount":
+            parsed["amount"] = item.get("Value")
+        elif item.get("Name") == "PhoneNumber":
+            parsed["phone_number"] = item.get("Value")
+    return parsed
+
+
+def process_stk_callback(kind, callback_data):
+    """
+    Settle or fail the payment an STK callback refers to.
+    Safe to call repeatedly with the same callback: replays are no-ops.
+    Returns one of SETTLED, FAILED, DUPLICATE or NOT_FOUND.
+    """
+    parsed = parse_stk_callback(callback_data)
+    checkout_request_id = parsed["checkout_request_id"]
+    logger.info(f"{kind.capitalize()} callback - ResultCode: {parsed['result_code']}, CheckoutRequestID: {checkout_request_id}")
+
+    # Cheap replay check before any correlation work
+    if parsed["result_code"] == 0 and is_duplicate_receipt(kind, parsed["mpesa_receipt"]):
+        logger.info(f"Duplicate {kind} callback for receipt {parsed['mpesa_receipt']} ignored")
+        return DUPLICATE
+
+    payment = find_payment_for_checkout(kind, checkout_request_id)
+    if not payment:
+        return NOT_FOUND
+
+    if parsed["result_code"] == 0:
+        outcome = settle_payment(kind, payment.id, parsed["mpesa_receipt"], parsed["amount"])
+        cache.delete(f"{STK_CACHE_PREFIXES[kind]}{checkout_request_id}")
+        return outcome
+
+    logger.error(f"{kind.capitalize()} payment failed - ResultCode: {parsed['result_code']}, Description: {parsed['result_desc']}")
+    return fail_payment(kind, payment.id, parsed["result_desc"])
+
+
+def is_duplicate_receipt(kind, mpesa_receipt):
+    if not mpesa_receipt:
+        return False
+    if kind == "subscription":
+        return SubscriptionPayment.objects.filter(mpesa_receipt_number=mpesa_receipt).exists()
+    return Payment.objects.filter(mpesa_receipt=mpesa_receipt).exists()
+
+
+def settle_payment(kind, payment_id, mpesa_receipt=None, amount=None):
+    if kind == "subscription":
+        return settle_subscription_payment(payment_id, mpesa_receipt, amount)
+    if kind == "deposit":
+        return settle_deposit_payment(payment_id, mpesa_receipt, amount)
+    return settle_rent_payment(payment_id, mpesa_receipt, amount)
+
+
+def _lock_pending_payment(model, payment_id):
+    """
+    Row-lock the payment for the rest of the transaction.
+    Returns None when it is missing or already settled.
+    """
+    payment = model.objects.select_for_update().filter(id=payment_id).first()
+    if payment is None:
+        logger.error(f"{model.__name__} {payment_id} not found during settlement")
+        return None
+    if payment.status == "Success":
+        logger.info(f"{model.__name__} {payment_id} already settled")
+        return None
+    return payment
+
+
+def settle_rent_payment(payment_id, mpesa_receipt=None, amount=None):
+    """
+    Mark a rent payment successful and credit the unit with an atomic
+    F() increment, so concurrent callbacks for the same unit can't lose updates.
+    """
+    with transaction.atomic():
+        payment = _lock_pending_payment(Payment, payment_id)
+        if payment is None:
+            return DUPLICATE
+
+        paid_amount = Decimal(str(amount)) if amount else payment.amount
+        payment.status = "Success"
+        payment.mpesa_receipt = mpesa_receipt or f"RENT-{payment.id}-{uuid.uuid4().hex[:8].upper()}"
+        payment.amount = paid_amount
+        payment.save(update_fields=['status', 'mpesa_receipt', 'amount', 'updated_at'])
+        add_to_rollup(payment)
+
+        # rent_remaining uses the pre-update rent_paid on the right-hand side
+        Unit.objects.filter(pk=payment.unit_id).update(
+            rent_paid=F('rent_paid') + paid_amount,
+            rent_remaining=F('rent') - F('rent_paid') - paid_amount,
+        )
+
+    logger.info(f"Rent payment {payment.id} completed successfully for unit {payment.unit_id}")
+    return SETTLED
+
+
+def settle_deposit_payment(payment_id, mpesa_receipt=None, amount=None):
+    """
+    Mark a deposit payment successful and assign the unit to the tenant
+    """
+    with transaction.atomic():
+        payment = _lock_pending_payment(Payment, payment_id)
+        if payment is None:
+            return DUPLICATE
+
+        payment.status = "Success"
+        payment.mpesa_receipt = mpesa_receipt or f"DEP-{payment.id}-{uuid.uuid4().hex[:8].upper()}"
+        if amount:
+            payment.amount = Decimal(str(amount))
+        payment.save(update_fields=['status', 'mpesa_receipt', 'amount', 'updated_at'])
+        add_to_rollup(payment)
+
+        # Mark unit as occupied and assign tenant
+        unit = Unit.objects.select_for_update().get(pk=payment.unit_id)
+        unit.is_available = False
+        unit.tenant_id = payment.tenant_id
+        unit.assigned_date = timezone.now()
+        unit.save()
+
+    logger.info(f"Deposit payment {payment.id} completed, unit {unit.unit_number} assigned to tenant {payment.tenant_id}")
+    return SETTLED
+
+
+def settle_subscription_payment(payment_id, mpesa_receipt=None, amount=None):
+    """
+    Mark a subscription payment successful and extend the landlord's plan
+    """
+    with transaction.atomic():
+        subscription_payment = _lock_pending_payment(SubscriptionPayment, payment_id)
+        if subscription_payment is None:
+            return DUPLICATE
+
+        subscription_payment.status = "Success"
+        subscription_payment.mpesa_receipt_number = (
+            mpesa_receipt or
+            f"SUB-{subscription_payment.id}-{uuid.uuid4().hex[:8].upper()}"
+        )
+        if amount:
+            subscription_payment.amount = Decimal(str(amount))
+        subscription_payment.save(update_fields=['status', 'mpesa_receipt_number', 'amount'])
+
+        Subscription.objects.update_or_create(
+            user_id=subscription_payment.user_id,
+            defaults={
+                'plan': subscription_payment.subscription_type,
+                'expiry_date': timezone.now() + timedelta(days=30)
+            }
+        )
+
+    logger.info(f"Subscription payment {subscription_payment.id} completed, plan {subscription_payment.subscription_type}")
+    return SETTLED
+
+
+def fail_payment(kind, payment_id, reason):
+    """
+    Mark a pending payment failed. Never downgrades a settled payment.
+    """
+    model = SubscriptionPayment if kind == "subscription" else Payment
+    with transaction.atomic():
+        payment = _lock_pending_payment(model, payment_id)
+        if payment is None:
+            return DUPLICATE
+        payment.status = "Failed"
+        payment.failure_reason = reason
+        payment.save(update_fields=['status', 'failure_reason'])
+
+    logger.info(f"{model.__name__} {payment_id} marked as failed: {reason}")
+    return FAILED
+
+
+def process_b2c_callback(callback_data):
+    """
+    Record the result of a B2C disbursement.
+    Returns SETTLED or FAILED.
+    """
+    result = callback_data.get("Result", {})
+
+    if result.get("ResultCode") != 0:
+        logger.error(f"B2C payment failed: {result.get('ResultDesc')}")
+        return FAILED
+
+    transaction_receipt = None
+    transaction_amount = None
+    conversation_id = result.get("ConversationID")
+
+    for param in result.get("ResultParameters", {}).get("ResultParameter", []):
+        if param["Key"] == "TransactionReceipt":
+            transaction_receipt = param["Value"]
+        elif param["Key"] == "TransactionAmount":
+            transaction_amount = param["Value"]
+
+    if cache.get(f"b2c_{conversation_id}"):
+        cache.delete(f"b2c_{conversation_id}")
+    logger.info(f"B2C payment successful: Receipt {transaction_receipt}, Amount {transaction_amount}")
+    return SETTLED
@@ -0,0 +1,104 @@
+from django.conf import settings
+from django.core.cache import cache
+import logging
+
+from .models import Payment, SubscriptionPayment
+from .generate_token import generate_access_token
+from .daraja import get_daraja_client
+
+logger = logging.getLogger(__name__)
+
+# Cache key prefixes the callbacks use to correlate a CheckoutRequestID with its payment
+STK_CACHE_PREFIXES = {
+    "rent": "stk_",
+    "deposit": "stk_deposit_",
+    "subscription": "stk_sub_",
+}
+
+
+def initiate_stk_push(kind, payment_id, phone_number):
+    """
+    Send the STK push for an already-created pending payment and record the outcome.
+    - kind: 'rent', 'deposit' or 'subscription'
+    - payment_id: Payment id (rent/deposit) or SubscriptionPayment id (subscription)
+    - phone_number: validated 254XXXXXXXXX number
+    On success the CheckoutRequestID is saved on the payment; on failure the payment
+    is marked Failed with the reason. Returns a dict with 'success' plus either
+    'checkout_request_id' or 'error', and the raw 'response_data' when Daraja answered.
+    """
+    if kind == "subscription":
+        payment = SubscriptionPayment.objects.get(id=payment_id)
+        callback_url = settings.MPESA_SUBSCRIPTION_CALLBACK_URL
+        account_reference = f"SUB-{payment.user_id}"
+        transaction_desc = f"Subscription payment for {payment.subscription_type} plan"
+        cache_data = {
+            "subscription_payment_id": payment.id,
+            "user_id": payment.user_id,
+            "plan": payment.subscription_type,
+            "amount": float(payment.amount),
+        }
+    else:
+        payment = Payment.objects.select_related('unit').get(id=payment_id)
+        unit = payment.unit
+        if kind == "deposit":
+            callback_url = settings.MPESA_DEPOSIT_CALLBACK_URL
+            account_reference = f"DEPOSIT-{unit.unit_code}"
+            transaction_desc = f"Deposit payment for {unit.unit_number}"
+        else:
+            callback_url = settings.MPESA_RENT_CALLBACK_URL
+            account_reference = f"RENT-{unit.unit_code}"
+            transaction_desc = f"Rent payment for {unit.unit_number}"
+        cache_data = {
+            "payment_id": payment.id,
+            "unit_id": unit.id,
+            "amount": float(payment.amount),
+            "tenant_id": payment.tenant_id,
+        }
+
+    access_token = generate_access_token()
+    if not access_token:
+        return _fail(payment, "Failed to generate M-Pesa access token")
+
+    try:
+        response = get_daraja_client().stk_push(
+            access_token,
+            phone_number=phone_number,
+            amount=payment.amount,
+            callback_url=callback_url,
+            account_reference=account_reference,
+            transaction_desc=transaction_desc,
+        )
+        response_data = response.json()
+    except Exception as e:
+        logger.error(f"STK push error for {kind} payment {payment.id}: {str(e)}", exc_info=True)
+        return _fail(payment, f"Daraja request failed: {str(e)}")
+
+    logger.info(f"STK push response for {kind} payment {payment.id}: {response_data}")
+
+    if response.status_code == 200 and response_data.get("ResponseCode") == "0":
+        checkout_request_id = response_data["CheckoutRequestID"]
+        payment.mpesa_checkout_request_id = checkout_request_id
+        payment.save(update_fields=['mpesa_checkout_request_id'])
+
+        # Cache checkout request ID for callback
+        cache.set(f"{STK_CACHE_PREFIXES[kind]}{checkout_request_id}", cache_data, timeout=300)  # 5 minutes
+
+        logger.info(f"STK push initiated successfully for {kind} payment {payment.id}")
+        return {
+            "success": True,
+            "checkout_request_id": checkout_request_id,
+            "response_data": response_data,
+        }
+
+    error_message = response_data.get('errorMessage', response_data.get('ResponseDescription', 'Unknown error'))
+    result = _fail(payment, error_message)
+    result["response_data"] = response_data
+    return result
+
+
+def _fail(payment, reason):
+    logger.error(f"STK push failed for payment {payment.id}: {reason}")
+    payment.status = "Failed"
+    payment.failure_reason = reason
+    payment.save(update_fields=['status', 'failure_reason'])
+    return {"success": False, "error": reason}
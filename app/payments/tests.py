@@ -244,18 +244,19 @@ class SubscriptionPaymentViewTests(APITestCase):
         )
         self.client.force_authenticate(user=self.landlord)
 
-    @patch('payments.views.generate_access_token')
-    @patch('payments.views.requests.post')
-    def test_stk_push_subscription_payment(self, mock_post, mock_token):
+    @patch('payments.stk.generate_access_token')
+    @patch('payments.stk.get_daraja_client')
+    def test_stk_push_subscription_payment(self, mock_client, mock_token):
         """Test STK push initiation for subscription payment"""
         mock_token.return_value = 'test_token'
         mock_response = MagicMock()
+        mock_response.status_code = 200
         mock_response.json.return_value = {
             "ResponseCode": "0",
             "CheckoutRequestID": "test_checkout_id"
         }
         mock_response.raise_for_status.return_value = None
-        mock_post.return_value = mock_response
+        mock_client.return_value.stk_push.return_value = mock_response
 
         data = {
             'plan': 'starter',
@@ -336,18 +337,19 @@ class InitiateDepositPaymentTests(APITestCase):
         
         self.client.force_authenticate(user=self.tenant)
 
-    @patch('payments.views.generate_access_token')
-    @patch('payments.views.requests.post')
-    def test_initiate_deposit_payment(self, mock_post, mock_token):
+    @patch('payments.stk.generate_access_token')
+    @patch('payments.stk.get_daraja_client')
+    def test_initiate_deposit_payment(self, mock_client, mock_token):
         """Test initiating deposit payment"""
         mock_token.return_value = 'test_token'
         mock_response = MagicMock()
+        mock_response.status_code = 200
         mock_response.json.return_value = {
             "ResponseCode": "0",
             "CheckoutRequestID": "test_checkout_id"
         }
         mock_response.raise_for_status.return_value = None
-        mock_post.return_value = mock_response
+        mock_client.return_value.stk_push.return_value = mock_response
 
         data = {
             'unit_id': self.unit.id
@@ -0,0 +1,229 @@
+import json
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from .models import Payment, SubscriptionPayment, MpesaCallback
+from .inbox import drain_callback_inbox, replay_callback
+from .settlement import (
+    find_payment_for_checkout, process_stk_callback, settle_rent_payment,
+    SETTLED, DUPLICATE,
+)
+from accounts.models import Property, Unit, UnitType
+
+CustomUser = get_user_model()
+
+
+def stk_callback(checkout_request_id, result_code=0, amount=15000, receipt="QKA1B2C3D4"):
+    callback = {
+        "ResultCode": result_code,
+        "ResultDesc": "The service request is processed successfully." if result_code == 0 else "Request cancelled by user",
+        "CheckoutRequestID": checkout_request_id,
+    }
+    if result_code == 0:
+        callback["CallbackMetadata"] = {
+            "Item": [
+                {"Name": "Amount", "Value": amount},
+                {"Name": "MpesaReceiptNumber", "Value": receipt},
+                {"Name": "PhoneNumber", "Value": 254712345678},
+            ]
+        }
+    return json.dumps({"Body": {"stkCallback": callback}})
+
+
+class CallbackTestMixin:
+    def setUp(self):
+        # Primary keys repeat between tests, so landlord-scoped entries would too
+        cache.clear()
+        self.landlord = CustomUser.objects.create_user(
+            email='landlord@test.com',
+            full_name='Test Landlord',
+            user_type='landlord',
+            password='testpass123'
+        )
+        self.tenant = CustomUser.objects.create_user(
+            email='tenant@test.com',
+            full_name='Test Tenant',
+            user_type='tenant',
+            password='testpass123'
+        )
+        self.property = Property.objects.create(
+            landlord=self.landlord,
+            name='Test Property',
+            city='Nairobi',
+            state='Nairobi County',
+            unit_count=10
+        )
+        self.unit_type = UnitType.objects.create(
+            landlord=self.landlord,
+            name='Studio',
+            deposit=5000,
+            rent=15000
+        )
+        self.unit = Unit.objects.create(
+            property_obj=self.property,
+            unit_type=self.unit_type,
+            unit_number='101',
+            unit_code='U-101',
+            rent=15000,
+            deposit=5000,
+            tenant=self.tenant,
+            is_available=False
+        )
+        self.payment = Payment.objects.create(
+            tenant=self.tenant,
+            unit=self.unit,
+            amount=15000,
+            status='Pending',
+            payment_type='rent',
+            mpesa_checkout_request_id='ws_CO_RENT'
+        )
+
+    def post_callback(self, name, body):
+        return self.client.post(reverse(name), data=body, content_type='application/json')
+
+
+class CheckoutCorrelationTests(CallbackTestMixin, TestCase):
+    def test_lookup_falls_back_to_database(self):
+        """Test correlation works without any cache entry"""
+        self.assertEqual(find_payment_for_checkout('rent', 'ws_CO_RENT'), self.payment)
+        self.assertIsNone(find_payment_for_checkout('rent', 'ws_CO_UNKNOWN'))
+        self.assertIsNone(find_payment_for_checkout('rent', None))
+
+    def test_subscription_lookup(self):
+        """Test subscription payments are resolved from their own table"""
+        subscription_payment = SubscriptionPayment.objects.create(
+            user=self.landlord,
+            amount=1000,
+            subscription_type='starter',
+            mpesa_checkout_request_id='ws_CO_SUB'
+        )
+        self.assertEqual(find_payment_for_checkout('subscription', 'ws_CO_SUB'), subscription_payment)
+
+    def test_late_rent_callback_is_settled(self):
+        """Test a callback arriving after the cache entry expired still settles the payment"""
+        response = self.post_callback('mpesa-rent-callback', stk_callback('ws_CO_RENT', amount=10000))
+        self.assertEqual(response.status_code, 200)
+
+        self.payment.refresh_from_db()
+        self.unit.refresh_from_db()
+        self.assertEqual(self.payment.status, 'Success')
+        self.assertEqual(self.unit.rent_paid, Decimal('10000.00'))
+
+    def test_failed_callback_marks_payment_failed(self):
+        """Test a failed callback is correlated through the database"""
+        self.post_callback('mpesa-rent-callback', stk_callback('ws_CO_RENT', result_code=1032))
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'Failed')
+        self.assertEqual(self.payment.failure_reason, 'Request cancelled by user')
+
+
+class IdempotentSettlementTests(CallbackTestMixin, TestCase):
+    def test_replayed_callback_is_noop(self):
+        """Test Daraja retrying the same callback credits the unit once"""
+        body = stk_callback('ws_CO_RENT', amount=10000)
+        self.assertEqual(process_stk_callback('rent', json.loads(body)), SETTLED)
+        self.assertEqual(process_stk_callback('rent', json.loads(body)), DUPLICATE)
+
+        self.unit.refresh_from_db()
+        self.assertEqual(self.unit.rent_paid, Decimal('10000.00'))
+        self.assertEqual(self.unit.rent_remaining, Decimal('5000.00'))
+
+    def test_separate_payments_accumulate(self):
+        """Test two payments for the same unit are both credited"""
+        second = Payment.objects.create(
+            tenant=self.tenant,
+            unit=self.unit,
+            amount=5000,
+            status='Pending',
+            payment_type='rent',
+            mpesa_checkout_request_id='ws_CO_RENT_2'
+        )
+        settle_rent_payment(self.payment.id, 'QKA1', 10000)
+        settle_rent_payment(second.id, 'QKA2', 5000)
+
+        self.unit.refresh_from_db()
+        self.assertEqual(self.unit.rent_paid, Decimal('15000.00'))
+        self.assertEqual(self.unit.rent_remaining, Decimal('0.00'))
+
+    def test_failure_does_not_downgrade_settled_payment(self):
+        """Test a late failure callback can't undo a successful settlement"""
+        self.post_callback('mpesa-rent-callback', stk_callback('ws_CO_RENT'))
+        self.post_callback('mpesa-rent-callback', stk_callback('ws_CO_RENT', result_code=1032))
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'Success')
+
+    def test_deposit_callback_assigns_unit(self):
+        """Test a deposit callback assigns the unit to the paying tenant"""
+        self.unit.tenant = None
+        self.unit.is_available = True
+        self.unit.save()
+        deposit = Payment.objects.create(
+            tenant=self.tenant,
+            unit=self.unit,
+            amount=5000,
+            status='Pending',
+            payment_type='deposit',
+            mpesa_checkout_request_id='ws_CO_DEP'
+        )
+        response = self.post_callback('mpesa-deposit-callback', stk_callback('ws_CO_DEP', amount=5000, receipt='QKDEP1'))
+        self.assertEqual(response.json()['ResultCode'], 0)
+
+        deposit.refresh_from_db()
+        self.unit.refresh_from_db()
+        self.assertEqual(deposit.status, 'Success')
+        self.assertEqual(self.unit.tenant, self.tenant)
+        self.assertFalse(self.unit.is_available)
+
+
+@override_settings(MPESA_CALLBACK_INBOX=True)
+class CallbackInboxTests(CallbackTestMixin, TestCase):
+    def test_callback_is_queued_and_acked(self):
+        """Test the view only stores the raw body when the inbox is enabled"""
+        body = stk_callback('ws_CO_RENT', amount=10000)
+        response = self.post_callback('mpesa-rent-callback', body)
+        self.assertEqual(response.json()['ResultCode'], 0)
+
+        entry = MpesaCallback.objects.get()
+        self.assertEqual(entry.kind, 'rent')
+        self.assertEqual(entry.body, body)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'Pending')
+
+    def test_drain_settles_batch(self):
+        """Test draining settles queued callbacks, including duplicates, once"""
+        body = stk_callback('ws_CO_RENT', amount=10000)
+        self.post_callback('mpesa-rent-callback', body)
+        self.post_callback('mpesa-rent-callback', body)
+
+        stats = drain_callback_inbox(batch_size=1)
+        self.assertEqual(stats, {"processed": 2, "failed": 0})
+
+        self.payment.refresh_from_db()
+        self.unit.refresh_from_db()
+        self.assertEqual(self.payment.status, 'Success')
+        self.assertEqual(self.unit.rent_paid, Decimal('10000.00'))
+        self.assertEqual(
+            list(MpesaCallback.objects.values_list('outcome', flat=True)),
+            ['settled', 'duplicate']
+        )
+
+    def test_bad_entry_is_kept_for_replay(self):
+        """Test a payload that fails settlement stays unprocessed and can be replayed"""
+        entry = MpesaCallback.objects.create(kind='rent', body='not json')
+
+        stats = drain_callback_inbox()
+        self.assertEqual(stats, {"processed": 0, "failed": 1})
+        entry.refresh_from_db()
+        self.assertIsNone(entry.processed_at)
+        self.assertEqual(entry.attempts, 1)
+        self.assertTrue(entry.last_error)
+
+        entry.body = stk_callback('ws_CO_RENT')
+        self.assertEqual(replay_callback(entry), 'settled')
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'Success')
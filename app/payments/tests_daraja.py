@@ -0,0 +1,55 @@
+import base64
+import requests
+from django.test import TestCase, override_settings
+from unittest.mock import patch, MagicMock
+
+from .daraja import DarajaClient, get_daraja_client
+
+
+@override_settings(MPESA_ENV="sandbox", MPESA_SHORTCODE="174379", MPESA_PASSKEY="passkey")
+class DarajaClientTests(TestCase):
+    def setUp(self):
+        self.client = DarajaClient(backoff_factor=0)
+
+    def _response(self, status_code, data=None):
+        response = MagicMock()
+        response.status_code = status_code
+        response.json.return_value = data or {}
+        return response
+
+    def test_stk_password(self):
+        """Test the STK password is base64(shortcode + passkey + timestamp)"""
+        password, timestamp = self.client.stk_password("20250101120000")
+        self.assertEqual(timestamp, "20250101120000")
+        self.assertEqual(base64.b64decode(password).decode(), "174379passkey20250101120000")
+
+    def test_session_is_reused(self):
+        """Test the per-process client is a singleton"""
+        self.assertIs(get_daraja_client(), get_daraja_client())
+
+    def test_stk_push_builds_payload(self):
+        """Test STK push posts the shared payload with the bearer token"""
+        with patch.object(self.client.session, 'request', return_value=self._response(200)) as mock_request:
+            self.client.stk_push("tok", "254712345678", 1500.0, "https://cb", "RENT-U-1", "Rent")
+
+        args, kwargs = mock_request.call_args
+        self.assertEqual(args, ("POST", "https://sandbox.safaricom.co.ke/mpesa/stkpush/v1/processrequest"))
+        self.assertEqual(kwargs["headers"]["Authorization"], "Bearer tok")
+        self.assertEqual(kwargs["json"]["Amount"], 1500)
+        self.assertEqual(kwargs["json"]["AccountReference"], "RENT-U-1")
+        self.assertEqual(kwargs["timeout"], DarajaClient.DEFAULT_TIMEOUTS["stk_push"])
+
+    def test_stk_push_is_not_retried(self):
+        """Test non-idempotent calls are sent exactly once"""
+        with patch.object(self.client.session, 'request', side_effect=requests.Timeout()) as mock_request:
+            with self.assertRaises(requests.Timeout):
+                self.client.stk_push("tok", "254712345678", 10, "https://cb", "REF", "Desc")
+        self.assertEqual(mock_request.call_count, 1)
+
+    def test_stk_query_is_retried(self):
+        """Test idempotent calls retry on transient errors"""
+        responses = [requests.ConnectionError(), self._response(503), self._response(200, {"ResultCode": "0"})]
+        with patch.object(self.client.session, 'request', side_effect=responses) as mock_request:
+            response = self.client.stk_query("tok", "ws_CO_123")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_request.call_count, 3)
@@ -0,0 +1,83 @@
+from datetime import datetime
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import Payment
+from .tests_callbacks import CallbackTestMixin
+from accounts.models import Property, Unit
+
+
+class CSVExportTests(CallbackTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.payment.status = 'Success'
+        self.payment.mpesa_receipt = 'QKA1'
+        self.payment.save()
+        Payment.objects.filter(id=self.payment.id).update(
+            created_at=timezone.make_aware(datetime(2024, 1, 15, 12, 0))
+        )
+        self.other_property = Property.objects.create(
+            landlord=self.landlord,
+            name='Second Property',
+            city='Nairobi',
+            state='Nairobi County',
+            unit_count=5
+        )
+        self.other_unit = Unit.objects.create(
+            property_obj=self.other_property,
+            unit_type=self.unit_type,
+            unit_number='201',
+            unit_code='U-201',
+            rent=15000,
+            deposit=5000
+        )
+        later = Payment.objects.create(
+            tenant=self.tenant,
+            unit=self.other_unit,
+            amount=8000,
+            status='Success',
+            payment_type='rent',
+            mpesa_receipt='QKA2'
+        )
+        Payment.objects.filter(id=later.id).update(
+            created_at=timezone.make_aware(datetime(2024, 3, 1, 12, 0))
+        )
+
+    def read_csv(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode().splitlines()
+
+    def test_landlord_export_for_one_property(self):
+        """Test the per-property export only includes that property's payments"""
+        self.client.force_authenticate(user=self.landlord)
+        lines = self.read_csv(self.client.get(reverse('landlord-csv', args=[self.property.id])))
+        self.assertEqual(lines[0], 'Property,Unit Number,Tenant,Amount,Date,M-Pesa Receipt')
+        self.assertEqual(lines[1:], ['Test Property,101,Test Tenant,15000.00,2024-01-15,QKA1'])
+
+    def test_landlord_export_with_filters(self):
+        """Test multi-property and date range filters"""
+        self.client.force_authenticate(user=self.landlord)
+        url = reverse('landlord-csv-all')
+
+        lines = self.read_csv(self.client.get(url, {'properties': f'{self.property.id},{self.other_property.id}'}))
+        self.assertEqual(len(lines), 3)
+
+        lines = self.read_csv(self.client.get(url, {'start_date': '2024-02-01', 'end_date': '2024-03-01'}))
+        self.assertEqual(lines[1:], ['Second Property,201,Test Tenant,8000.00,2024-03-01,QKA2'])
+
+    def test_invalid_filters_are_rejected(self):
+        """Test bad dates and foreign properties are rejected before streaming"""
+        self.client.force_authenticate(user=self.landlord)
+        url = reverse('landlord-csv-all')
+        self.assertEqual(self.client.get(url, {'start_date': '2024-13-01'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'properties': '999'}).status_code, 404)
+
+    def test_tenant_export(self):
+        """Test a tenant can export their unit's payments"""
+        self.client.force_authenticate(user=self.tenant)
+        lines = self.read_csv(self.client.get(reverse('tenant-csv', args=[self.unit.id])))
+        self.assertEqual(lines[1:], ['15000.00,2024-01-15,QKA1,rent'])
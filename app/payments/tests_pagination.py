@@ -0,0 +1,54 @@
+from unittest.mock import patch
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from app.pagination import CreatedAtCursorPagination
+from .models import Payment
+from .tests_callbacks import CallbackTestMixin
+
+
+class CursorPaginationTests(CallbackTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(4):
+            Payment.objects.create(
+                tenant=self.tenant, unit=self.unit, amount=1000 + i, status='Success', payment_type='rent'
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.landlord)
+
+    def test_walks_all_pages_newest_first(self):
+        """Test following next links returns every payment once, newest first"""
+        url = reverse('rent-payment-list-create') + '?page_size=2'
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 2)
+            ids += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+
+        expected = list(Payment.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_deep_pages_use_keyset_not_offset(self):
+        """Test a later page seeks by cursor position instead of OFFSET"""
+        first = self.client.get(reverse('rent-payment-list-create') + '?page_size=2')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(first.data['next'])
+
+        payment_queries = [q['sql'] for q in queries.captured_queries if 'FROM "payments_payment"' in q['sql']]
+        self.assertTrue(payment_queries)
+        for sql in payment_queries:
+            self.assertIn('"payments_payment"."created_at" <', sql)
+            self.assertNotIn('OFFSET', sql)
+
+    def test_page_size_is_capped(self):
+        """Test clients can't ask for more than the maximum page size"""
+        with patch.object(CreatedAtCursorPagination, 'max_page_size', 3):
+            response = self.client.get(reverse('rent-payment-list-create') + '?page_size=100000')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 3)
@@ -0,0 +1,100 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch, MagicMock
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import Payment, SubscriptionPayment
+from .reconcile import reconcile_pending_payments, RateLimiter
+from .tests_callbacks import CallbackTestMixin
+
+
+def query_response(result_code=None, result_desc=""):
+    response = MagicMock()
+    if result_code is None:
+        response.json.return_value = {"errorCode": "500.001.1001", "errorMessage": "The transaction is being processed"}
+    else:
+        response.json.return_value = {"ResponseCode": "0", "ResultCode": str(result_code), "ResultDesc": result_desc}
+    return response
+
+
+@patch('payments.reconcile.get_daraja_client')
+@patch('payments.reconcile.generate_access_token', return_value='token')
+class ReconcilePendingPaymentsTests(CallbackTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        Payment.objects.filter(id=self.payment.id).update(created_at=timezone.now() - timedelta(minutes=10))
+
+    def reconcile(self):
+        return reconcile_pending_payments(min_age=timedelta(minutes=2), chunk_size=1, concurrency=2, rate=1000)
+
+    def test_paid_payment_is_settled(self, mock_token, mock_client):
+        """Test a pending payment Daraja reports as paid is settled"""
+        mock_client.return_value.stk_query.return_value = query_response(0, "The service request is processed successfully.")
+
+        stats = self.reconcile()
+
+        self.payment.refresh_from_db()
+        self.unit.refresh_from_db()
+        self.assertEqual(self.payment.status, 'Success')
+        self.assertEqual(self.unit.rent_paid, Decimal('15000.00'))
+        self.assertEqual(stats['settled'], 1)
+        self.assertEqual(stats['backlog'], 0)
+
+    def test_cancelled_payment_is_failed(self, mock_token, mock_client):
+        """Test a pending payment Daraja reports as cancelled is failed"""
+        mock_client.return_value.stk_query.return_value = query_response(1032, "Request cancelled by user")
+
+        self.reconcile()
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'Failed')
+        self.assertEqual(self.payment.failure_reason, 'Request cancelled by user')
+
+    def test_processing_payment_stays_pending(self, mock_token, mock_client):
+        """Test payments Daraja is still processing are left for the next run"""
+        mock_client.return_value.stk_query.return_value = query_response()
+        SubscriptionPayment.objects.create(
+            user=self.landlord,
+            amount=1000,
+            subscription_type='starter',
+            mpesa_checkout_request_id='ws_CO_SUB'
+        )
+        SubscriptionPayment.objects.update(transaction_date=timezone.now() - timedelta(minutes=10))
+
+        stats = self.reconcile()
+
+        self.assertEqual(stats['checked'], 2)
+        self.assertEqual(stats['pending'], 2)
+        self.assertEqual(stats['backlog'], 2)
+
+    def test_abandoned_payment_expires(self, mock_token, mock_client):
+        """Test a payment Daraja never resolves is failed once it passes the max age"""
+        mock_client.return_value.stk_query.return_value = query_response()
+        Payment.objects.filter(id=self.payment.id).update(created_at=timezone.now() - timedelta(hours=2))
+
+        stats = reconcile_pending_payments(min_age=timedelta(minutes=2), max_age=timedelta(hours=1), rate=1000)
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'Failed')
+        self.assertEqual(self.payment.failure_reason, 'STK query timed out')
+        self.assertEqual((stats['expired'], stats['pending'], stats['backlog']), (1, 0, 0))
+
+    def test_recent_payments_are_skipped(self, mock_token, mock_client):
+        """Test payments still inside the callback window are not queried"""
+        Payment.objects.filter(id=self.payment.id).update(created_at=timezone.now())
+
+        stats = self.reconcile()
+
+        self.assertEqual(stats['checked'], 0)
+        mock_client.return_value.stk_query.assert_not_called()
+
+
+class RateLimiterTests(TestCase):
+    def test_calls_are_spaced(self):
+        """Test the limiter hands out slots at the configured rate"""
+        limiter = RateLimiter(rate=50)
+        start = timezone.now()
+        for _ in range(5):
+            limiter.wait()
+        self.assertGreaterEqual((timezone.now() - start).total_seconds(), 4 / 50 - 0.01)
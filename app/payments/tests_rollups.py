@@ -0,0 +1,88 @@
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import CustomUser, Property
+
+from .models import Payment, PaymentRollup
+from .rollups import month_start
+from .settlement import settle_rent_payment, settle_deposit_payment
+from .tests_callbacks import CallbackTestMixin
+
+
+class PaymentRollupTests(CallbackTestMixin, TestCase):
+    def create_payment(self, amount, payment_type='rent', checkout_id=None):
+        return Payment.objects.create(
+            tenant=self.tenant,
+            unit=self.unit,
+            amount=amount,
+            status='Pending',
+            payment_type=payment_type,
+            mpesa_checkout_request_id=checkout_id
+        )
+
+    def test_settlement_updates_rollup(self):
+        """Test settled payments are added to their month's rollup row"""
+        settle_rent_payment(self.payment.id, 'QKA1', 10000)
+        settle_rent_payment(self.create_payment(5000).id, 'QKA2', 5000)
+        settle_deposit_payment(self.create_payment(5000, 'deposit').id, 'QKA3', 5000)
+
+        rent = PaymentRollup.objects.get(payment_type='rent')
+        self.assertEqual(rent.landlord, self.landlord)
+        self.assertEqual(rent.property, self.property)
+        self.assertEqual(rent.month, month_start(self.payment.created_at))
+        self.assertEqual(rent.total, Decimal('15000.00'))
+        self.assertEqual(rent.count, 2)
+        self.assertEqual(PaymentRollup.objects.get(payment_type='deposit').total, Decimal('5000.00'))
+
+    def test_replayed_settlement_is_not_counted(self):
+        """Test a duplicate settlement leaves the rollup untouched"""
+        settle_rent_payment(self.payment.id, 'QKA1', 10000)
+        settle_rent_payment(self.payment.id, 'QKA1', 10000)
+        self.assertEqual(PaymentRollup.objects.get().count, 1)
+
+    def test_rebuild_command_matches_incremental(self):
+        """Test rebuilding from history gives the same rows as incremental updates"""
+        settle_rent_payment(self.payment.id, 'QKA1', 10000)
+        settle_rent_payment(self.create_payment(5000).id, 'QKA2', 5000)
+        incremental = list(PaymentRollup.objects.values_list('property_id', 'month', 'payment_type', 'total', 'count'))
+
+        PaymentRollup.objects.update(total=0, count=0)
+        out = StringIO()
+        call_command('rebuild_payment_rollups', stdout=out)
+
+        self.assertIn('Rebuilt 1 rollup rows', out.getvalue())
+        self.assertEqual(
+            list(PaymentRollup.objects.values_list('property_id', 'month', 'payment_type', 'total', 'count')),
+            incremental
+        )
+
+    def test_rent_summary_reads_rollup(self):
+        """Test the rent summary total comes from the rollup"""
+        settle_rent_payment(self.payment.id, 'QKA1', 10000)
+        client = APIClient()
+        client.force_authenticate(user=self.landlord)
+
+        response = client.get(reverse('rent-summary'))
+        self.assertEqual(response.data['total_collected'], Decimal('10000.00'))
+
+    def test_property_reassignment_moves_rollups(self):
+        """Test reassigning a property moves its rollup rows to the new landlord"""
+        settle_rent_payment(self.payment.id, 'QKA1', 10000)
+        new_landlord = CustomUser.objects.create_user(
+            email='new_landlord@test.com',
+            full_name='New Landlord',
+            user_type='landlord',
+            password='testpass123'
+        )
+
+        property_obj = Property.objects.get(pk=self.property.pk)
+        property_obj.landlord = new_landlord
+        property_obj.save()
+
+        rollup = PaymentRollup.objects.get()
+        self.assertEqual(rollup.landlord, new_landlord)
+        self.assertEqual((rollup.total, rollup.count), (Decimal('10000.00'), 1))
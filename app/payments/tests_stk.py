@@ -0,0 +1,136 @@
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from unittest.mock import patch, MagicMock
+
+from .models import Payment, SubscriptionPayment
+from accounts.models import Property, Unit, UnitType
+
+CustomUser = get_user_model()
+
+
+class STKPushInitiationTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.landlord = CustomUser.objects.create_user(
+            email='landlord@test.com',
+            full_name='Test Landlord',
+            user_type='landlord',
+            password='testpass123'
+        )
+        self.tenant = CustomUser.objects.create_user(
+            email='tenant@test.com',
+            full_name='Test Tenant',
+            user_type='tenant',
+            password='testpass123',
+            phone_number='254712345678'
+        )
+        self.property = Property.objects.create(
+            landlord=self.landlord,
+            name='Test Property',
+            city='Nairobi',
+            state='Nairobi County',
+            unit_count=10
+        )
+        self.unit_type = UnitType.objects.create(
+            landlord=self.landlord,
+            name='Studio',
+            deposit=5000,
+            rent=15000
+        )
+        self.unit = Unit.objects.create(
+            property_obj=self.property,
+            unit_type=self.unit_type,
+            unit_number='101',
+            unit_code='U-101',
+            rent=15000,
+            deposit=5000,
+            tenant=self.tenant,
+            is_available=False
+        )
+        self.client.force_authenticate(user=self.tenant)
+
+    def _daraja_response(self, data, status_code=200):
+        response = MagicMock()
+        response.status_code = status_code
+        response.json.return_value = data
+        return response
+
+    @patch('payments.stk.generate_access_token', return_value='test_token')
+    @patch('payments.stk.get_daraja_client')
+    def test_sync_stk_push_records_checkout_id(self, mock_client, mock_token):
+        """Test the synchronous path stores the CheckoutRequestID on the pending payment"""
+        mock_client.return_value.stk_push.return_value = self._daraja_response(
+            {"ResponseCode": "0", "CheckoutRequestID": "ws_CO_1"}
+        )
+        response = self.client.post(reverse('stk-push', args=[self.unit.id]))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        payment = Payment.objects.get(id=response.data['payment_id'])
+        self.assertEqual(payment.status, 'Pending')
+        self.assertEqual(payment.mpesa_checkout_request_id, 'ws_CO_1')
+
+    @patch('payments.stk.generate_access_token', return_value='test_token')
+    @patch('payments.stk.get_daraja_client')
+    def test_sync_stk_push_failure_marks_payment_failed(self, mock_client, mock_token):
+        """Test a Daraja rejection is recorded on the payment"""
+        mock_client.return_value.stk_push.return_value = self._daraja_response(
+            {"errorMessage": "Invalid Access Token"}, status_code=400
+        )
+        response = self.client.post(reverse('stk-push', args=[self.unit.id]))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        payment = Payment.objects.get(unit=self.unit)
+        self.assertEqual(payment.status, 'Failed')
+        self.assertEqual(payment.failure_reason, 'Invalid Access Token')
+
+    @override_settings(MPESA_ASYNC_STK=True)
+    @patch('app.tasks.initiate_stk_push_task.delay')
+    def test_async_stk_push_returns_202_and_queues_task(self, mock_delay):
+        """Test async mode answers 202 without calling Daraja in the request"""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('stk-push', args=[self.unit.id]))
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        payment_id = response.data['payment_id']
+        self.assertEqual(response.data['status_url'], reverse('payment-status', args=[payment_id]))
+        mock_delay.assert_called_once_with('rent', payment_id, '254712345678')
+
+    @override_settings(MPESA_ASYNC_STK=True)
+    @patch('payments.stk.generate_access_token', return_value='test_token')
+    @patch('payments.stk.get_daraja_client')
+    def test_async_task_result_visible_in_status_view(self, mock_client, mock_token):
+        """Test the task writes the checkout id back for the status view"""
+        from app.tasks import initiate_stk_push_task
+        mock_client.return_value.stk_push.return_value = self._daraja_response(
+            {"ResponseCode": "0", "CheckoutRequestID": "ws_CO_2"}
+        )
+        with patch('app.tasks.initiate_stk_push_task.delay') as mock_delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(reverse('stk-push', args=[self.unit.id]))
+        payment_id = response.data['payment_id']
+        mock_delay.assert_called_once_with('rent', payment_id, '254712345678')
+
+        initiate_stk_push_task('rent', payment_id, '254712345678')
+
+        response = self.client.get(reverse('payment-status', args=[payment_id]))
+        self.assertEqual(response.data['status'], 'Pending')
+        self.assertEqual(response.data['checkout_request_id'], 'ws_CO_2')
+
+    @override_settings(MPESA_ASYNC_STK=True)
+    @patch('app.tasks.initiate_stk_push_task.delay')
+    def test_async_subscription_stk_push(self, mock_delay):
+        """Test subscription STK push is queued in async mode"""
+        self.client.force_authenticate(user=self.landlord)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('stk-push-subscription'),
+                {'plan': 'starter', 'phone_number': '0712345678'}
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        subscription_payment = SubscriptionPayment.objects.get(id=response.data['subscription_payment_id'])
+        self.assertEqual(subscription_payment.status, 'Pending')
+        mock_delay.assert_called_once_with('subscription', subscription_payment.id, '254712345678')
@@ -0,0 +1,55 @@
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from unittest.mock import patch
+
+from .generate_token import MpesaTokenManager
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class MpesaTokenManagerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.manager = MpesaTokenManager(expiry_margin=60)
+
+    @patch('payments.generate_token.request_access_token')
+    def test_token_is_reused_until_expiry(self, mock_request):
+        """Test repeated calls only hit the OAuth endpoint once"""
+        mock_request.return_value = {"access_token": "abc123", "expires_in": "3599"}
+
+        tokens = [self.manager.get_token() for _ in range(5)]
+
+        self.assertEqual(tokens, ["abc123"] * 5)
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertEqual(self.manager.stats(), {"hits": 4, "misses": 1, "refreshes": 1, "failures": 0})
+
+    @patch('payments.generate_token.request_access_token')
+    def test_token_is_shared_across_managers(self, mock_request):
+        """Test a second worker picks up the token from the shared cache"""
+        mock_request.return_value = {"access_token": "shared", "expires_in": "3599"}
+        self.manager.get_token()
+
+        other_worker = MpesaTokenManager()
+        self.assertEqual(other_worker.get_token(), "shared")
+        self.assertEqual(mock_request.call_count, 1)
+
+    @patch('payments.generate_token.request_access_token')
+    def test_failed_refresh_is_not_cached(self, mock_request):
+        """Test a failed OAuth call is retried on the next request"""
+        mock_request.return_value = None
+        self.assertIsNone(self.manager.get_token())
+
+        mock_request.return_value = {"access_token": "retry", "expires_in": "3599"}
+        self.assertEqual(self.manager.get_token(), "retry")
+        self.assertEqual(self.manager.stats()["failures"], 1)
+
+    @patch('payments.generate_token.request_access_token')
+    def test_invalidate_forces_refresh(self, mock_request):
+        """Test invalidate() drops the cached token"""
+        mock_request.return_value = {"access_token": "first", "expires_in": "3599"}
+        self.manager.get_token()
+        self.manager.invalidate()
+
+        mock_request.return_value = {"access_token": "second", "expires_in": "3599"}
+        self.assertEqual(self.manager.get_token(), "second")
@@ -17,6 +17,7 @@ from .views import (
     UnitTypeListView,
     InitiateDepositPaymentView,
     DepositPaymentStatusView,
+    PaymentStatusView,
     CleanupPendingPaymentsView,
     TestMpesaView,
 
@@ -60,9 +61,11 @@ urlpatterns = [
     # ------------------------------
     path("initiate-deposit/", InitiateDepositPaymentView.as_view(), name="initiate-deposit"),
     path('deposit-status/<int:payment_id>/', DepositPaymentStatusView.as_view(), name='deposit-status'),
+    path('payment-status/<int:payment_id>/', PaymentStatusView.as_view(), name='payment-status'),
     # ------------------------------
     # CSV REPORTS
     # ------------------------------
+    path("landlord-csv/", landlord_csv.as_view(), name="landlord-csv-all"),
     path("landlord-csv/<int:property_id>/", landlord_csv.as_view(), name="landlord-csv"),
     path("tenant-csv/<int:unit_id>/", tenant_csv.as_view(), name="tenant-csv"),
 
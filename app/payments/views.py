@@ -7,23 +7,26 @@ from rest_framework import status, generics
 from rest_framework.decorators import api_view, permission_classes
 from django.conf import settings
 from django.shortcuts import get_object_or_404
-from django.core.cache import cache
+from django.urls import reverse
+from django.db import transaction
 from django.utils import timezone
-from django.db.models import Sum, Q
-from django.http import HttpResponse
+from django.db.models import Q
 import json
-import requests
 from decimal import Decimal
-from datetime import datetime, timedelta
-import csv
+from datetime import timedelta
 import io
-import uuid
-import base64
 import logging
 
-from accounts.models import CustomUser, Unit, UnitType, Property, Subscription
+from accounts.models import CustomUser, Unit, UnitType, Property
+from accounts.dashboard import get_landlord_stats
+from accounts.authentication import ClaimsJWTAuthentication
 from .models import Payment, SubscriptionPayment
-from .generate_token import generate_access_token
+from .generate_token import generate_access_token, token_manager
+from .stk import initiate_stk_push
+from .settlement import process_stk_callback, process_b2c_callback
+from .inbox import record_callback
+from app.pagination import CreatedAtCursorPagination, TransactionDateCursorPagination
+from .exports import streaming_csv_response, parse_date_range, format_date, EXPORT_CHUNK_SIZE
 from .serializers import PaymentSerializer, SubscriptionPaymentSerializer
 
 logger = logging.getLogger(__name__)
@@ -76,6 +79,44 @@ def validate_mpesa_payment(phone_number, amount):
 # ------------------------------
 # M-PESA STK PUSH FUNCTIONS
 # ------------------------------
+def start_stk_push(kind, payment, phone_number, id_field, status_url, label):
+    """
+    Send (or queue) the STK push for a freshly created pending payment.
+    With MPESA_ASYNC_STK the Daraja call runs in a Celery task and the client gets
+    202 with the payment id straight away; it then polls status_url for the checkout
+    id or failure reason.
+    """
+    if settings.MPESA_ASYNC_STK:
+        from app.tasks import initiate_stk_push_task
+        transaction.on_commit(lambda: initiate_stk_push_task.delay(kind, payment.id, phone_number))
+        logger.info(f"{label} queued for payment {payment.id}")
+        return Response({
+            "success": True,
+            "message": f"{label} queued",
+            id_field: payment.id,
+            "status": payment.status,
+            "status_url": status_url
+        }, status=status.HTTP_202_ACCEPTED)
+
+    result = initiate_stk_push(kind, payment.id, phone_number)
+    if result["success"]:
+        return Response({
+            "success": True,
+            "message": f"{label} initiated successfully",
+            "checkout_request_id": result["checkout_request_id"],
+            id_field: payment.id
+        })
+
+    if "response_data" not in result:
+        # Never got an answer from Daraja (token or network failure)
+        return Response({"error": result["error"]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    return Response({
+        "error": f"Failed to initiate {label}",
+        "details": result["error"],
+        "response_data": result["response_data"]
+    }, status=status.HTTP_400_BAD_REQUEST)
+
 @csrf_exempt
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -112,87 +153,21 @@ def stk_push(request, unit_id):
         # Use cleaned phone number
         phone_number = validation_result
 
-        # Generate access token
-        access_token = generate_access_token()
-        if not access_token:
-            return Response({"error": "Failed to generate M-Pesa access token"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-        # Prepare STK push request - FIXED PASSWORD GENERATION
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        password_string = settings.MPESA_SHORTCODE + settings.MPESA_PASSKEY + timestamp
-        password = base64.b64encode(password_string.encode('utf-8')).decode('utf-8')
-
-        payload = {
-            "BusinessShortCode": settings.MPESA_SHORTCODE,
-            "Password": password,
-            "Timestamp": timestamp,
-            "TransactionType": "CustomerPayBillOnline",
-            "Amount": int(amount),
-            "PartyA": phone_number,
-            "PartyB": settings.MPESA_SHORTCODE,
-            "PhoneNumber": phone_number,
-            "CallBackURL": settings.MPESA_RENT_CALLBACK_URL,
-            "AccountReference": f"RENT-{unit.unit_code}",
-            "TransactionDesc": f"Rent payment for {unit.unit_number}"
-        }
-
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Content-Type": "application/json"
-        }
-
-        # Use correct URL based on environment
-        if settings.MPESA_ENV == "sandbox":
-            url = "https://sandbox.safaricom.co.ke/mpesa/stkpush/v1/processrequest"
-        else:
-            url = "https://api.safaricom.co.ke/mpesa/stkpush/v1/processrequest"
-
-        logger.info(f"Sending STK push to: {url}")
-        logger.info(f"Payload: {payload}")
-
-        response = requests.post(url, json=payload, headers=headers, timeout=30)
-        response_data = response.json()
-
-        logger.info(f"STK push response: {response_data}")
-
-        if response.status_code == 200 and response_data.get("ResponseCode") == "0":
-            # Create pending payment record
-            payment = Payment.objects.create(
-                tenant=tenant,
-                unit=unit,
-                amount=amount,
-                status="Pending",
-                payment_type="rent",
-                mpesa_checkout_request_id=response_data["CheckoutRequestID"]
-            )
-
-            # Cache checkout request ID for callback
-            cache_key = f"stk_{response_data['CheckoutRequestID']}"
-            cache_data = {
-                "payment_id": payment.id,
-                "unit_id": unit.id,
-                "amount": float(amount),
-                "tenant_id": tenant.id
-            }
-            cache.set(cache_key, cache_data, timeout=300)  # 5 minutes
-
-            logger.info(f"STK push initiated successfully. Payment ID: {payment.id}, Cache Key: {cache_key}")
-
-            return Response({
-                "success": True,
-                "message": "STK push initiated successfully",
-                "checkout_request_id": response_data["CheckoutRequestID"],
-                "payment_id": payment.id
-            })
-
-        else:
-            error_message = response_data.get('errorMessage', response_data.get('ResponseDescription', 'Unknown error'))
-            logger.error(f"STK push failed: {error_message}")
-            return Response({
-                "error": "Failed to initiate STK push",
-                "details": error_message,
-                "response_data": response_data
-            }, status=status.HTTP_400_BAD_REQUEST)
+        # Create pending payment record, then send the STK push for it
+        payment = Payment.objects.create(
+            tenant=tenant,
+            unit=unit,
+            amount=amount,
+            status="Pending",
+            payment_type="rent"
+        )
+
+        return start_stk_push(
+            "rent", payment, phone_number,
+            id_field="payment_id",
+            status_url=reverse('payment-status', args=[payment.id]),
+            label="STK push"
+        )
 
     except Exception as e:
         logger.error(f"STK push error: {str(e)}", exc_info=True)
@@ -232,76 +207,20 @@ def stk_push_subscription(request):
         
         phone_number = validation_result
 
-        # Generate access token
-        access_token = generate_access_token()
-        if not access_token:
-            return Response({"error": "Failed to generate M-Pesa access token"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-        # Prepare STK push request - FIXED PASSWORD
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        password_string = settings.MPESA_SHORTCODE + settings.MPESA_PASSKEY + timestamp
-        password = base64.b64encode(password_string.encode('utf-8')).decode('utf-8')
-
-        payload = {
-            "BusinessShortCode": settings.MPESA_SHORTCODE,
-            "Password": password,
-            "Timestamp": timestamp,
-            "TransactionType": "CustomerPayBillOnline",
-            "Amount": amount,
-            "PartyA": phone_number,
-            "PartyB": settings.MPESA_SHORTCODE,
-            "PhoneNumber": phone_number,
-            "CallBackURL": settings.MPESA_SUBSCRIPTION_CALLBACK_URL,
-            "AccountReference": f"SUB-{user.id}",
-            "TransactionDesc": f"Subscription payment for {plan} plan"
-        }
-
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Content-Type": "application/json"
-        }
-
-        # Make STK push request
-        if settings.MPESA_ENV == "sandbox":
-            url = "https://sandbox.safaricom.co.ke/mpesa/stkpush/v1/processrequest"
-        else:
-            url = "https://api.safaricom.co.ke/mpesa/stkpush/v1/processrequest"
-
-        response = requests.post(url, json=payload, headers=headers, timeout=30)
-        response_data = response.json()
-
-        if response.status_code == 200 and response_data.get("ResponseCode") == "0":
-            # Create pending subscription payment record
-            subscription_payment = SubscriptionPayment.objects.create(
-                user=user,
-                amount=Decimal(amount),
-                subscription_type=plan,
-                status="Pending",
-                mpesa_checkout_request_id=response_data["CheckoutRequestID"]
-            )
-
-            # Cache checkout request ID for callback
-            cache_key = f"stk_sub_{response_data['CheckoutRequestID']}"
-            cache.set(cache_key, {
-                "subscription_payment_id": subscription_payment.id,
-                "user_id": user.id,
-                "plan": plan,
-                "amount": amount
-            }, timeout=300)  # 5 minutes
-
-            return Response({
-                "success": True,
-                "message": "Subscription STK push initiated successfully",
-                "checkout_request_id": response_data["CheckoutRequestID"],
-                "subscription_payment_id": subscription_payment.id
-            })
-
-        else:
-            error_message = response_data.get('errorMessage', response_data.get('ResponseDescription', 'Unknown error'))
-            return Response({
-                "error": "Failed to initiate subscription STK push",
-                "details": error_message
-            }, status=status.HTTP_400_BAD_REQUEST)
+        # Create pending subscription payment record, then send the STK push for it
+        subscription_payment = SubscriptionPayment.objects.create(
+            user=user,
+            amount=Decimal(amount),
+            subscription_type=plan,
+            status="Pending"
+        )
+
+        return start_stk_push(
+            "subscription", subscription_payment, phone_number,
+            id_field="subscription_payment_id",
+            status_url=reverse('subscription-payment-detail', args=[subscription_payment.id]),
+            label="subscription STK push"
+        )
 
     except Exception as e:
         logger.error(f"Subscription STK push error: {str(e)}", exc_info=True)
@@ -310,485 +229,64 @@ def stk_push_subscription(request):
 # ------------------------------
 # M-PESA CALLBACK FUNCTIONS (FIXED VERSIONS)
 # ------------------------------
-@csrf_exempt
-def mpesa_rent_callback(request):
+def _handle_callback(request, kind):
     """
-    Enhanced rent payment callback handler
+    Shared Daraja callback handler.
+    With MPESA_CALLBACK_INBOX on, the raw body is stored and acked straight
+    away; a Celery worker settles it. Otherwise settlement runs inline.
+    Settlement is idempotent, so any unexpected error is answered with
+    ResultCode 1 and Daraja's retry is safe to apply.
     """
     try:
-        callback_data = json.loads(request.body)
-        logger.info(f"Rent callback received: {callback_data}")
-
-        stk_callback = callback_data.get("Body", {}).get("stkCallback", {})
-        result_code = stk_callback.get("ResultCode")
-        result_desc = stk_callback.get("ResultDesc", "")
-        checkout_request_id = stk_callback.get("CheckoutRequestID")
+        if settings.MPESA_CALLBACK_INBOX:
+            record_callback(kind, request.body)
+            return JsonResponse({"ResultCode": 0, "ResultDesc": "Accepted"})
 
-        logger.info(f"Rent callback - ResultCode: {result_code}, CheckoutRequestID: {checkout_request_id}")
-
-        if result_code == 0:
-            # Payment successful
-            callback_metadata = stk_callback.get("CallbackMetadata", {}).get("Item", [])
-            
-            # Extract payment details
-            mpesa_receipt = None
-            amount = None
-            phone_number = None
-
-            for item in callback_metadata:
-                if item.get("Name") == "MpesaReceiptNumber":
-                    mpesa_receipt = item.get("Value")
-                elif item.get("Name") == "Amount":
-                    amount = item.get("Value")
-                elif item.get("Name") == "PhoneNumber":
-                    phone_number = item.get("Value")
-
-            # Get cached payment data
-            cached_data = cache.get(f"stk_{checkout_request_id}") if checkout_request_id else None
-            
-            if cached_data:
-                try:
-                    payment = Payment.objects.get(id=cached_data["payment_id"])
-                    unit = payment.unit
-                    
-                    # Update payment record
-                    payment.status = "Success"
-                    payment.mpesa_receipt = mpesa_receipt or f"RENT-{payment.id}-{uuid.uuid4().hex[:8].upper()}"
-                    
-                    if amount:
-                        payment.amount = Decimal(amount)
-                    
-                    payment.save()
-
-                    # Update unit rent_paid
-                    paid_amount = Decimal(amount) if amount else payment.amount
-                    unit.rent_paid += paid_amount
-                    unit.rent_remaining = unit.rent - unit.rent_paid
-                    unit.save()
-
-                    logger.info(f"Rent payment {payment.id} completed successfully for unit {unit.unit_number}")
-                    logger.info(f"Unit {unit.unit_number} rent paid: {unit.rent_paid}, remaining: {unit.rent_remaining}")
-                    
-                    # Clear cache
-                    cache.delete(f"stk_{checkout_request_id}")
-
-                except Payment.DoesNotExist:
-                    logger.error(f"Rent payment not found for ID: {cached_data['payment_id']}")
-                except Unit.DoesNotExist:
-                    logger.error(f"Unit not found for rent payment: {cached_data['payment_id']}")
-                except Exception as e:
-                    logger.error(f"Error processing rent callback: {str(e)}")
-
-            else:
-                logger.warning(f"No cached data found for rent checkout: {checkout_request_id}")
+        callback_data = json.loads(request.body)
+        logger.info(f"{kind.capitalize()} callback received: {callback_data}")
 
+        if kind == "b2c":
+            process_b2c_callback(callback_data)
         else:
-            # Payment failed
-            logger.error(f"Rent payment failed - ResultCode: {result_code}, Description: {result_desc}")
-            
-            # Update payment status to failed
-            if checkout_request_id:
-                cached_data = cache.get(f"stk_{checkout_request_id}")
-                if cached_data:
-                    try:
-                        payment = Payment.objects.get(id=cached_data["payment_id"])
-                        payment.status = "Failed"
-                        payment.failure_reason = result_desc
-                        payment.save()
-                        logger.info(f"Rent payment {payment.id} marked as failed: {result_desc}")
-                    except Payment.DoesNotExist:
-                        logger.error(f"Rent payment not found for failed callback: {cached_data['payment_id']}")
-
+            process_stk_callback(kind, callback_data)
         return JsonResponse({"ResultCode": 0, "ResultDesc": "Accepted"})
 
     except json.JSONDecodeError:
-        logger.error("Invalid JSON in rent callback")
+        logger.error(f"Invalid JSON in {kind} callback")
         return JsonResponse({"ResultCode": 1, "ResultDesc": "Invalid JSON"})
     except Exception as e:
-        logger.error(f"Unexpected error in rent callback: {str(e)}")
+        logger.error(f"Unexpected error in {kind} callback: {str(e)}", exc_info=True)
         return JsonResponse({"ResultCode": 1, "ResultDesc": "Internal error"})
 
+
 @csrf_exempt
-def mpesa_deposit_callback(request):
+def mpesa_rent_callback(request):
     """
-    Enhanced deposit payment callback handler
+    Rent payment callback handler
     """
-    try:
-        callback_data = json.loads(request.body)
-        logger.info(f"Deposit callback received: {callback_data}")
-
-        stk_callback = callback_data.get("Body", {}).get("stkCallback", {})
-        result_code = stk_callback.get("ResultCode")
-        result_desc = stk_callback.get("ResultDesc", "")
-        checkout_request_id = stk_callback.get("CheckoutRequestID")
-
-        logger.info(f"Deposit callback - ResultCode: {result_code}, CheckoutRequestID: {checkout_request_id}")
-
-        if result_code == 0:
-            # Payment successful
-            callback_metadata = stk_callback.get("CallbackMetadata", {}).get("Item", [])
-            
-            # Extract payment details
-            mpesa_receipt = None
-            amount = None
-            phone_number = None
-
-            for item in callback_metadata:
-                if item.get("Name") == "MpesaReceiptNumber":
-                    mpesa_receipt = item.get("Value")
-                elif item.get("Name") == "Amount":
-                    amount = item.get("Value")
-                elif item.get("Name") == "PhoneNumber":
-                    phone_number = item.get("Value")
-
-            # Get cached payment data
-            cached_data = cache.get(f"stk_deposit_{checkout_request_id}") if checkout_request_id else None
-            
-            if cached_data:
-                try:
-                    payment = Payment.objects.get(id=cached_data["payment_id"])
-                    unit = payment.unit
-                    
-                    # Update payment record
-                    payment.status = "Success"
-                    payment.mpesa_receipt = mpesa_receipt or f"DEP-{payment.id}-{uuid.uuid4().hex[:8].upper()}"
-                    
-                    if amount:
-                        payment.amount = Decimal(amount)
-                    
-                    payment.save()
-
-                    # Mark unit as occupied and assign tenant
-                    unit.is_available = False
-                    unit.tenant = payment.tenant
-                    unit.assigned_date = timezone.now()
-                    unit.save()
-
-                    logger.info(f"Deposit payment {payment.id} completed successfully for unit {unit.unit_number}")
-                    logger.info(f"Unit {unit.unit_number} assigned to tenant {payment.tenant.email}")
-                    
-                    # Clear cache
-                    cache.delete(f"stk_deposit_{checkout_request_id}")
-
-                except Payment.DoesNotExist:
-                    logger.error(f"Deposit payment not found for ID: {cached_data['payment_id']}")
-                except Unit.DoesNotExist:
-                    logger.error(f"Unit not found for deposit payment: {cached_data['payment_id']}")
-                except Exception as e:
-                    logger.error(f"Error processing deposit callback: {str(e)}")
-
-            else:
-                logger.warning(f"No cached data found for deposit checkout: {checkout_request_id}")
-
-        else:
-            # Payment failed
-            logger.error(f"Deposit payment failed - ResultCode: {result_code}, Description: {result_desc}")
-            
-            # Update payment status to failed
-            if checkout_request_id:
-                cached_data = cache.get(f"stk_deposit_{checkout_request_id}")
-                if cached_data:
-                    try:
-                        payment = Payment.objects.get(id=cached_data["payment_id"])
-                        payment.status = "Failed"
-                        payment.failure_reason = result_desc
-                        payment.save()
-                        logger.info(f"Deposit payment {payment.id} marked as failed: {result_desc}")
-                    except Payment.DoesNotExist:
-                        logger.error(f"Deposit payment not found for failed callback: {cached_data['payment_id']}")
-
-        return JsonResponse({"ResultCode": 0, "ResultDesc": "Accepted"})
-
-    except json.JSONDecodeError:
-        logger.error("Invalid JSON in deposit callback")
-        return JsonResponse({"ResultCode": 1, "ResultDesc": "Invalid JSON"})
-    except Exception as e:
-        logger.error(f"Unexpected error in deposit callback: {str(e)}")
-        return JsonResponse({"ResultCode": 1, "ResultDesc": "Internal error"})
+    return _handle_callback(request, "rent")
 
 @csrf_exempt
-def mpesa_subscription_callback(request):
+def mpesa_deposit_callback(request):
     """
-    Enhanced subscription payment callback handler
+    Deposit payment callback handler
     """
-    try:
-        callback_data = json.loads(request.body)
-        logger.info(f"Subscription callback received: {callback_data}")
-
-        stk_callback = callback_data.get("Body", {}).get("stkCallback", {})
-        result_code = stk_callback.get("ResultCode")
-        result_desc = stk_callback.get("ResultDesc", "")
-        checkout_request_id = stk_callback.get("CheckoutRequestID")
-
-        logger.info(f"Subscription callback - ResultCode: {result_code}, CheckoutRequestID: {checkout_request_id}")
-
-        if result_code == 0:
-            # Payment successful
-            callback_metadata = stk_callback.get("CallbackMetadata", {}).get("Item", [])
-            
-            # Extract payment details
-            mpesa_receipt = None
-            amount = None
-            phone_number = None
-
-            for item in callback_metadata:
-                if item.get("Name") == "MpesaReceiptNumber":
-                    mpesa_receipt = item.get("Value")
-                elif item.get("Name") == "Amount":
-                    amount = item.get("Value")
-                elif item.get("Name") == "PhoneNumber":
-                    phone_number = item.get("Value")
-
-            # Get cached subscription payment data
-            cached_data = cache.get(f"stk_sub_{checkout_request_id}") if checkout_request_id else None
-            
-            if cached_data:
-                try:
-                    subscription_payment = SubscriptionPayment.objects.get(
-                        id=cached_data["subscription_payment_id"]
-                    )
-                    user = subscription_payment.user
-                    
-                    # Update subscription payment record
-                    subscription_payment.status = "Success"
-                    subscription_payment.mpesa_receipt_number = (
-                        mpesa_receipt or 
-                        f"SUB-{subscription_payment.id}-{uuid.uuid4().hex[:8].upper()}"
-                    )
-                    
-                    if amount:
-                        subscription_payment.amount = Decimal(amount)
-                    
-                    subscription_payment.save()
-
-                    # Update or create user subscription
-                    subscription, created = Subscription.objects.get_or_create(
-                        user=user,
-                        defaults={
-                            'plan': subscription_payment.subscription_type,
-                            'expiry_date': timezone.now() + timedelta(days=30)
-                        }
-                    )
-                    
-                    if not created:
-                        # Update existing subscription
-                        subscription.plan = subscription_payment.subscription_type
-                        subscription.expiry_date = timezone.now() + timedelta(days=30)
-                        subscription.save()
-
-                    logger.info(f"Subscription payment {subscription_payment.id} completed successfully")
-                    logger.info(f"User {user.email} subscription updated to {subscription_payment.subscription_type}")
-                    
-                    # Clear cache
-                    cache.delete(f"stk_sub_{checkout_request_id}")
-
-                except SubscriptionPayment.DoesNotExist:
-                    logger.error(f"Subscription payment not found for ID: {cached_data['subscription_payment_id']}")
-                except Exception as e:
-                    logger.error(f"Error processing subscription callback: {str(e)}")
-
-            else:
-                logger.warning(f"No cached data found for subscription checkout: {checkout_request_id}")
-
-        else:
-            # Payment failed
-            logger.error(f"Subscription payment failed - ResultCode: {result_code}, Description: {result_desc}")
-            
-            # Update payment status to failed
-            if checkout_request_id:
-                cached_data = cache.get(f"stk_sub_{checkout_request_id}")
-                if cached_data:
-                    try:
-                        subscription_payment = SubscriptionPayment.objects.get(
-                            id=cached_data["subscription_payment_id"]
-                        )
-                        subscription_payment.status = "Failed"
-                        subscription_payment.failure_reason = result_desc
-                        subscription_payment.save()
-                        logger.info(f"Subscription payment {subscription_payment.id} marked as failed: {result_desc}")
-                    except SubscriptionPayment.DoesNotExist:
-                        logger.error(f"Subscription payment not found for failed callback: {cached_data['subscription_payment_id']}")
-
-        return JsonResponse({"ResultCode": 0, "ResultDesc": "Accepted"})
-
-    except json.JSONDecodeError:
-        logger.error("Invalid JSON in subscription callback")
-        return JsonResponse({"ResultCode": 1, "ResultDesc": "Invalid JSON"})
-    except Exception as e:
-        logger.error(f"Unexpected error in subscription callback: {str(e)}")
-        return JsonResponse({"ResultCode": 1, "ResultDesc": "Internal error"})
+    return _handle_callback(request, "deposit")
 
-# Update the InitiateDepositPaymentView with the same fixes
-class InitiateDepositPaymentView(APIView):
+@csrf_exempt
+def mpesa_subscription_callback(request):
     """
-    Initiate REAL deposit payment for unit
+    Subscription payment callback handler
     """
-    permission_classes = [IsAuthenticated]
-
-    def post(self, request):
-        unit_id = request.data.get('unit_id')
-        unit = get_object_or_404(Unit, id=unit_id)
-
-        if not unit.is_available:
-            return Response({"error": "Unit is not available"}, status=status.HTTP_400_BAD_REQUEST)
-
-        tenant = request.user
-        amount = unit.deposit
-        phone_number = tenant.phone_number
+    return _handle_callback(request, "subscription")
 
-        if not phone_number:
-            return Response({"error": "Phone number is required"}, status=status.HTTP_400_BAD_REQUEST)
-
-        # ✅ ADD VALIDATION HERE
-        is_valid, validation_result = validate_mpesa_payment(phone_number, amount)
-        if not is_valid:
-            return Response({"error": validation_result}, status=status.HTTP_400_BAD_REQUEST)
-        
-        phone_number = validation_result
-
-        # Generate access token
-        access_token = generate_access_token()
-        if not access_token:
-            return Response({"error": "Failed to generate M-Pesa access token"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-        # Prepare STK push request - FIXED PASSWORD GENERATION
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        password_string = settings.MPESA_SHORTCODE + settings.MPESA_PASSKEY + timestamp
-        password = base64.b64encode(password_string.encode('utf-8')).decode('utf-8')
-
-        payload = {
-            "BusinessShortCode": settings.MPESA_SHORTCODE,
-            "Password": password,
-            "Timestamp": timestamp,
-            "TransactionType": "CustomerPayBillOnline",
-            "Amount": int(amount),
-            "PartyA": phone_number,
-            "PartyB": settings.MPESA_SHORTCODE,
-            "PhoneNumber": phone_number,
-            "CallBackURL": settings.MPESA_DEPOSIT_CALLBACK_URL,
-            "AccountReference": f"DEPOSIT-{unit.unit_code}",
-            "TransactionDesc": f"Deposit payment for {unit.unit_number}"
-        }
-
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Content-Type": "application/json"
-        }
-
-        # Use correct URL
-        if settings.MPESA_ENV == "sandbox":
-            url = "https://sandbox.safaricom.co.ke/mpesa/stkpush/v1/processrequest"
-        else:
-            url = "https://api.safaricom.co.ke/mpesa/stkpush/v1/processrequest"
-
-        response = requests.post(url, json=payload, headers=headers, timeout=30)
-        response_data = response.json()
-
-        if response.status_code == 200 and response_data.get("ResponseCode") == "0":
-            # Create pending deposit payment record
-            payment = Payment.objects.create(
-                tenant=tenant,
-                unit=unit,
-                amount=amount,
-                status="Pending",
-                payment_type="deposit",
-                mpesa_checkout_request_id=response_data["CheckoutRequestID"]
-            )
-
-            # Cache checkout request ID for callback
-            cache.set(f"stk_deposit_{response_data['CheckoutRequestID']}", {
-                "payment_id": payment.id,
-                "unit_id": unit.id,
-                "amount": float(amount),
-                "tenant_id": tenant.id
-            }, timeout=300)  # 5 minutes
-
-            logger.info(f"Deposit STK push initiated for payment {payment.id}, amount {amount}")
-
-            return Response({
-                "success": True,
-                "message": "Deposit STK push initiated successfully",
-                "checkout_request_id": response_data["CheckoutRequestID"],
-                "payment_id": payment.id
-            })
-
-        else:
-            error_message = response_data.get('errorMessage', response_data.get('ResponseDescription', 'Unknown error'))
-            logger.error(f"Deposit STK push failed: {error_message}")
-            return Response({
-                "error": "Failed to initiate deposit STK push",
-                "details": error_message
-            }, status=status.HTTP_400_BAD_REQUEST)
 @csrf_exempt
 def mpesa_b2c_callback(request):
     """
     Handle M-Pesa B2C payment callback
     """
-    try:
-        callback_data = json.loads(request.body)
-        logger.info(f"B2C callback received: {callback_data}")
-
-        result = callback_data.get("Result", {})
-
-        if result.get("ResultCode") == 0:
-            # Successful B2C payment
-            result_parameters = result.get("ResultParameters", {}).get("ResultParameter", [])
-
-            transaction_receipt = None
-            transaction_amount = None
-            conversation_id = result.get("ConversationID")
-
-            # Extract relevant parameters
-            for param in result_parameters:
-                if param["Key"] == "TransactionReceipt":
-                    transaction_receipt = param["Value"]
-                elif param["Key"] == "TransactionAmount":
-                    transaction_amount = param["Value"]
-
-            # Get cached B2C payment data if exists
-            cached_data = cache.get(f"b2c_{conversation_id}")
-            if cached_data:
-                # Update payment status or perform business logic here
-                # For example, mark disbursement as successful
-                logger.info(f"B2C payment successful: Receipt {transaction_receipt}, Amount {transaction_amount}")
-                cache.delete(f"b2c_{conversation_id}")
-            else:
-                logger.info(f"B2C payment successful (no cached data): Receipt {transaction_receipt}, Amount {transaction_amount}")
-
-        else:
-            # Failed B2C payment
-            logger.error(f"B2C payment failed: {result.get('ResultDesc')}")
-
-        return JsonResponse({"ResultCode": 0, "ResultDesc": "Accepted"})
-
-    except Exception as e:
-        logger.error(f"B2C callback error: {str(e)}")
-        return JsonResponse({"ResultCode": 1, "ResultDesc": "Error"})
-class DepositPaymentStatusView(APIView):
-    """
-    Check deposit payment status - FIXED VERSION
-    """
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request, payment_id):
-        try:
-            payment = Payment.objects.get(id=payment_id)
-            
-            # Check if user has permission to view this payment
-            if request.user.user_type == 'tenant' and payment.tenant != request.user:
-                return Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
-
-            if request.user.user_type == 'landlord' and payment.unit.property_obj.landlord != request.user:
-                return Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+    return _handle_callback(request, "b2c")
 
-            return Response({
-                "payment_id": payment.id,
-                "status": payment.status,
-                "amount": float(payment.amount),
-                "mpesa_receipt": payment.mpesa_receipt_number if hasattr(payment, 'mpesa_receipt_number') else payment.mpesa_receipt
-            })
-        except Payment.DoesNotExist:
-            return Response({"error": "Payment not found"}, status=status.HTTP_404_NOT_FOUND)
 # ------------------------------
 # DRF CLASS-BASED VIEWS
 # ------------------------------
@@ -799,6 +297,7 @@ class PaymentListCreateView(generics.ListCreateAPIView):
     """
     serializer_class = PaymentSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -806,7 +305,7 @@ class PaymentListCreateView(generics.ListCreateAPIView):
             return Payment.objects.filter(tenant=user)
         elif user.user_type == 'landlord':
             # Landlords can see payments for their properties
-            return Payment.objects.filter(unit__property_obj__landlord=user)
+            return Payment.objects.for_landlord(user)
         return Payment.objects.none()
 
     def perform_create(self, serializer):
@@ -825,7 +324,7 @@ class PaymentDetailView(generics.RetrieveUpdateDestroyAPIView):
         if user.user_type == 'tenant':
             return Payment.objects.filter(tenant=user)
         elif user.user_type == 'landlord':
-            return Payment.objects.filter(unit__property_obj__landlord=user)
+            return Payment.objects.for_landlord(user)
         return Payment.objects.none()
 
 
@@ -835,6 +334,7 @@ class SubscriptionPaymentListCreateView(generics.ListCreateAPIView):
     """
     serializer_class = SubscriptionPaymentSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = TransactionDateCursorPagination
 
     def get_queryset(self):
         return SubscriptionPayment.objects.filter(user=self.request.user)
@@ -858,6 +358,7 @@ class RentSummaryView(APIView):
     """
     Get rent summary for landlord
     """
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -865,24 +366,15 @@ class RentSummaryView(APIView):
         if user.user_type != 'landlord':
             return Response({"error": "Only landlords can access this endpoint"}, status=status.HTTP_403_FORBIDDEN)
 
-        # Calculate total collected and outstanding rent
-        properties = Property.objects.filter(landlord=user)
-        units = Unit.objects.filter(property_obj__in=properties)
-
-        total_collected = Payment.objects.filter(
-            unit__in=units,
-            status='Success'
-        ).aggregate(total=Sum('amount'))['total'] or 0
-
-        total_outstanding = units.aggregate(
-            outstanding=Sum('rent_remaining')
-        )['outstanding'] or 0
+        # Counts and totals come from the cached landlord stats
+        stats, cached = get_landlord_stats(user.id)
 
         return Response({
-            "total_collected": total_collected,
-            "total_outstanding": total_outstanding,
-            "properties_count": properties.count(),
-            "units_count": units.count()
+            "total_collected": stats["total_collected"],
+            "total_outstanding": stats["total_outstanding"],
+            "properties_count": stats["properties_count"],
+            "units_count": stats["units_count"],
+            "cached": cached,
         })
 
 
@@ -923,84 +415,26 @@ class InitiateDepositPaymentView(APIView):
         is_valid, validation_message = validate_mpesa_payment(phone_number, amount)
         if not is_valid:
             return Response({"error": validation_message}, status=status.HTTP_400_BAD_REQUEST)
-        # Generate access token
-        access_token = generate_access_token()
-        if not access_token:
-            return Response({"error": "Failed to generate M-Pesa access token"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-        # Prepare STK push request for PRODUCTION
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        password = base64.b64encode(
-            (settings.MPESA_SHORTCODE + settings.MPESA_PASSKEY + timestamp).encode('utf-8')
-        ).decode('utf-8')
-
-        payload = {
-            "BusinessShortCode": settings.MPESA_SHORTCODE,
-            "Password": password,
-            "Timestamp": timestamp,
-            "TransactionType": "CustomerPayBillOnline",
-            "Amount": int(amount),
-            "PartyA": phone_number,
-            "PartyB": settings.MPESA_SHORTCODE,
-            "PhoneNumber": phone_number,
-            "CallBackURL": settings.MPESA_DEPOSIT_CALLBACK_URL,
-            "AccountReference": f"DEPOSIT-{unit.unit_code}",
-            "TransactionDesc": f"Deposit payment for {unit.unit_number}"
-        }
+        # Create pending deposit payment record, then send the STK push for it
+        payment = Payment.objects.create(
+            tenant=tenant,
+            unit=unit,
+            amount=amount,
+            status="Pending",
+            payment_type="deposit"
+        )
 
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Content-Type": "application/json"
-        }
+        return start_stk_push(
+            "deposit", payment, phone_number,
+            id_field="payment_id",
+            status_url=reverse('payment-status', args=[payment.id]),
+            label="deposit STK push"
+        )
 
-        # Use production URL
-        if settings.MPESA_ENV == "sandbox":
-            url = "https://sandbox.safaricom.co.ke/mpesa/stkpush/v1/processrequest"
-        else:
-            url = "https://api.safaricom.co.ke/mpesa/stkpush/v1/processrequest"
-
-        response = requests.post(url, json=payload, headers=headers, timeout=30)
-        response_data = response.json()
-
-        if response.status_code == 200 and response_data.get("ResponseCode") == "0":
-            # Create pending deposit payment record
-            payment = Payment.objects.create(
-                tenant=tenant,
-                unit=unit,
-                amount=amount,
-                status="Pending",
-                payment_type="deposit",
-                mpesa_checkout_request_id=response_data["CheckoutRequestID"]
-            )
-
-            # Cache checkout request ID for callback
-            cache.set(f"stk_deposit_{response_data['CheckoutRequestID']}", {
-                "payment_id": payment.id,
-                "unit_id": unit.id,
-                "amount": float(amount),
-                "tenant_id": tenant.id
-            }, timeout=300)  # 5 minutes
-
-            logger.info(f"Deposit STK push initiated for payment {payment.id}, amount {amount}")
-
-            return Response({
-                "success": True,
-                "message": "Deposit STK push initiated successfully",
-                "checkout_request_id": response_data["CheckoutRequestID"],
-                "payment_id": payment.id
-            })
 
-        else:
-            logger.error(f"Deposit STK push failed: {response_data}")
-            return Response({
-                "error": "Failed to initiate deposit STK push",
-                "details": response_data.get('errorMessage', 'Unknown error')
-            }, status=status.HTTP_400_BAD_REQUEST)
-
-
-class DepositPaymentStatusView(APIView):
+class PaymentStatusView(APIView):
     """
-    Check deposit payment status
+    Check the status of a rent or deposit payment
     """
     permission_classes = [IsAuthenticated]
 
@@ -1011,20 +445,30 @@ class DepositPaymentStatusView(APIView):
         if request.user.user_type == 'tenant' and payment.tenant != request.user:
             return Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
 
-        if request.user.user_type == 'landlord' and payment.unit.property_obj.landlord != request.user:
+        if request.user.user_type == 'landlord' and payment.landlord_id != request.user.id:
             return Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
 
         return Response({
             "payment_id": payment.id,
             "status": payment.status,
             "amount": payment.amount,
-            "mpesa_receipt": payment.mpesa_receipt
+            "mpesa_receipt": payment.mpesa_receipt,
+            "checkout_request_id": payment.mpesa_checkout_request_id,
+            "failure_reason": payment.failure_reason
         })
 
 
+class DepositPaymentStatusView(PaymentStatusView):
+    """
+    Check deposit payment status (kept for clients polling deposit-status)
+    """
+
+
 class CleanupPendingPaymentsView(APIView):
     """
-    Clean up old pending payments - ENHANCED VERSION
+    Clean up old pending payments that never reached Daraja.
+    Payments with a CheckoutRequestID may still have been paid; the
+    reconciler (payments/reconcile.py) settles or fails those instead.
     """
     permission_classes = [IsAuthenticated]
 
@@ -1035,12 +479,14 @@ class CleanupPendingPaymentsView(APIView):
         # Clean up rent payments
         rent_deleted_count = Payment.objects.filter(
             status='Pending',
+            mpesa_checkout_request_id__isnull=True,
             created_at__lt=cutoff_time
         ).delete()
 
         # Clean up subscription payments  
         subscription_deleted_count = SubscriptionPayment.objects.filter(
             status='Pending',
+            mpesa_checkout_request_id__isnull=True,
             transaction_date__lt=cutoff_time
         ).delete()
 
@@ -1055,72 +501,94 @@ class CleanupPendingPaymentsView(APIView):
 
 class LandLordCSVView(APIView):
     """
-    Export landlord payment data as CSV
+    Export landlord payment data as CSV.
+    Streams rows straight from the database so large histories don't
+    load into memory. Optional query params:
+    - start_date / end_date: YYYY-MM-DD, inclusive
+    - properties: comma separated property ids (when no property_id in the URL)
     """
     permission_classes = [IsAuthenticated]
 
-    def get(self, request, property_id):
+    def get(self, request, property_id=None):
         user = request.user
         if user.user_type != 'landlord':
             return Response({"error": "Only landlords can access this endpoint"}, status=status.HTTP_403_FORBIDDEN)
 
-        property_obj = get_object_or_404(Property, id=property_id, landlord=user)
-        units = Unit.objects.filter(property_obj=property_obj)
-        payments = Payment.objects.filter(unit__in=units, status='Success')
-
-        # Create CSV response
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="landlord_payments_{property_obj.name}.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow(['Unit Number', 'Tenant', 'Amount', 'Date', 'M-Pesa Receipt'])
-
-        for payment in payments:
-            writer.writerow([
-                payment.unit.unit_number,
-                payment.tenant.full_name if payment.tenant else '',
-                payment.amount,
-                payment.transaction_date.strftime('%Y-%m-%d'),
-                payment.mpesa_receipt or ''
-            ])
-
-        return response
+        try:
+            date_filters = parse_date_range(request.query_params)
+        except ValueError as e:
+            return Response({"error": f"Invalid date range: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        payments = Payment.objects.for_landlord(user).filter(status='Success', **date_filters)
+        if property_id is not None:
+            property_obj = get_object_or_404(Property, id=property_id, landlord=user)
+            payments = payments.filter(unit__property_obj_id=property_obj.id)
+            filename = f"landlord_payments_{property_obj.name}.csv"
+        else:
+            requested = request.query_params.get('properties')
+            if requested:
+                try:
+                    requested_ids = {int(pk) for pk in requested.split(',') if pk.strip()}
+                except ValueError:
+                    return Response({"error": "properties must be a comma separated list of ids"}, status=status.HTTP_400_BAD_REQUEST)
+                property_ids = list(
+                    Property.objects.filter(landlord=user, id__in=requested_ids).values_list('id', flat=True)
+                )
+                if len(property_ids) != len(requested_ids):
+                    return Response({"error": "Property not found"}, status=status.HTTP_404_NOT_FOUND)
+                payments = payments.filter(unit__property_obj_id__in=property_ids)
+            filename = "landlord_payments.csv"
+
+        # values_list joins unit/tenant/property in the same query, no per-row lookups
+        payments = payments.order_by('created_at', 'id').values_list(
+            'unit__property_obj__name', 'unit__unit_number', 'tenant__full_name',
+            'amount', 'created_at', 'mpesa_receipt'
+        )
+        rows = (
+            [property_name, unit_number, tenant_name or '', amount, format_date(created_at), receipt or '']
+            for property_name, unit_number, tenant_name, amount, created_at, receipt
+            in payments.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+        return streaming_csv_response(
+            filename, ['Property', 'Unit Number', 'Tenant', 'Amount', 'Date', 'M-Pesa Receipt'], rows
+        )
 
 
 class TenantCSVView(APIView):
     """
-    Export tenant payment data as CSV
+    Export tenant payment data as CSV.
+    Accepts optional start_date / end_date (YYYY-MM-DD, inclusive) query params.
     """
     permission_classes = [IsAuthenticated]
 
     def get(self, request, unit_id):
         user = request.user
-        unit = get_object_or_404(Unit, id=unit_id)
+        unit = get_object_or_404(Unit.objects.select_related('property_obj'), id=unit_id)
 
-        if user.user_type == 'tenant' and unit.tenant != user:
+        if user.user_type == 'tenant' and unit.tenant_id != user.id:
             return Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
 
-        if user.user_type == 'landlord' and unit.property_obj.landlord != user:
+        if user.user_type == 'landlord' and unit.landlord_id != user.id:
             return Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
 
-        payments = Payment.objects.filter(unit=unit, status='Success')
-
-        # Create CSV response
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="tenant_payments_unit_{unit.unit_number}.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow(['Amount', 'Date', 'M-Pesa Receipt', 'Type'])
-
-        for payment in payments:
-            writer.writerow([
-                payment.amount,
-                payment.transaction_date.strftime('%Y-%m-%d'),
-                payment.mpesa_receipt or '',
-                payment.payment_type
-            ])
-
-        return response
+        try:
+            date_filters = parse_date_range(request.query_params)
+        except ValueError as e:
+            return Response({"error": f"Invalid date range: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        payments = (
+            Payment.objects.filter(unit=unit, status='Success', **date_filters)
+            .order_by('created_at', 'id')
+            .values_list('amount', 'created_at', 'mpesa_receipt', 'payment_type')
+        )
+        rows = (
+            [amount, format_date(created_at), receipt or '', payment_type]
+            for amount, created_at, receipt, payment_type
+            in payments.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+        return streaming_csv_response(
+            f"tenant_payments_unit_{unit.unit_number}.csv", ['Amount', 'Date', 'M-Pesa Receipt', 'Type'], rows
+        )
 
 
 class TestMpesaView(APIView):
@@ -1133,7 +601,8 @@ class TestMpesaView(APIView):
         return Response({
             "message": "M-Pesa test endpoint",
             "mpesa_env": settings.MPESA_ENV,
-            "shortcode": settings.MPESA_SHORTCODE
+            "shortcode": settings.MPESA_SHORTCODE,
+            "token_stats": token_manager.stats()
         })
 
     def post(self, request):